@@ -5,9 +5,27 @@ import stress_and_rhyme_functions as student
 from tkinter import *
 from tkinter.filedialog import askopenfilename
 
+# The headless annotation functions - shared with the batch annotator
+import poem_annotation
+
+# Alliteration, assonance and internal rhyme - shown in their own window
+import sound_patterns
+
 # The OS module - so we can determine whether or not a file is in folder
 import os
 
+# The compiled dictionary cache - so we do not parse the dictionary every time
+import pronouncing_cache
+
+# The memory-mapped dictionary - so forked workers can share one copy
+import mapped_dictionary
+
+# The streaming dictionary parser - so the file is never all in memory
+import dictionary_parser
+
+# The background loader - so the window appears before the dictionary loads
+import dictionary_loader
+
 # Our Pronouncing Dictionary file.
 OUR_PRONOUNCING_DICTIONARY = 'our_dictionary.txt'
 
@@ -18,6 +36,25 @@ FONT_SIZE = 14
 MAX_LINES_IN_POEM = 17
 MAX_CHAR_IN_POEM_LINE = 70
 
+# The most poem lines whose stress patterns are remembered between
+# annotations; the memory is cleared when it is full.
+LINE_CACHE_SIZE = 1024
+
+# Milliseconds between checks on a dictionary loading in the background.
+LOAD_POLL_DELAY = 50
+
+# Milliseconds without a keystroke before the poem is annotated as it is
+# typed.
+LIVE_ANNOTATION_DELAY = 150
+
+# How the words of each sound pattern are marked in the sound patterns
+# window: Text tag options for each device.
+SOUND_PATTERN_STYLES = {
+    'alliteration': {'foreground': 'blue', 'underline': True},
+    'assonance': {'background': '#fff2a8'},
+    'internal rhyme': {'foreground': '#b00000',
+                       'font': (FONT, FONT_SIZE, 'bold')}}
+
 """
 A pronouncing table: a nested list, [list of str, list of list of str]
   o a two item list, contains two parallel lists 
@@ -33,8 +70,9 @@ A pronouncing table: a nested list, [list of str, list of list of str]
 # Function(s) that use CSC108 course material only.
 #
 
-def read_pronouncing_dictionary(filename):
-    """ (str) -> pronouncing table 
+def read_pronouncing_dictionary(filename, use_cache=True, mapped=False,
+                                guess_missing=False, progress=None):
+    """ (str, bool, bool, bool, function) -> pronouncing table 
     
     Precondition: filename is the name of a file in the current directory
                   that contains a pronouncing dictionary represented
@@ -43,20 +81,50 @@ def read_pronouncing_dictionary(filename):
     Return a pronouncing table for the pronouncing dictionary information 
     contained in file filename.
 
+    If use_cache is True, the table is loaded from the compiled cache next to
+    filename when that cache is up to date, and otherwise the cache is
+    rebuilt after filename has been parsed.
+
+    If mapped is True, return a read-only MappedPronouncingTable instead.  It
+    decodes entries from a memory-mapped index file only when they are used,
+    so processes reading the same dictionary share its memory.
+
+    If guess_missing is True, the table gives words that are not in the
+    dictionary a guessed pronunciation instead of none.
+
+    If progress is given, it is called as progress(done, total) while the
+    dictionary is read, with how much has been read so far and how much
+    there is in all (bytes of filename while it is parsed, and entries when
+    the table is loaded from the cache or index), and finally with done
+    equal to total.  It may be called from whichever thread is reading.
+
     Docstring example(s) not given since this function depends on file input.
     """
 
-    pronouncing_dictionary_file = open(filename, 'r')
-    
-    # Skip the header lines in the pronouncing dictionary.
-    line = pronouncing_dictionary_file.readline()
-    while line.startswith(';;;'):
-        line = pronouncing_dictionary_file.readline()
- 
-    # Read pronouncing information and put in table form
-    pronouncing_lines = pronouncing_dictionary_file.readlines()
-    pronouncing_table = student.make_pronouncing_table(pronouncing_lines)
-    
+    if mapped:
+        pronouncing_table = mapped_dictionary.open_mapped_table(filename)
+        pronouncing_table.guess_missing = guess_missing
+        if progress is not None:
+            progress(pronouncing_table.entry_count,
+                     pronouncing_table.entry_count)
+        return pronouncing_table
+
+    if use_cache:
+        pronouncing_table = pronouncing_cache.load_cached_table(filename)
+        if pronouncing_table is not None:
+            pronouncing_table.guess_missing = guess_missing
+            if progress is not None:
+                progress(len(pronouncing_table[0]), len(pronouncing_table[0]))
+            return pronouncing_table
+
+    # Parse the dictionary a chunk at a time, straight into the table.
+    pronouncing_table = dictionary_parser.read_pronouncing_table(filename,
+                                                                 progress)
+
+    if use_cache:
+        pronouncing_cache.save_cached_table(filename, pronouncing_table)
+
+    pronouncing_table.guess_missing = guess_missing
     return pronouncing_table
 
 #
@@ -73,22 +141,8 @@ def annotate_stress(poem_line, stress_pattern, pronouncing_table):
     pronouncing table pronouncing_table and modify stress_pattern accordingly.
     """
 
-    stress_line = ''
-    poem_line_str = poem_line.get()
-    words = poem_line_str.split()
-    index_in_poem_line = 0
-    number_of_blanks = 0
-    for word in words:
-        if len(stress_line) > 0:
-            # add number of blanks between words to match poem_line
-            number_of_blanks = (poem_line_str.index(word, index_in_poem_line) 
-                                - index_in_poem_line)
-            stress_line = stress_line + ' ' * number_of_blanks
-        stress_line = stress_line + student.get_stress_pattern(word, 
-                                                             pronouncing_table)
-        index_in_poem_line = index_in_poem_line + len(word) + number_of_blanks
-
-    stress_pattern.set(stress_line)
+    stress_pattern.set(poem_annotation.get_stress_line(poem_line.get(),
+                                                       pronouncing_table))
 
 
 def set_rhyme_scheme(poem_line_entries, rhyme_scheme_vars, pronouncing_table):
@@ -114,36 +168,105 @@ def set_rhyme_scheme(poem_line_entries, rhyme_scheme_vars, pronouncing_table):
 
 
 def annotate_stress_and_rhyme_scheme(stress_patterns, poem_line_entries,
-                                     rhyme_scheme_vars, pronouncing_table):
+                                     rhyme_scheme_vars, pronouncing_table,
+                                     line_cache=None):
     """ (list of StringVar, list of Entry, list of StringVar, 
-        pronouncing table) -> NoneType
+        pronouncing table, dict) -> NoneType
     
     Determine the stress markers and rhyme scheme for the poem in 
     poem_line_entries using the pronouncing table pronouncing_table and 
     modify stress_patterns and rhyme_scheme_vars accordingly.
+
+    line_cache maps the text of poem lines to their stress patterns, and is
+    kept from one annotation to the next so that only lines that changed
+    are annotated again.
     """
  
     # This poem displayed in window could have been read from a file or typed 
-    # in by user. Extract the poem, process it and re-display it.
+    # in by user. Tidy it the way display_poem_in_window would, changing
+    # only the entries whose text is different.
+    tidy_poem_entries(poem_line_entries)
+
+    if line_cache is None:
+        line_cache = {}
+    annotate_changed_lines(stress_patterns, poem_line_entries,
+                           rhyme_scheme_vars, pronouncing_table, line_cache)
+
+
+def tidy_poem_entries(poem_line_entries):
+    """ (list of Entry) -> NoneType
+
+    Redisplay the poem in poem_line_entries as display_poem_in_window shows
+    it (see convert_to_lines), changing only the entries whose text is
+    different.
+    """
 
-    # Extract poem from poem_line_entries into a single str.
     raw_poem = ''
     for line in poem_line_entries:
         raw_poem = raw_poem + line.get() + '\n'
+    poem_lines = student.convert_to_lines(raw_poem)
 
-    # Clear the contents of poem window.
-    clear_poem(stress_patterns, poem_line_entries, rhyme_scheme_vars)
-
-    # Process poem and re-display poem.
-    display_poem_in_window(raw_poem, poem_line_entries)
+    for i in range(MAX_LINES_IN_POEM):
+        poem_line = ''
+        if i < len(poem_lines):
+            poem_line = poem_lines[i][:MAX_CHAR_IN_POEM_LINE]
+        if poem_line_entries[i].get() != poem_line:
+            poem_line_entries[i].delete(0, END)
+            poem_line_entries[i].insert(0, poem_line)
+
+
+def annotate_changed_lines(stress_patterns, poem_line_entries,
+                           rhyme_scheme_vars, pronouncing_table, line_cache):
+    """ (list of StringVar, list of Entry, list of StringVar,
+         pronouncing table, dict) -> NoneType
+
+    Annotate the poem in poem_line_entries as it is, using the pronouncing
+    table pronouncing_table.  The stress patterns of lines already in
+    line_cache (a dict from line text to stress pattern) are not found
+    again, and only the stress_patterns and rhyme_scheme_vars whose values
+    change are set, so that editing one line redraws only what it affects.
+    """
 
-    # Annotate stress in each poem line.
+    poem_lines = []
     for i in range(len(poem_line_entries)):
-        annotate_stress(poem_line_entries[i], stress_patterns[i], 
-                        pronouncing_table)    
+        poem_line = poem_line_entries[i].get()
+        poem_lines.append(poem_line)
+        stress_pattern = line_cache.get(poem_line)
+        if stress_pattern is None:
+            if len(line_cache) >= LINE_CACHE_SIZE:
+                line_cache.clear()
+            stress_pattern = poem_annotation.get_stress_line(
+                poem_line, pronouncing_table)
+            line_cache[poem_line] = stress_pattern
+        if stress_patterns[i].get() != stress_pattern:
+            stress_patterns[i].set(stress_pattern)
+
+    # Skip blank lines at the end, as set_rhyme_scheme does.
+    while len(poem_lines) > 0 and len(poem_lines[-1]) == 0:
+        poem_lines.pop()
+    rhyme_scheme = student.detect_rhyme_scheme(poem_lines, pronouncing_table)
+    for i in range(len(rhyme_scheme_vars)):
+        marker = ''
+        if i < len(rhyme_scheme):
+            marker = rhyme_scheme[i]
+        if rhyme_scheme_vars[i].get() != marker:
+            rhyme_scheme_vars[i].set(marker)
+
 
-    # Display rhyme scheme.
-    set_rhyme_scheme(poem_line_entries, rhyme_scheme_vars, pronouncing_table)
+def schedule_live_annotation(frame, live, pending, annotate):
+    """ (Frame, BooleanVar, dict, function) -> NoneType
+
+    If live is set, call annotate once LIVE_ANNOTATION_DELAY milliseconds
+    have passed without another call to this function: each keystroke
+    cancels the annotation scheduled by the one before.  pending holds the
+    id of the scheduled annotation under 'after'.
+    """
+
+    if pending.get('after') is not None:
+        frame.after_cancel(pending['after'])
+        pending['after'] = None
+    if live.get():
+        pending['after'] = frame.after(LIVE_ANNOTATION_DELAY, annotate)
 
 
 def display_poem_in_window(raw_poem, poem_line_entries):
@@ -229,11 +352,81 @@ def add_visuals_for_poem_line(row_num, frame, stress_patterns,
     rhyme_scheme_label.grid(row=row_num+1, column=2, sticky=W, padx=4)
 
 
+def show_sound_patterns(frame, poem_line_entries, pronouncing_table):
+    """ (Frame, list of Entry, pronouncing table) -> NoneType
+
+    Open a window showing the poem in poem_line_entries with the words of
+    its alliteration, assonance and internal rhyme marked as in
+    SOUND_PATTERN_STYLES, found using the pronouncing table
+    pronouncing_table.  Each word's patterns and sounds are listed below
+    the poem.
+    """
+
+    poem_lines = []
+    for line in poem_line_entries:
+        poem_lines.append(line.get())
+    while len(poem_lines) > 0 and len(poem_lines[-1]) == 0:
+        poem_lines.pop()
+    spans = sound_patterns.find_sound_patterns(poem_lines, pronouncing_table)
+
+    window = Toplevel(frame)
+    window.title('Sound Patterns')
+    text = Text(window, width=MAX_CHAR_IN_POEM_LINE + 10,
+                height=len(poem_lines) + len(sound_patterns.DEVICES) + 3,
+                font=(FONT, FONT_SIZE, ''))
+    text.pack()
+    for device in sound_patterns.DEVICES:
+        text.tag_config(device, **SOUND_PATTERN_STYLES[device])
+
+    # The poem, with each span tagged with its device (Text indexes count
+    # lines from 1).
+    text.insert(END, '\n'.join(poem_lines) + '\n\n')
+    for span in spans:
+        text.tag_add(span['device'],
+                     '{}.{}'.format(span['line'] + 1, span['start']),
+                     '{}.{}'.format(span['line'] + 1, span['end']))
+
+    # A key to the marks, each in its own style, with the sounds found.
+    for device in sound_patterns.DEVICES:
+        sounds = []
+        for span in spans:
+            if span['device'] == device and span['sound'] not in sounds:
+                sounds.append(span['sound'])
+        text.insert(END, device, device)
+        text.insert(END, ': {}\n'.format(', '.join(sounds) or 'none'))
+    text.config(state=DISABLED)
+
+
+def show_load_progress(frame, loader, status_var, buttons):
+    """ (Frame, DictionaryLoader, StringVar, list of Button) -> NoneType
+
+    Show how much of the dictionary loader has loaded in status_var, checking
+    again every LOAD_POLL_DELAY milliseconds until it is loaded, then enable
+    buttons.
+    """
+
+    if not loader.is_loaded():
+        status_var.set('Loading dictionary: {:.0%}'.format(
+            loader.get_progress()))
+        frame.after(LOAD_POLL_DELAY, show_load_progress, frame, loader,
+                    status_var, buttons)
+    elif loader.error is not None:
+        status_var.set('The dictionary could not be loaded.')
+    else:
+        status_var.set('')
+        for button in buttons:
+            button.config(state=NORMAL)
+
+
 def annotate_poem_in_window(pronouncing_table, frame):
-    """ (pronouncing table, Frame) -> NoneType
+    """ (pronouncing table or DictionaryLoader, Frame) -> NoneType
 
     Create and display the poetry window.  Handle button click operations.
 
+    pronouncing_table may be a DictionaryLoader still loading the table; the
+    "Annotate Poem" button is then disabled, and a status line shows how
+    much is loaded, until the load finishes.
+
     This function does not return until the poetry window is closed.
     
     Each line of poetry in the window has:
@@ -245,10 +438,17 @@ def annotate_poem_in_window(pronouncing_table, frame):
     Buttons appear in column 2.
     """
 
+    if isinstance(pronouncing_table, dictionary_loader.DictionaryLoader):
+        loader = pronouncing_table
+    else:
+        loader = dictionary_loader.make_loaded(pronouncing_table)
+
     # Lists for data to be displayed in poem window.
     stress_patterns = []
     poem_line_entries = []
     rhyme_scheme_vars = []
+    # Stress patterns of lines already annotated, by line text.
+    line_cache = {}
     
     # Make room in window for MAX_LINES_IN_POEM lines of poetry.
     for i in range(MAX_LINES_IN_POEM):
@@ -272,9 +472,10 @@ def annotate_poem_in_window(pronouncing_table, frame):
         command=lambda: (
             annotate_stress_and_rhyme_scheme(
                 stress_patterns, poem_line_entries,
-                rhyme_scheme_vars, pronouncing_table))
+                rhyme_scheme_vars, loader.table, line_cache))
     )
     annotate_btn.grid(row=2, column=3)
+    loading_buttons = [annotate_btn]
     
     # Add the "Clear Poem" Button to the right of poem.
     annotate_btn = Button(
@@ -284,15 +485,49 @@ def annotate_poem_in_window(pronouncing_table, frame):
             clear_poem(stress_patterns, poem_line_entries, rhyme_scheme_vars))
     )
     annotate_btn.grid(row=3, column=3)    
+
+    # Add the "Annotate as I type" Checkbutton: when it is on, the poem is
+    # annotated a moment after each pause in typing.
+    live = BooleanVar()
+    live_btn = Checkbutton(frame, text="Annotate as I type", variable=live)
+    live_btn.grid(row=4, column=3)
+    loading_buttons.append(live_btn)
+
+    # Add the "Sound Patterns" Button, which shows the poem's alliteration,
+    # assonance and internal rhyme in a window of their own.
+    sounds_btn = Button(
+        frame,
+        text="Sound Patterns",
+        command=lambda: (
+            show_sound_patterns(frame, poem_line_entries, loader.table))
+    )
+    sounds_btn.grid(row=6, column=3)
+    loading_buttons.append(sounds_btn)
+    pending = {}
+    for poem_line_entry in poem_line_entries:
+        poem_line_entry.bind(
+            '<KeyRelease>',
+            lambda event: schedule_live_annotation(
+                frame, live, pending,
+                lambda: annotate_changed_lines(
+                    stress_patterns, poem_line_entries, rhyme_scheme_vars,
+                    loader.table, line_cache)))
+
+    # Until the dictionary is loaded, show its progress and keep the
+    # buttons that need it disabled.
+    if not loader.is_loaded():
+        status_var = StringVar()
+        status_label = Label(frame, textvariable=status_var)
+        status_label.grid(row=5, column=3)
+        for button in loading_buttons:
+            button.config(state=DISABLED)
+        show_load_progress(frame, loader, status_var, loading_buttons)
     
     
 if __name__ == '__main__':
     
     if os.path.exists(OUR_PRONOUNCING_DICTIONARY):
 
-        pronouncing_table = read_pronouncing_dictionary(
-                                OUR_PRONOUNCING_DICTIONARY)
-
         # Create the poem window.  This has to be the first UI element created.
         window = Tk()
         window.title('CSC108 Poem Annotator ' +
@@ -300,8 +535,13 @@ if __name__ == '__main__':
         frame = Frame(window)
         frame.pack()
 
+        # Load the dictionary in the background while the window is shown.
+        loader = dictionary_loader.DictionaryLoader(
+            read_pronouncing_dictionary, OUR_PRONOUNCING_DICTIONARY,
+            guess_missing=True).start()
+
         # Annotate poems until user closes the poem window.
-        annotate_poem_in_window(pronouncing_table, frame)
+        annotate_poem_in_window(loader, frame)
         
         window.lift()
         window.call('wm', 'attributes', '.', '-topmost', True)
@@ -0,0 +1,451 @@
+"""
+A cache of annotated poems, so a poem that has been annotated before (a
+resubmission, a duplicate, one of the sample files) is answered without
+annotating it again.
+
+Each annotated poem is stored under a key that is the SHA-256 hash of:
+  o the poem's lines as convert_to_lines returns them, so poems that differ
+    only in whitespace and blank lines (which annotate_poem ignores) share
+    a key
+  o the fingerprint of the pronouncing table (see get_table_fingerprint)
+    and whether it guesses missing words
+  o whether the sound patterns were asked for
+  o ANNOTATION_VERSION, bumped whenever annotate_poem's results change
+so a cached annotation is only used for the same poem, annotated the same
+way with the same dictionary.
+
+The cache has two tiers:
+  o memory: the last memory_size annotated poems used, in an OrderedDict
+    kept in least recently used order
+  o disk (optional): one JSON file per annotated poem in folder disk_path,
+    at most max_disk_bytes of them in all; the least recently used files
+    are removed to make room.  Files are written to a temporary name and
+    then renamed, so several processes may share the folder, though each
+    keeps the size limit only for the files it knows of.
+
+The cache counts where each poem was found ('memory', 'disk' or 'miss')
+for its hit rate; see AnnotationCache.get_stats.  It may be used from more
+than one thread: its tiers and counts are only changed under its lock, and
+poems are annotated outside it.
+"""
+
+import collections
+import hashlib
+import json
+import os
+import threading
+
+import poem_annotation
+import pronouncing_table as table_index
+import stress_and_rhyme_functions as student
+
+# Bump whenever annotate_poem's results change, so old cached results are
+# not used.
+ANNOTATION_VERSION = 1
+
+# Where a poem was found: in memory, on disk, or not at all.
+SOURCES = ['memory', 'disk', 'miss']
+
+# The number of annotated poems kept in memory by default.
+MEMORY_SIZE = 1024
+
+# The most bytes of cached files kept on disk by default.
+MAX_DISK_BYTES = 256 << 20
+
+# The name the table fingerprint is kept under in a table's derived indexes.
+FINGERPRINT = 'fingerprint'
+
+
+def get_table_fingerprint(pronouncing_table):
+    """ (pronouncing table) -> str
+
+    Return a hex digest that changes whenever the words or pronunciations
+    of pronouncing_table change.  A PronouncingTable's fingerprint is
+    hashed once and kept with its derived indexes (which adding a word
+    clears); a memory-mapped table uses the hash of the dictionary file it
+    was built from; other tables are hashed on every call.
+
+    >>> table = table_index.PronouncingTable(['IN'], [['IH0', 'N']])
+    >>> fingerprint = get_table_fingerprint(table)
+    >>> fingerprint == get_table_fingerprint(
+    ...     table_index.PronouncingTable(['IN'], [['IH0', 'N']]))
+    True
+    >>> table.add_word('ON', ['AA1', 'N'])
+    >>> fingerprint == get_table_fingerprint(table)
+    False
+    """
+
+    fingerprint = getattr(pronouncing_table, 'fingerprint', None)
+    if fingerprint is not None:
+        return fingerprint[2]
+    return table_index.get_derived(pronouncing_table, FINGERPRINT,
+                                   _hash_table)
+
+
+def _hash_table(pronouncing_table):
+    """ (pronouncing table) -> str
+
+    Return the SHA-256 hex digest of the words and pronunciations of
+    pronouncing_table.
+    """
+
+    digest = hashlib.sha256()
+    digest.update('\n'.join(pronouncing_table[0]).encode('utf-8'))
+    pronunciations = pronouncing_table[1]
+    if hasattr(pronunciations, 'get_buffers'):
+        # The codes depend on the order this process added phonemes to the
+        # codebook, so they are hashed as the phonemes' places in sorted
+        # order, which are the same in every process.
+        codes, offsets = pronunciations.get_buffers()
+        phonemes = sorted(table_index.PHONEMES)
+        translation = bytearray(256)
+        for i in range(len(phonemes)):
+            translation[table_index.PHONEME_CODES[phonemes[i]]] = i
+        digest.update(('\n' + ' '.join(phonemes) + '\n').encode('utf-8'))
+        digest.update(codes.translate(translation))
+        digest.update(offsets)
+    else:
+        for pronunciation in pronunciations:
+            digest.update(('\n' + ' '.join(pronunciation)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_key(raw_poem, pronouncing_table, sound_patterns=False):
+    """ (str, pronouncing table, bool) -> str
+
+    Return the cache key of the poem raw_poem annotated with
+    pronouncing_table, with its sound patterns if sound_patterns is True.
+
+    >>> get_key('Fox in socks\\n', student.SMALL_TABLE) == get_key(
+    ...     '  Fox in socks', student.SMALL_TABLE)
+    True
+    >>> get_key('Fox in socks', student.SMALL_TABLE) == get_key(
+    ...     'Fox in socks', student.SMALL_TABLE, True)
+    False
+    """
+
+    digest = hashlib.sha256('{} {} {} {}\n'.format(
+        ANNOTATION_VERSION, get_table_fingerprint(pronouncing_table),
+        int(getattr(pronouncing_table, 'guess_missing', False)),
+        int(sound_patterns)).encode('utf-8'))
+    digest.update('\n'.join(student.convert_to_lines(raw_poem)).encode(
+        'utf-8'))
+    return digest.hexdigest()
+
+
+class AnnotationCache(object):
+    """ Annotated poems by their key (see get_key), in memory and on disk.
+
+      o memory: the annotated poem of each key kept in memory, least
+        recently used first
+      o memory_size: the most annotated poems kept in memory
+      o disk_path: the folder of cached files, or None for no disk tier
+      o max_disk_bytes: the most bytes of cached files kept in disk_path
+      o disk_sizes: the size of the cached file of each key known to be in
+        disk_path, least recently used first
+      o disk_bytes: the sum of disk_sizes
+      o counts: the number of poems found in each of SOURCES
+      o lock: held while the tiers or counts are used
+    """
+
+    def __init__(self, memory_size=MEMORY_SIZE, disk_path=None,
+                 max_disk_bytes=MAX_DISK_BYTES):
+        """ (AnnotationCache, int, str, int) -> NoneType
+
+        Create a cache keeping memory_size annotated poems in memory and, if
+        disk_path is not None, up to max_disk_bytes of them in folder
+        disk_path, which is created if need be.  The files already in
+        disk_path are used, and removed first if it is over the limit.
+        """
+
+        self.memory = collections.OrderedDict()
+        self.memory_size = memory_size
+        self.disk_path = disk_path
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_sizes = collections.OrderedDict()
+        self.disk_bytes = 0
+        self.counts = {}
+        for source in SOURCES:
+            self.counts[source] = 0
+        self.lock = threading.Lock()
+        if disk_path is not None:
+            os.makedirs(disk_path, exist_ok=True)
+            self.scan_disk()
+
+    def scan_disk(self):
+        """ (AnnotationCache) -> NoneType
+
+        Find the cached files in disk_path, least recently used (by
+        modification time) first, including those written by other
+        processes, and remove the oldest while they are over the limit.
+        """
+
+        with self.lock:
+            self.disk_sizes.clear()
+            self.disk_bytes = 0
+            files = []
+            for folder in os.scandir(self.disk_path):
+                if not folder.is_dir():
+                    continue
+                for entry in os.scandir(folder.path):
+                    if not entry.name.endswith('.json'):
+                        continue
+                    try:
+                        status = entry.stat()
+                    except OSError:
+                        # removed by another process since it was listed
+                        continue
+                    files.append((status.st_mtime_ns, entry.name[:-5],
+                                  status.st_size))
+            files.sort()
+            for mtime_ns, key, size in files:
+                self.disk_sizes[key] = size
+                self.disk_bytes += size
+            self._trim_disk()
+
+    def _get_filename(self, key):
+        """ (AnnotationCache, str) -> str
+
+        Return the name of the cached file for key: in a folder named for
+        its first two characters, so no one folder holds too many files.
+        """
+
+        return os.path.join(self.disk_path, key[:2], key + '.json')
+
+    def get(self, key):
+        """ (AnnotationCache, str) -> tuple of (dict, str)
+
+        Return the annotated poem cached under key and where it was found,
+        one of SOURCES, or (None, 'miss') if it is not cached.  An
+        annotated poem found on disk is kept in memory too.  The lists in
+        an annotated poem are shared with the cache and must not be changed.
+
+        >>> cache = AnnotationCache()
+        >>> cache.get('key')
+        (None, 'miss')
+        >>> cache.put('key', {'lines': ['Fox']})
+        >>> cache.get('key')
+        ({'lines': ['Fox']}, 'memory')
+        """
+
+        with self.lock:
+            annotated = self.memory.get(key)
+            if annotated is not None:
+                self.memory.move_to_end(key)
+                self.counts['memory'] += 1
+                return dict(annotated), 'memory'
+
+            if self.disk_path is not None:
+                annotated = self._read_disk(key)
+                if annotated is not None:
+                    self._put_memory(key, annotated)
+                    self.counts['disk'] += 1
+                    return dict(annotated), 'disk'
+
+            self.counts['miss'] += 1
+            return None, 'miss'
+
+    def _read_disk(self, key):
+        """ (AnnotationCache, str) -> dict
+
+        Return the annotated poem in the cached file for key, or None if
+        there is none or it cannot be read.  A file that is read is marked
+        as just used.
+        """
+
+        filename = self._get_filename(key)
+        try:
+            cached_file = open(filename, 'r', encoding='utf-8')
+            try:
+                annotated = json.loads(cached_file.read())
+            finally:
+                cached_file.close()
+            os.utime(filename)
+        except (OSError, ValueError):
+            # Missing (perhaps removed by another process) or unreadable:
+            # forget it, like a file that was never written.
+            self._forget_disk(key)
+            return None
+
+        size = self.disk_sizes.pop(key, None)
+        if size is None:
+            # written by another process sharing the folder
+            size = os.path.getsize(filename)
+            self.disk_bytes += size
+        self.disk_sizes[key] = size
+        return annotated
+
+    def put(self, key, annotated):
+        """ (AnnotationCache, str, dict) -> NoneType
+
+        Cache the annotated poem annotated under key, in memory and on disk.
+        """
+
+        with self.lock:
+            self._put_memory(key, annotated)
+            if self.disk_path is not None:
+                self._write_disk(key, annotated)
+
+    def _put_memory(self, key, annotated):
+        """ (AnnotationCache, str, dict) -> NoneType
+
+        Keep annotated in memory under key, dropping the least recently used
+        annotated poem if there are more than memory_size.
+        """
+
+        if self.memory_size < 1:
+            return
+        self.memory[key] = annotated
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def _write_disk(self, key, annotated):
+        """ (AnnotationCache, str, dict) -> NoneType
+
+        Write annotated to the cached file for key, then remove the least
+        recently used files while they are over the limit.  A file that
+        cannot be written is left out of the cache.
+        """
+
+        data = json.dumps(annotated).encode('utf-8')
+        if len(data) > self.max_disk_bytes:
+            return
+        filename = self._get_filename(key)
+        temporary_filename = '{}.{}.tmp'.format(filename, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            cached_file = open(temporary_filename, 'wb')
+            try:
+                cached_file.write(data)
+            finally:
+                cached_file.close()
+            # Replace in one step so readers never see half a file.
+            os.replace(temporary_filename, filename)
+        except OSError:
+            return
+
+        self.disk_bytes += len(data) - self.disk_sizes.pop(key, 0)
+        self.disk_sizes[key] = len(data)
+        self._trim_disk()
+
+    def _trim_disk(self):
+        """ (AnnotationCache) -> NoneType
+
+        Remove the least recently used cached files while there are more
+        than max_disk_bytes of them.
+        """
+
+        while self.disk_bytes > self.max_disk_bytes and self.disk_sizes:
+            key = next(iter(self.disk_sizes))
+            try:
+                os.remove(self._get_filename(key))
+            except OSError:
+                pass
+            self._forget_disk(key)
+
+    def _forget_disk(self, key):
+        """ (AnnotationCache, str) -> NoneType
+
+        Stop counting the cached file for key.
+        """
+
+        self.disk_bytes -= self.disk_sizes.pop(key, 0)
+
+    def look_up(self, raw_poem, pronouncing_table, sound_patterns=False):
+        """ (AnnotationCache, str, pronouncing table, bool) -> tuple
+
+        Return the annotated poem for raw_poem, as annotate_poem returns it,
+        and where it was found, one of SOURCES.  A poem that is not cached
+        is annotated and cached.
+
+        >>> cache = AnnotationCache()
+        >>> cache.look_up('Fox in socks', student.SMALL_TABLE)[1]
+        'miss'
+        >>> annotated, source = cache.look_up('Fox in socks\\n',
+        ...                                   student.SMALL_TABLE)
+        >>> annotated['rhyme_scheme'], source
+        (['A'], 'memory')
+        """
+
+        key = get_key(raw_poem, pronouncing_table, sound_patterns)
+        annotated, source = self.get(key)
+        if annotated is None:
+            annotated = poem_annotation.annotate_poem(
+                raw_poem, pronouncing_table, sound_patterns)
+            self.put(key, annotated)
+            annotated = dict(annotated)
+        return annotated, source
+
+    def annotate(self, raw_poem, pronouncing_table, sound_patterns=False):
+        """ (AnnotationCache, str, pronouncing table, bool) -> dict
+
+        Return the annotated poem for raw_poem, as annotate_poem returns it,
+        from the cache if it is there (see look_up).
+
+        >>> cache = AnnotationCache()
+        >>> cache.annotate('Fox\\nbox', student.SMALL_TABLE)['rhyme_scheme']
+        ['A', 'A']
+        """
+
+        return self.look_up(raw_poem, pronouncing_table, sound_patterns)[0]
+
+    def get_stats(self):
+        """ (AnnotationCache) -> dict
+
+        Return the number of poems found in each of SOURCES, the hit rate
+        (the share found in memory or on disk, or None before any look up),
+        and the number of annotated poems and bytes in each tier.
+
+        >>> cache = AnnotationCache()
+        >>> cache.annotate('Fox', student.SMALL_TABLE)['lines']
+        ['Fox']
+        >>> cache.annotate('Fox', student.SMALL_TABLE)['lines']
+        ['Fox']
+        >>> stats = cache.get_stats()
+        >>> stats['memory'], stats['disk'], stats['miss'], stats['hit_rate']
+        (1, 0, 1, 0.5)
+        """
+
+        with self.lock:
+            stats = dict(self.counts)
+            total = sum(self.counts.values())
+            if total == 0:
+                stats['hit_rate'] = None
+            else:
+                stats['hit_rate'] = round(
+                    (self.counts['memory'] + self.counts['disk']) / total, 4)
+            stats['memory_entries'] = len(self.memory)
+            stats['memory_size'] = self.memory_size
+            if self.disk_path is not None:
+                stats['disk_entries'] = len(self.disk_sizes)
+                stats['disk_bytes'] = self.disk_bytes
+                stats['max_disk_bytes'] = self.max_disk_bytes
+        return stats
+
+    def format_stats(self):
+        """ (AnnotationCache) -> str
+
+        Return a one line report of the cache's hit rate and sizes.
+
+        >>> AnnotationCache(memory_size=8).format_stats()
+        'annotation cache: 0 memory hits, 0 disk hits, 0 misses; 0/8 in memory'
+        """
+
+        stats = self.get_stats()
+        report = 'annotation cache: {} memory hits, {} disk hits, {} misses'
+        report = report.format(stats['memory'], stats['disk'], stats['miss'])
+        if stats['hit_rate'] is not None:
+            report += ' ({:.1%} hit rate)'.format(stats['hit_rate'])
+        report += '; {}/{} in memory'.format(stats['memory_entries'],
+                                             stats['memory_size'])
+        if self.disk_path is not None:
+            report += ', {} files ({:.1f}/{:.1f} MiB) on disk'.format(
+                stats['disk_entries'], stats['disk_bytes'] / (1 << 20),
+                stats['max_disk_bytes'] / (1 << 20))
+        return report
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
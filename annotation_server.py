@@ -0,0 +1,793 @@
+"""
+A local HTTP annotation service.  The pronouncing dictionary is read once,
+when the server starts, and every request is answered from that one table,
+so scripts no longer each read our_dictionary.txt themselves.
+
+The server listens on localhost only and speaks plain HTTP/1.1 with
+keep-alive: a client may send any number of requests over one connection.
+Every response is JSON.  The endpoints are:
+
+  GET  /pronunciation?word=W[&word=W2...]   phonemes of each word
+  GET  /stress?word=W[&word=W2...]          stress pattern of each word
+  POST /rhyme-scheme                        rhyme scheme of each poem
+  POST /annotate                            stress patterns and rhyme scheme
+                                            of each poem
+  GET  /words?prefix=P|suffix=S[&k=K]      the first K words starting with
+                                            P or ending with S
+  GET  /slant-rhymes?word=W[&distance=D][&k=K]
+                                            the first K words whose last
+                                            syllables are within D of W's
+  POST /batch                               several of the above at once
+  GET  /stats                               request counts and latency
+                                            histograms for each endpoint,
+                                            the annotation cache's hit
+                                            rate, and stage stats when the
+                                            pipeline is instrumented
+
+Requests are batched: /pronunciation and /stress take any number of words
+(as repeated word parameters, or a JSON body {"words": [...]}), and
+/rhyme-scheme and /annotate take {"poem": "..."} or {"poems": [...]};
+/rhyme-scheme also takes "near": true to letter slant rhymes alike, and
+/annotate "sound_patterns": true to add each poem's sound patterns.  Every
+endpoint but /batch answers {"results": [...]}, one result per word or
+poem in order.  /batch takes {"requests": [{"endpoint": "stress",
+"words": [...]}, ...]} and answers {"responses": [...]}, the answer to each
+request in order.
+
+Annotated poems are cached (see annotation_cache), so a poem sent to
+/annotate again is answered without annotating it: the last --cache-size
+in memory and, with --cache-dir, more on disk, kept across restarts.
+
+Requests are read and responses written on the event loop, but each
+request is answered in a worker thread (the loop's default executor), so a
+large /annotate or /batch request does not hold up the other connections.
+Sizes are not capped beyond MAX_BODY and MAX_K, since a few slow requests
+only slow each other.  The table and its derived indexes are only read once
+built (one built twice at the same time is just built twice), and the
+annotation cache and latency histograms are updated under locks.
+
+Usage:
+    python annotation_server.py [--port PORT] [--dictionary FILE]
+                                [--mapped] [--guess-missing]
+                                [--instrument N] [--cache-size N]
+                                [--cache-dir DIR] [--cache-max-mb MB]
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import os
+import sys
+import threading
+import time
+import traceback
+import urllib.parse
+
+import annotate_poetry
+import annotation_cache
+import instrumentation
+import poem_annotation
+import slant_rhyme
+import stress_and_rhyme_functions as student
+import word_search
+
+# The only address the server listens on.
+HOST = '127.0.0.1'
+PORT = 8108
+
+# Seconds an idle keep-alive connection is kept open.
+KEEP_ALIVE_TIMEOUT = 15.0
+
+# The largest request body accepted, in bytes.
+MAX_BODY = 1 << 20
+
+# The most words /words and /slant-rhymes return for one request.
+MAX_K = 1000
+
+# The upper bounds of the latency histogram buckets, in milliseconds; the
+# last bucket holds everything slower.
+LATENCY_BUCKETS = [0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large',
+           431: 'Request Header Fields Too Large',
+           500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    """ A request the server cannot answer, with the HTTP status to send. """
+
+    def __init__(self, status, message):
+        """ (RequestError, int, str) -> NoneType
+
+        Create an error answered with status and message.
+        """
+
+        Exception.__init__(self, message)
+        self.status = status
+
+
+class LatencyHistogram(object):
+    """ Counts of request latencies in the buckets of LATENCY_BUCKETS.
+
+      o counts[i]: the requests taking at most LATENCY_BUCKETS[i] ms (and
+        more than the bucket before); counts[-1] is the slower ones
+      o total: the number of requests
+      o seconds: the total time taken by the requests
+      o lock: held while the histogram is updated or read, as requests are
+        answered in more than one thread
+    """
+
+    def __init__(self):
+        """ (LatencyHistogram) -> NoneType
+
+        Create an empty histogram.
+        """
+
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        """ (LatencyHistogram, float) -> NoneType
+
+        Count a request that took seconds.
+        """
+
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds * 1000)
+        with self.lock:
+            self.counts[bucket] += 1
+            self.total += 1
+            self.seconds += seconds
+
+    def get_percentile(self, percent):
+        """ (LatencyHistogram, float) -> float
+
+        Return the upper bound in ms of the bucket holding the percent
+        percentile latency, or None if the histogram is empty or it is in
+        the last bucket.
+
+        >>> histogram = LatencyHistogram()
+        >>> for seconds in [0.0003, 0.0003, 0.0015, 0.004]:
+        ...     histogram.record(seconds)
+        >>> histogram.get_percentile(50)
+        0.5
+        >>> histogram.get_percentile(99)
+        5
+        """
+
+        if self.total == 0:
+            return None
+        wanted = self.total * percent / 100
+        seen = 0
+        for i in range(len(LATENCY_BUCKETS)):
+            seen += self.counts[i]
+            if seen >= wanted:
+                return LATENCY_BUCKETS[i]
+        return None
+
+    def to_dict(self):
+        """ (LatencyHistogram) -> dict
+
+        Return the histogram as a dict that can be written as JSON.
+        """
+
+        buckets = {}
+        with self.lock:
+            for i in range(len(LATENCY_BUCKETS)):
+                buckets['<=' + str(LATENCY_BUCKETS[i])] = self.counts[i]
+            buckets['>' + str(LATENCY_BUCKETS[-1])] = self.counts[-1]
+            mean = self.seconds * 1000 / self.total if self.total else None
+            return {'count': self.total, 'mean_ms': mean,
+                    'p50_ms': self.get_percentile(50),
+                    'p99_ms': self.get_percentile(99),
+                    'buckets_ms': buckets}
+
+
+def _get_list(params, plural, singular):
+    """ (dict, str, str) -> list of str
+
+    Return params[plural], or [params[singular]] if there is no plural item.
+    Raise RequestError if there is neither or it is not a list of str.
+    """
+
+    if plural in params:
+        values = params[plural]
+    elif singular in params:
+        values = params[singular]
+        if not isinstance(values, list):
+            values = [values]
+    else:
+        raise RequestError(400, 'missing "{}" or "{}"'.format(plural,
+                                                               singular))
+    if not isinstance(values, list):
+        raise RequestError(400, '"{}" must be a list'.format(plural))
+    for value in values:
+        if not isinstance(value, str):
+            raise RequestError(400, '"{}" must hold strings'.format(plural))
+    return values
+
+
+def _log_error(description):
+    """ (str) -> NoneType
+
+    Write description and the traceback of the exception being handled to
+    standard error.
+    """
+
+    sys.stderr.write('error ' + description + '\n')
+    traceback.print_exc()
+
+
+def _get_internal_error(error):
+    """ (Exception) -> dict
+
+    Return the JSON answer for a request that failed with the unexpected
+    exception error.
+
+    >>> _get_internal_error(TypeError('oops'))
+    {'error': 'internal error: TypeError'}
+    """
+
+    return {'error': 'internal error: ' + type(error).__name__}
+
+
+def _get_number(params, name, default, kind):
+    """ (dict, str, object, type) -> object
+
+    Return params[name] (or its first item, for a query string) as a kind,
+    or default if it is not in params.  Raise RequestError if it is not a
+    number.
+
+    >>> _get_number({'k': ['5']}, 'k', 10, int)
+    5
+    """
+
+    value = params.get(name, default)
+    if isinstance(value, list):
+        value = value[0]
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise RequestError(400, '"{}" must be a number'.format(name))
+
+
+def _get_k(params, default):
+    """ (dict, int) -> int
+
+    Return the number of results params['k'] asks for, or default if it is
+    not in params.  Raise RequestError if it is not a whole number from 0
+    to MAX_K.
+
+    >>> _get_k({'k': ['5']}, 10), _get_k({}, 10)
+    (5, 10)
+    """
+
+    k = _get_number(params, 'k', default, int)
+    if k < 0 or k > MAX_K:
+        raise RequestError(400, '"k" must be from 0 to {}'.format(MAX_K))
+    return k
+
+
+def _get_first(params, plural, singular):
+    """ (dict, str, str) -> str
+
+    Return the first value of params[plural] or params[singular] (see
+    _get_list).  Raise RequestError if there is none.
+
+    >>> _get_first({'prefix': ['fo', 'bo']}, 'prefixes', 'prefix')
+    'fo'
+    """
+
+    values = _get_list(params, plural, singular)
+    if len(values) == 0:
+        raise RequestError(400, '"{}" must not be empty'.format(singular))
+    return values[0]
+
+
+def _get_flag(params, name):
+    """ (dict, str) -> bool
+
+    Return True if and only if params[name] is true: JSON true, or '1' or
+    'true' in a query string.
+
+    >>> _get_flag({'near': ['true']}, 'near'), _get_flag({}, 'near')
+    (True, False)
+    """
+
+    value = params.get(name, False)
+    if isinstance(value, list):
+        return value[0] in ['1', 'true']
+    return value is True
+
+
+class AnnotationService(object):
+    """ The endpoints of the server, answered from one pronouncing table.
+
+      o histograms[path]: the LatencyHistogram of each endpoint
+      o started: the time.time() the service was created
+      o cache: the AnnotationCache of annotated poems, or None
+    """
+
+    def __init__(self, pronouncing_table, cache=None):
+        """ (AnnotationService, pronouncing table,
+             AnnotationCache) -> NoneType
+
+        Create a service answering from pronouncing_table, with annotated
+        poems cached in cache if it is not None.
+        """
+
+        self.table = pronouncing_table
+        self.cache = cache
+        self.started = time.time()
+        self.endpoints = {
+            '/pronunciation': ('GET', self.get_pronunciations),
+            '/stress': ('GET', self.get_stress_patterns),
+            '/rhyme-scheme': ('POST', self.get_rhyme_schemes),
+            '/annotate': ('POST', self.annotate_poems),
+            '/words': ('GET', self.find_words),
+            '/slant-rhymes': ('GET', self.find_slant_rhymes),
+            '/batch': ('POST', self.run_batch),
+            '/stats': ('GET', self.get_stats)}
+        self.histograms = {}
+        for path in self.endpoints:
+            self.histograms[path] = LatencyHistogram()
+
+    def get_pronunciations(self, params):
+        """ (AnnotationService, dict) -> dict
+
+        Answer /pronunciation: the phonemes of each word in params.
+
+        >>> service = AnnotationService(student.SMALL_TABLE)
+        >>> service.get_pronunciations({'word': ['box']})
+        {'results': [{'word': 'box', 'pronunciation': ['B', 'AA1', 'K', 'S']}]}
+        """
+
+        results = []
+        for word in _get_list(params, 'words', 'word'):
+            results.append({'word': word, 'pronunciation': list(
+                student.look_up_pronunciation(word, self.table))})
+        return {'results': results}
+
+    def get_stress_patterns(self, params):
+        """ (AnnotationService, dict) -> dict
+
+        Answer /stress: the stress pattern of each word in params.
+
+        >>> service = AnnotationService(student.SMALL_TABLE)
+        >>> service.get_stress_patterns({'words': ['socks', 'Fox']})['results']
+        ['/    ', '/  ']
+        """
+
+        results = []
+        for word in _get_list(params, 'words', 'word'):
+            results.append(student.get_stress_pattern(word, self.table))
+        return {'results': results}
+
+    def get_rhyme_schemes(self, params):
+        """ (AnnotationService, dict) -> dict
+
+        Answer /rhyme-scheme: the rhyme scheme of each poem in params, with
+        slant rhymes lettered alike if params['near'] is true.
+
+        >>> service = AnnotationService(student.SMALL_TABLE)
+        >>> service.get_rhyme_schemes({'poem': 'Fox\\nbox\\nsocks'})
+        {'results': [['A', 'A', 'A']]}
+        """
+
+        near = _get_flag(params, 'near')
+        results = []
+        for poem in _get_list(params, 'poems', 'poem'):
+            results.append(student.detect_rhyme_scheme(
+                student.convert_to_lines(poem), self.table, near))
+        return {'results': results}
+
+    def annotate_poems(self, params):
+        """ (AnnotationService, dict) -> dict
+
+        Answer /annotate: the annotated poem, as returned by annotate_poem,
+        for each poem in params, with its sound patterns if
+        params['sound_patterns'] is true.
+
+        >>> service = AnnotationService(student.SMALL_TABLE,
+        ...                             annotation_cache.AnnotationCache())
+        >>> for i in range(2):
+        ...     service.annotate_poems({'poem': 'Fox\\nbox'})['results']
+        [{'lines': ['Fox', 'box'], 'stress_patterns': ['/  ', '/  '], \
+'rhyme_scheme': ['A', 'A']}]
+        [{'lines': ['Fox', 'box'], 'stress_patterns': ['/  ', '/  '], \
+'rhyme_scheme': ['A', 'A']}]
+        >>> service.cache.get_stats()['hit_rate']
+        0.5
+        """
+
+        sound_patterns = _get_flag(params, 'sound_patterns')
+        results = []
+        for poem in _get_list(params, 'poems', 'poem'):
+            if self.cache is None:
+                results.append(poem_annotation.annotate_poem(
+                    poem, self.table, sound_patterns))
+            else:
+                results.append(self.cache.annotate(poem, self.table,
+                                                   sound_patterns))
+        return {'results': results}
+
+    def find_words(self, params):
+        """ (AnnotationService, dict) -> dict
+
+        Answer /words: the first k words starting with params['prefix'] or
+        ending with params['suffix'], and how many there are in all.
+
+        >>> service = AnnotationService(student.SMALL_TABLE)
+        >>> service.find_words({'suffix': ['ox'], 'k': ['1']})
+        {'results': ['BOX'], 'count': 2}
+        """
+
+        k = _get_k(params, word_search.TOP_K)
+        index = word_search.get_word_search(self.table)
+        if 'prefix' in params:
+            prefix = _get_first(params, 'prefixes', 'prefix')
+            return {'results': index.find_prefix(prefix, k),
+                    'count': index.count_prefix(prefix)}
+        suffix = _get_first(params, 'suffixes', 'suffix')
+        return {'results': index.find_suffix(suffix, k),
+                'count': index.count_suffix(suffix)}
+
+    def find_slant_rhymes(self, params):
+        """ (AnnotationService, dict) -> dict
+
+        Answer /slant-rhymes: [word, distance] for the first k words whose
+        last syllables are within params['distance'] of the word's.
+
+        >>> service = AnnotationService(student.SMALL_TABLE)
+        >>> service.find_slant_rhymes({'word': ["don't"], 'distance': ['1']})
+        {'results': [['CONSISTENT', 1.0]]}
+        >>> try:
+        ...     service.find_slant_rhymes({'word': ['box'],
+        ...                                'distance': ['nan']})
+        ... except RequestError as error:
+        ...     print(error.status, error)
+        400 "distance" must be a finite number >= 0
+        """
+
+        word = _get_first(params, 'words', 'word')
+        distance = _get_number(params, 'distance',
+                               slant_rhyme.NEAR_RHYME_DISTANCE, float)
+        if not math.isfinite(distance) or distance < 0:
+            raise RequestError(400,
+                               '"distance" must be a finite number >= 0')
+        k = _get_k(params, slant_rhyme.TOP_K)
+        results = []
+        for distance_here, w in slant_rhyme.find_slant_rhymes(
+                word, self.table, distance, k):
+            results.append([w, distance_here])
+        return {'results': results}
+
+    def run_batch(self, params):
+        """ (AnnotationService, dict) -> dict
+
+        Answer /batch: the answer to each request in params['requests'],
+        each a dict of params with the endpoint's name under 'endpoint'.  A
+        request that fails, for any reason, is answered with {'error':
+        message} and the others are still answered.
+
+        >>> service = AnnotationService(student.SMALL_TABLE)
+        >>> responses = service.run_batch({'requests': [
+        ...     {'endpoint': 'stress', 'word': 'a'}, {'endpoint': 'nope'}]})
+        >>> responses['responses']
+        [{'results': ['x ']}, {'error': 'unknown endpoint: nope'}]
+        """
+
+        requests = params.get('requests')
+        if not isinstance(requests, list):
+            raise RequestError(400, '"requests" must be a list')
+        responses = []
+        for request in requests:
+            try:
+                if not isinstance(request, dict):
+                    raise RequestError(400, 'each request must be an object')
+                path = '/' + str(request.get('endpoint', ''))
+                if path in ['/batch', '/stats'] or path not in self.endpoints:
+                    raise RequestError(
+                        404, 'unknown endpoint: ' + path[1:])
+                responses.append(self.endpoints[path][1](request))
+            except RequestError as error:
+                responses.append({'error': str(error)})
+            except Exception as error:
+                _log_error('answering a /batch request')
+                responses.append(_get_internal_error(error))
+        return {'responses': responses}
+
+    def get_stats(self, params):
+        """ (AnnotationService, dict) -> dict
+
+        Answer /stats: the uptime, the dictionary size, the latency
+        histogram of every endpoint, the annotation cache's stats (see
+        AnnotationCache.get_stats) and, while the pipeline is instrumented,
+        the stats of its stages.
+        """
+
+        endpoints = {}
+        for path in self.histograms:
+            endpoints[path] = self.histograms[path].to_dict()
+        stats = {'uptime_s': round(time.time() - self.started, 3),
+                 'dictionary_words': len(self.table[0]),
+                 'endpoints': endpoints}
+        if self.cache is not None:
+            stats['cache'] = self.cache.get_stats()
+        if instrumentation.is_enabled():
+            stats['stages'] = instrumentation.to_dict()['stages']
+        return stats
+
+    def answer(self, method, target, body):
+        """ (AnnotationService, str, str, bytes) -> tuple of (int, dict)
+
+        Return the status and JSON answer for a request for target with
+        method and body, and record its latency.  The params of a request
+        with a body are the JSON object in it, and otherwise the query
+        string; so every endpoint also answers POST.  An unexpected error
+        in a handler is written to standard error and answered with 500.
+
+        >>> service = AnnotationService(student.SMALL_TABLE)
+        >>> service.answer('GET', '/stress?word=in&word=a', b'')
+        (200, {'results': ['x ', 'x ']})
+        >>> service.answer('GET', '/rhymes', b'')
+        (404, {'error': 'no such endpoint: /rhymes'})
+        >>> import contextlib, io
+        >>> with contextlib.redirect_stderr(io.StringIO()):
+        ...     AnnotationService(None).answer('GET', '/stress?word=in', b'')
+        (500, {'error': 'internal error: TypeError'})
+        """
+
+        start = time.perf_counter()
+        url = urllib.parse.urlsplit(target)
+        path = url.path
+        try:
+            if path not in self.endpoints:
+                raise RequestError(404, 'no such endpoint: ' + path)
+            allowed, handler = self.endpoints[path]
+            if method != allowed and method != 'POST':
+                raise RequestError(405, path + ' needs ' + allowed)
+            params = urllib.parse.parse_qs(url.query)
+            if body:
+                try:
+                    params = json.loads(body.decode('utf-8'))
+                except ValueError:
+                    raise RequestError(400, 'the body is not valid JSON')
+                if not isinstance(params, dict):
+                    raise RequestError(400, 'the body must be a JSON object')
+            status, answer = 200, handler(params)
+        except RequestError as error:
+            status, answer = error.status, {'error': str(error)}
+        except Exception as error:
+            _log_error('answering {} {}'.format(method, target))
+            status, answer = 500, _get_internal_error(error)
+        if path in self.histograms:
+            self.histograms[path].record(time.perf_counter() - start)
+        return status, answer
+
+
+async def _read_line(reader):
+    """ (asyncio.StreamReader) -> bytes
+
+    Read one line of a request head from reader.  Raise RequestError if it
+    is longer than the reader's limit (64 KiB by default).
+    """
+
+    try:
+        return await reader.readline()
+    except ValueError:
+        # readline turns asyncio.LimitOverrunError into ValueError
+        raise RequestError(431, 'the request line or a header is too long')
+
+
+async def read_request(reader):
+    """ (asyncio.StreamReader) -> tuple of (str, str, dict, bytes)
+
+    Read one HTTP request from reader and return its method, target,
+    headers (by lower-case name) and body, or None if the connection was
+    closed before a request started.  Raise RequestError if it is malformed
+    or too large.
+    """
+
+    request_line = await _read_line(reader)
+    while request_line in [b'\r\n', b'\n']:
+        request_line = await _read_line(reader)
+    if request_line == b'':
+        return None
+    parts = request_line.decode('latin-1').split()
+    if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+        raise RequestError(400, 'malformed request line')
+    method, target, version = parts
+
+    headers = {'version': version}
+    line = await _read_line(reader)
+    while line not in [b'\r\n', b'\n', b'']:
+        name, colon, value = line.decode('latin-1').partition(':')
+        if colon == '':
+            raise RequestError(400, 'malformed header')
+        headers[name.strip().lower()] = value.strip()
+        line = await _read_line(reader)
+
+    try:
+        length = int(headers.get('content-length', '0'))
+    except ValueError:
+        raise RequestError(400, 'malformed Content-Length')
+    if length < 0 or length > MAX_BODY:
+        raise RequestError(413, 'the body is too large')
+    body = await reader.readexactly(length)
+    return method, target, headers, body
+
+
+def make_response(status, answer, keep_alive):
+    """ (int, dict, bool) -> bytes
+
+    Return the HTTP response with status and the JSON answer.
+
+    >>> make_response(200, {}, True).split(b'\\r\\n')[0]
+    b'HTTP/1.1 200 OK'
+    """
+
+    body = json.dumps(answer).encode('utf-8')
+    if keep_alive:
+        connection = 'keep-alive'
+    else:
+        connection = 'close'
+    head = ('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n'
+            'Content-Length: {}\r\nConnection: {}\r\n\r\n').format(
+                status, REASONS[status], len(body), connection)
+    return head.encode('latin-1') + body
+
+
+def _wants_keep_alive(headers):
+    """ (dict) -> bool
+
+    Return True if the connection should stay open after a request with
+    headers: the default for HTTP/1.1, and on request for HTTP/1.0.
+    """
+
+    connection = headers.get('connection', '').lower()
+    if headers['version'] == 'HTTP/1.0':
+        return connection == 'keep-alive'
+    return connection != 'close'
+
+
+async def handle_connection(service, reader, writer):
+    """ (AnnotationService, asyncio.StreamReader,
+         asyncio.StreamWriter) -> NoneType
+
+    Answer the requests on one connection until the client closes it, asks
+    for it to be closed, or leaves it idle for KEEP_ALIVE_TIMEOUT seconds.
+    Each request is answered in a worker thread, so the loop can serve
+    other connections meanwhile.
+    """
+
+    loop = asyncio.get_running_loop()
+    try:
+        keep_alive = True
+        while keep_alive:
+            try:
+                request = await asyncio.wait_for(read_request(reader),
+                                                 KEEP_ALIVE_TIMEOUT)
+            except RequestError as error:
+                writer.write(make_response(error.status,
+                                           {'error': str(error)}, False))
+                break
+            if request is None:
+                break
+            method, target, headers, body = request
+            keep_alive = _wants_keep_alive(headers)
+            status, answer = await loop.run_in_executor(
+                None, service.answer, method, target, body)
+            writer.write(make_response(status, answer, keep_alive))
+            await writer.drain()
+        await writer.drain()
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+            ConnectionError):
+        pass
+    except Exception:
+        # answer already turns handler errors into 500s; anything else
+        # ends the connection, but not the server
+        _log_error('on a connection')
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def start_server(service, host=HOST, port=PORT):
+    """ (AnnotationService, str, int) -> asyncio.Server
+
+    Start serving service on host and port (any free port if port is 0)
+    and return the server.
+    """
+
+    return await asyncio.start_server(
+        lambda reader, writer: handle_connection(service, reader, writer),
+        host, port)
+
+
+async def serve(service, host, port):
+    """ (AnnotationService, str, int) -> NoneType
+
+    Serve service on host and port until interrupted.
+    """
+
+    server = await start_server(service, host, port)
+    address = server.sockets[0].getsockname()
+    sys.stderr.write('serving on http://{}:{}/\n'.format(address[0],
+                                                         address[1]))
+    async with server:
+        await server.serve_forever()
+
+
+def main(arguments=None):
+    """ (list of str) -> int
+
+    Run the annotation server with the command line arguments arguments and
+    return the exit status.
+    """
+
+    parser = argparse.ArgumentParser(
+        description='Serve poem annotations over HTTP on localhost.')
+    parser.add_argument('--port', type=int, default=PORT,
+                        help='port to listen on (default: {})'.format(PORT))
+    parser.add_argument('--dictionary',
+                        default=annotate_poetry.OUR_PRONOUNCING_DICTIONARY,
+                        help='pronouncing dictionary file')
+    parser.add_argument('--mapped', action='store_true',
+                        help='use the memory-mapped dictionary')
+    parser.add_argument('--guess-missing', action='store_true',
+                        help='guess pronunciations for words not in the '
+                        'dictionary')
+    parser.add_argument('--instrument', type=int, default=0, metavar='N',
+                        help='instrument the pipeline stages, measuring '
+                        'one in N calls, and report them in /stats')
+    parser.add_argument('--cache-size', type=int,
+                        default=annotation_cache.MEMORY_SIZE, metavar='N',
+                        help='annotated poems kept in memory (default: {}; '
+                        '0 for none)'.format(annotation_cache.MEMORY_SIZE))
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help='also keep annotated poems on disk in DIR')
+    parser.add_argument('--cache-max-mb', type=float,
+                        default=annotation_cache.MAX_DISK_BYTES / (1 << 20),
+                        metavar='MB',
+                        help='most megabytes kept in --cache-dir (default: '
+                        '{:.0f})'.format(
+                            annotation_cache.MAX_DISK_BYTES / (1 << 20)))
+    options = parser.parse_args(arguments)
+
+    if not os.path.exists(options.dictionary):
+        sys.stderr.write('The Pronouncing Dictionary was not found: ' +
+                         options.dictionary + '\n')
+        return 1
+    cache = None
+    if options.cache_size > 0 or options.cache_dir is not None:
+        cache = annotation_cache.AnnotationCache(
+            options.cache_size, options.cache_dir,
+            int(options.cache_max_mb * (1 << 20)))
+    if options.instrument > 0:
+        instrumentation.enable(sample_every=options.instrument)
+    else:
+        instrumentation.enable_from_environment()
+    start = time.perf_counter()
+    table = annotate_poetry.read_pronouncing_dictionary(
+        options.dictionary, mapped=options.mapped,
+        guess_missing=options.guess_missing)
+    sys.stderr.write('dictionary loaded in {:.2f} s\n'.format(
+        time.perf_counter() - start))
+    try:
+        asyncio.run(serve(AnnotationService(table, cache), HOST,
+                          options.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""
+Annotate many poems without opening the poem window.
+
+Poems are read from poem files (one poem per file) or from JSONL files (one
+JSON object per line, with the poem in a "text" field and an optional "id"),
+annotated by a pool of worker processes and written out as JSONL, one
+annotated poem per line, in input order.  The number of poems annotated per
+second is reported on standard error when the run is done.
+
+The pronouncing dictionary is read once, before the workers start, and the
+workers share it: forked workers inherit the parent's table, and with
+--mapped every worker maps the same index file.
+
+Annotated poems are cached (see annotation_cache), so repeated poems are
+only annotated once: each worker keeps the last --cache-size in memory, and
+with --cache-dir they are also kept on disk, shared by the workers and by
+later runs.  The cache's hit rate is reported with the poems per second.
+
+Usage:
+    python batch_annotate.py [options] INPUT [INPUT ...]
+
+INPUT is a poem file, a JSONL file (ending in .jsonl, or any file with
+--jsonl), or - for JSONL on standard input.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import annotate_poetry
+import annotation_cache
+import instrumentation
+import poem_annotation
+
+# The pronouncing table used by annotate_record in this process.
+_table = None
+
+# The dictionary settings, for workers that are not forked.
+_dictionary = annotate_poetry.OUR_PRONOUNCING_DICTIONARY
+_mapped = False
+_guess_missing = False
+
+# Whether annotated poems include their sound patterns.
+_sound_patterns = False
+
+# The annotation cache of this process, or None, and the (memory_size,
+# disk_path, max_disk_bytes) it was made with, for workers that are not
+# forked.
+_cache = None
+_cache_settings = None
+
+# How many poems each worker is sent at a time.
+CHUNK_SIZE = 16
+
+
+def _load_table(dictionary, mapped, guess_missing):
+    """ (str, bool, bool) -> NoneType
+
+    Read the pronouncing dictionary into this process's table, unless it
+    already has one (as forked workers do).
+    """
+
+    global _table
+    if _table is None:
+        _table = annotate_poetry.read_pronouncing_dictionary(
+            dictionary, mapped=mapped, guess_missing=guess_missing)
+
+
+def _make_cache(cache_settings):
+    """ (tuple) -> NoneType
+
+    Make this process's annotation cache with cache_settings, unless it
+    already has one (as forked workers do) or cache_settings is None.
+    """
+
+    global _cache
+    if _cache is None and cache_settings is not None:
+        _cache = annotation_cache.AnnotationCache(*cache_settings)
+
+
+def _start_worker(dictionary, mapped, guess_missing, sound_patterns,
+                  cache_settings):
+    """ (str, bool, bool, bool, tuple) -> NoneType
+
+    Set up a worker process: read its table (see _load_table), make its
+    cache (see _make_cache) and take the annotation settings of the parent.
+    """
+
+    global _sound_patterns
+    _sound_patterns = sound_patterns
+    _load_table(dictionary, mapped, guess_missing)
+    _make_cache(cache_settings)
+
+
+def _warn_skipped(name, line_number, reason):
+    """ (str, int, str) -> NoneType
+
+    Warn on standard error that line line_number of the input named name
+    was skipped for reason.
+    """
+
+    sys.stderr.write('skipping {}:{}: {}\n'.format(name, line_number, reason))
+
+
+def read_records(inputs, jsonl, text_field):
+    """ (list of str, bool, str) -> iterator of tuple of (object, str)
+
+    Yield an (id, poem) pair for each poem in the files named in inputs, one
+    at a time, so that large inputs are never held in memory at once.
+    Poem files use the file name as id; JSONL records use their "id" field,
+    or the file name and line number if there is none.  A JSONL line that
+    is not valid JSON, or has no text_field string, is skipped with a
+    warning on standard error giving its file and line number.
+
+    >>> import contextlib, io, sys
+    >>> sys.stdin = io.StringIO('{"id": 1}\\n{"id": 2, "text": "Fox"}\\n')
+    >>> with contextlib.redirect_stderr(io.StringIO()) as errors:
+    ...     list(read_records(['-'], False, 'text'))
+    [(2, 'Fox')]
+    >>> sys.stdin = sys.__stdin__
+    >>> errors.getvalue()
+    'skipping -:1: no "text" string\\n'
+    """
+
+    for name in inputs:
+        if name == '-' or jsonl or name.endswith('.jsonl'):
+            if name == '-':
+                input_file = sys.stdin
+            else:
+                input_file = open(name, 'r')
+            line_number = 0
+            for line in input_file:
+                line_number += 1
+                if line.strip() == '':
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as error:
+                    _warn_skipped(name, line_number,
+                                  'not valid JSON ({})'.format(error))
+                    continue
+                if (not isinstance(record, dict) or
+                        not isinstance(record.get(text_field), str)):
+                    _warn_skipped(name, line_number,
+                                  'no "{}" string'.format(text_field))
+                    continue
+                poem_id = record.get('id', '{}:{}'.format(name, line_number))
+                yield poem_id, record[text_field]
+            if input_file is not sys.stdin:
+                input_file.close()
+        else:
+            poem_file = open(name, 'r')
+            poem = poem_file.read()
+            poem_file.close()
+            yield name, poem
+
+
+def look_up_record(record):
+    """ (tuple of (object, str)) -> tuple of (str, str)
+
+    Return the JSON line for the annotated poem in record, an (id, poem)
+    pair, using this process's pronouncing table and cache, and where the
+    annotated poem was found: one of annotation_cache.SOURCES ('miss' if
+    there is no cache).
+    """
+
+    poem_id, poem = record
+    if _cache is None:
+        annotated = poem_annotation.annotate_poem(poem, _table,
+                                                  _sound_patterns)
+        source = 'miss'
+    else:
+        annotated, source = _cache.look_up(poem, _table, _sound_patterns)
+    annotated['id'] = poem_id
+    return json.dumps(annotated), source
+
+
+def annotate_record(record):
+    """ (tuple of (object, str)) -> str
+
+    Return the JSON line for the annotated poem in record, an (id, poem)
+    pair, using this process's pronouncing table and cache.
+    """
+
+    return look_up_record(record)[0]
+
+
+def _bounded(records, slots):
+    """ (iterator, threading.BoundedSemaphore) -> iterator
+
+    Yield the records, waiting for a free slot before each one.  The pool
+    reads its input in a thread of its own as fast as it can; this keeps it
+    from reading a whole corpus into memory ahead of the workers.
+    """
+
+    for record in records:
+        slots.acquire()
+        yield record
+
+
+def annotate_all(records, output_file, workers):
+    """ (iterator, file, int) -> int
+
+    Annotate every (id, poem) pair in records, writing one JSON line per
+    poem to output_file in input order, and return the number of poems.
+    With fewer than two workers, everything is done in this process.
+    """
+
+    count = 0
+    if workers < 2:
+        for record in records:
+            output_file.write(annotate_record(record) + '\n')
+            count += 1
+        return count
+
+    # Fork where possible so the workers share the table read by the parent.
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    slots = threading.BoundedSemaphore(workers * CHUNK_SIZE * 4)
+    pool = context.Pool(workers, _start_worker,
+                        (_dictionary, _mapped, _guess_missing,
+                         _sound_patterns, _cache_settings))
+    try:
+        for line, source in pool.imap(look_up_record,
+                                      _bounded(records, slots), CHUNK_SIZE):
+            slots.release()
+            output_file.write(line + '\n')
+            count += 1
+            # the workers' caches are counted in this process's
+            if _cache is not None:
+                _cache.counts[source] += 1
+    finally:
+        pool.close()
+        pool.join()
+    # count the files the workers wrote
+    if _cache is not None and _cache.disk_path is not None:
+        _cache.scan_disk()
+    return count
+
+
+def main(arguments=None):
+    """ (list of str) -> int
+
+    Run the batch annotator with the command line arguments arguments and
+    return the exit status.
+    """
+
+    global _dictionary, _mapped, _guess_missing, _sound_patterns
+    global _cache_settings
+    parser = argparse.ArgumentParser(
+        description='Annotate poems with stress patterns and rhyme schemes.')
+    parser.add_argument('inputs', nargs='+', metavar='INPUT',
+                        help='poem file, JSONL file, or - for JSONL on stdin')
+    parser.add_argument('--jsonl', action='store_true',
+                        help='read every INPUT as JSONL')
+    parser.add_argument('--text-field', default='text',
+                        help='JSONL field holding the poem (default: text)')
+    parser.add_argument('-o', '--output', default='-',
+                        help='JSONL output file (default: standard output)')
+    parser.add_argument('-j', '--workers', type=int,
+                        default=os.cpu_count() or 1,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--dictionary', default=_dictionary,
+                        help='pronouncing dictionary file')
+    parser.add_argument('--mapped', action='store_true',
+                        help='use the memory-mapped dictionary')
+    parser.add_argument('--guess-missing', action='store_true',
+                        help='guess pronunciations for words not in the '
+                        'dictionary')
+    parser.add_argument('--sound-patterns', action='store_true',
+                        help='also find the alliteration, assonance and '
+                        'internal rhyme in each line')
+    parser.add_argument('--cache-size', type=int,
+                        default=annotation_cache.MEMORY_SIZE, metavar='N',
+                        help='annotated poems each process keeps in memory '
+                        '(default: {}; 0 for none)'.format(
+                            annotation_cache.MEMORY_SIZE))
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help='also keep annotated poems on disk in DIR')
+    parser.add_argument('--cache-max-mb', type=float,
+                        default=annotation_cache.MAX_DISK_BYTES / (1 << 20),
+                        metavar='MB',
+                        help='most megabytes kept in --cache-dir (default: '
+                        '{:.0f})'.format(
+                            annotation_cache.MAX_DISK_BYTES / (1 << 20)))
+    parser.add_argument('--profile', action='store_true',
+                        help='report the time spent in each pipeline stage '
+                        'on standard error (annotates in this process)')
+    parser.add_argument('--profile-json', metavar='FILE',
+                        help='also write the stage report to FILE as JSON')
+    parser.add_argument('--profile-sample', type=int, default=1, metavar='N',
+                        help='measure one in N calls of each stage')
+    options = parser.parse_args(arguments)
+
+    if not os.path.exists(options.dictionary):
+        sys.stderr.write('The Pronouncing Dictionary was not found: ' +
+                         options.dictionary + '\n')
+        return 1
+    _dictionary = options.dictionary
+    _mapped = options.mapped
+    _guess_missing = options.guess_missing
+    _sound_patterns = options.sound_patterns
+    if options.cache_size > 0 or options.cache_dir is not None:
+        _cache_settings = (options.cache_size, options.cache_dir,
+                           int(options.cache_max_mb * (1 << 20)))
+        _make_cache(_cache_settings)
+    # The stages are instrumented in this process only, so a profiled run
+    # does not hand its poems to workers.
+    profile = options.profile or options.profile_json is not None
+    if profile:
+        instrumentation.enable(sample_every=options.profile_sample)
+    elif instrumentation.enable_from_environment():
+        profile = True
+    if profile:
+        options.workers = 1
+
+    start = time.perf_counter()
+    _load_table(_dictionary, _mapped, _guess_missing)
+    load_seconds = time.perf_counter() - start
+
+    if options.output == '-':
+        output_file = sys.stdout
+    else:
+        output_file = open(options.output, 'w')
+    start = time.perf_counter()
+    try:
+        count = annotate_all(read_records(options.inputs, options.jsonl,
+                                          options.text_field),
+                             output_file, options.workers)
+    finally:
+        if output_file is not sys.stdout:
+            output_file.close()
+    seconds = time.perf_counter() - start
+
+    rate = count / seconds if seconds > 0 else 0.0
+    sys.stderr.write(
+        'dictionary loaded in {:.2f} s; annotated {} poems in {:.2f} s '
+        '({:.1f} poems/s)\n'.format(load_seconds, count, seconds, rate))
+    if _cache is not None:
+        sys.stderr.write(_cache.format_stats() + '\n')
+    if profile:
+        sys.stderr.write(instrumentation.format_report() + '\n')
+        if options.profile_json is not None:
+            instrumentation.write_json(options.profile_json)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Time annotating each sample poem (stress pattern of every word and the rhyme
+scheme) with the precomputed rhyme key and stress columns of a
+PronouncingTable, and with the same table when those values have to be
+derived from the phonemes of every word.
+
+Run from anywhere:
+    python benchmarks/bench_annotate_poem.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import stress_and_rhyme_functions as student
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEMS = ['haiku.txt', 'limerick1.txt', 'petrarchan_sonnet.txt',
+         'rondeau.txt', 'cat_verse.txt', 'longPoem.txt']
+
+
+class IndexOnlyTable(list):
+    """ A pronouncing table with a word index but no precomputed columns. """
+
+    def __init__(self, table):
+        """ (IndexOnlyTable, PronouncingTable) -> NoneType
+
+        Share the words, pronunciations and index of table.
+        """
+
+        list.__init__(self, [table[0], table[1]])
+        self.find_row = table.find_row
+
+
+def annotate(poem, pronouncing_table):
+    """ (str, pronouncing table) -> NoneType
+
+    Annotate the stress of every word of poem and its rhyme scheme.
+    """
+
+    poem_lines = student.convert_to_lines(poem)
+    for line in poem_lines:
+        for word in line.split():
+            student.get_stress_pattern(word, pronouncing_table)
+    student.detect_rhyme_scheme(poem_lines, pronouncing_table)
+
+
+def time_per_poem(poem, pronouncing_table, repeat):
+    """ (str, pronouncing table, int) -> float
+
+    Return the mean seconds taken to annotate poem.
+    """
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        annotate(poem, pronouncing_table)
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    index_only = IndexOnlyTable(table)
+
+    print('{:<24}{:>14}{:>14}'.format('poem', 'derived (us)', 'columns (us)'))
+    for name in POEMS:
+        poem_file = open(os.path.join(ROOT, name), 'r')
+        poem = poem_file.read()
+        poem_file.close()
+        derived = time_per_poem(poem, index_only, 200)
+        columns = time_per_poem(poem, table, 200)
+        print('{:<24}{:14.1f}{:14.1f}'.format(name, derived * 1e6,
+                                                columns * 1e6))
@@ -0,0 +1,106 @@
+"""
+Time answering the sample poems from the annotation cache, from memory and
+from disk, against annotating them, and the hit rate of the cache on a
+stream of poems in which some poems come up far more often than others.
+
+Run from anywhere:
+    python benchmarks/bench_annotation_cache.py
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import annotation_cache
+import poem_annotation
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEMS = ['petrarchan_sonnet.txt', 'limerick1.txt', 'limerick2.txt',
+         'alt_sonnet.txt', 'cat_verse.txt', 'rondeau.txt', 'quintain.txt',
+         'haiku.txt', 'longPoem.txt']
+REPEATS = 200
+STREAM = 20000
+DISTINCT = 5000
+MEMORY_SIZES = [256, 1024, 4096]
+
+
+def time_poems(function, poems, repeats):
+    """ (function, list of str, int) -> float
+
+    Return the mean microseconds taken by function(poem) for each of poems,
+    each done repeats times.
+    """
+
+    start = time.perf_counter()
+    for i in range(repeats):
+        for poem in poems:
+            function(poem)
+    return (time.perf_counter() - start) * 1e6 / (repeats * len(poems))
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    poems = []
+    for name in POEMS:
+        poem_file = open(os.path.join(ROOT, name), 'r')
+        poems.append(poem_file.read())
+        poem_file.close()
+
+    start = time.perf_counter()
+    annotation_cache.get_table_fingerprint(table)
+    print('table fingerprint:  {:10.1f} ms (once per table)'.format(
+        (time.perf_counter() - start) * 1000))
+    print('annotate_poem:      {:10.1f} us/poem'.format(time_poems(
+        lambda poem: poem_annotation.annotate_poem(poem, table), poems, 20)))
+    print('get_key:            {:10.1f} us/poem'.format(time_poems(
+        lambda poem: annotation_cache.get_key(poem, table), poems, REPEATS)))
+
+    memory = annotation_cache.AnnotationCache()
+    for poem in poems:
+        memory.annotate(poem, table)
+    print('memory hit:         {:10.1f} us/poem'.format(time_poems(
+        lambda poem: memory.annotate(poem, table), poems, REPEATS)))
+
+    folder = tempfile.mkdtemp()
+    try:
+        disk = annotation_cache.AnnotationCache(
+            memory_size=0, disk_path=os.path.join(folder, 'cache'))
+        for poem in poems:
+            disk.annotate(poem, table)
+        print('disk hit:           {:10.1f} us/poem'.format(time_poems(
+            lambda poem: disk.annotate(poem, table), poems, REPEATS)))
+    finally:
+        shutil.rmtree(folder)
+
+    # A stream of random dictionary-word poems, some far more often than
+    # others (Zipf-like), as resubmissions and duplicates are.
+    generator = random.Random(25)
+    words = table[0]
+    distinct = []
+    for i in range(DISTINCT):
+        distinct.append('\n'.join(
+            ' '.join(words[generator.randrange(len(words))]
+                     for k in range(6)) for j in range(4)))
+    weights = [1 / (i + 1) for i in range(DISTINCT)]
+    stream = generator.choices(distinct, weights, k=STREAM)
+    start = time.perf_counter()
+    for poem in stream:
+        poem_annotation.annotate_poem(poem, table)
+    uncached = time.perf_counter() - start
+    print('stream of {} poems ({} distinct), uncached: {:.2f} s'.format(
+        STREAM, DISTINCT, uncached))
+    for memory_size in MEMORY_SIZES:
+        cache = annotation_cache.AnnotationCache(memory_size)
+        start = time.perf_counter()
+        for poem in stream:
+            cache.annotate(poem, table)
+        seconds = time.perf_counter() - start
+        print('  memory_size {:5d}: {:.2f} s, {:.1%} hit rate'.format(
+            memory_size, seconds, cache.get_stats()['hit_rate']))
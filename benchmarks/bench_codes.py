@@ -0,0 +1,104 @@
+"""
+Measure the memory used by the pronunciations of the full dictionary as
+lists of phoneme strings and as a PronunciationColumn of phoneme codes, and
+time stress and rhyme extraction for every word in both forms.
+
+Run from anywhere:
+    python benchmarks/bench_codes.py
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import pronouncing_table
+import stress_and_rhyme_functions as student
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+
+
+def read_pronouncing_lines(filename):
+    """ (str) -> list of str
+
+    Return the pronouncing lines of dictionary file filename.
+    """
+
+    dictionary_file = open(filename, 'r')
+    lines = []
+    for line in dictionary_file:
+        if not line.startswith(';;;'):
+            lines.append(line)
+    dictionary_file.close()
+    return lines
+
+
+def traced_size(make):
+    """ (function) -> tuple of (object, int)
+
+    Return the result of calling make and the number of bytes still
+    allocated for it afterwards.
+    """
+
+    tracemalloc.start()
+    result = make()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def time_lists(pronunciations):
+    """ (list of list of str) -> float
+
+    Return the seconds taken to get the stress digits and last syllable of
+    every pronunciation with the phoneme string functions.
+    """
+
+    start = time.perf_counter()
+    for phonemes in pronunciations:
+        digits = ''
+        for phoneme in phonemes:
+            if student.is_vowel_phoneme(phoneme):
+                digits += phoneme[-1]
+        student.last_syllable(phonemes)
+    return time.perf_counter() - start
+
+
+def time_codes(column):
+    """ (PronunciationColumn) -> float
+
+    Return the seconds taken to get the stress digits and last syllable of
+    every pronunciation in column with the phoneme code functions.
+    """
+
+    start = time.perf_counter()
+    for row in range(len(column)):
+        codes = column.get_codes(row)
+        pronouncing_table.get_stress_digits(codes)
+        student.last_syllable_codes(codes)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    lines = read_pronouncing_lines(DICTIONARY)
+
+    lists, lists_size = traced_size(
+        lambda: [student.get_pronunciation(line) for line in lines])
+    column, column_size = traced_size(
+        lambda: pronouncing_table.PronunciationColumn(lists))
+
+    print('pronunciations:       {:10d}'.format(len(lists)))
+    print('phoneme strings:      {:10.1f} MB'.format(lists_size / 2 ** 20))
+    print('phoneme codes:        {:10.1f} MB'.format(column_size / 2 ** 20))
+    print('memory saved:         {:10.1f} MB'.format(
+        (lists_size - column_size) / 2 ** 20))
+
+    lists_time = time_lists(lists)
+    codes_time = time_codes(column)
+    print('stress+rhyme strings: {:10.1f} ms'.format(lists_time * 1000))
+    print('stress+rhyme codes:   {:10.1f} ms'.format(codes_time * 1000))
+    print('speedup:              {:10.1f}x'.format(lists_time / codes_time))
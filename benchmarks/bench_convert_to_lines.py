@@ -0,0 +1,103 @@
+"""
+Time convert_to_lines on a 50 MB text made of the sample poems, from a str
+and streamed from a file with iter_poem_lines, and time the previous
+count/index/pop implementation on growing prefixes of the same text to
+show how it scales.
+
+Run from anywhere:
+    python benchmarks/bench_convert_to_lines.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import stress_and_rhyme_functions as student
+
+POEMS = ['alt_sonnet.txt', 'cat_verse.txt', 'limerick1.txt', 'rondeau.txt',
+         'petrarchan_sonnet.txt', 'quintain.txt']
+TEXT_SIZE = 50 * 2 ** 20
+
+
+def previous_convert_to_lines(poem):
+    """ (str) -> list of str
+
+    The previous convert_to_lines, kept here for comparison.  It removes
+    every blank line but the last one.
+    """
+
+    result = []
+    poem = poem.strip()
+    res = poem.split('\n')
+    count = res.count('')
+
+    while count > 1:
+        index = res.index('')
+        res.pop(index)
+        count = res.count('')
+    for line in res:
+        result.append(line.strip())
+
+    return result
+
+
+def make_text(size):
+    """ (int) -> str
+
+    Return a text of at least size characters made of the sample poems.
+    """
+
+    poems = []
+    for name in POEMS:
+        poem_file = open(os.path.join(ROOT, name), 'r')
+        poems.append(poem_file.read())
+        poem_file.close()
+    block = '\n\n\n'.join(poems) + '\n\n\n'
+    return block * (size // len(block) + 1)
+
+
+def seconds_for(function, argument):
+    """ (function, object) -> float
+
+    Return the seconds taken by function(argument).
+    """
+
+    start = time.perf_counter()
+    function(argument)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    text = make_text(TEXT_SIZE)
+    print('text size: {:.1f} MB'.format(len(text) / 2 ** 20))
+
+    print('convert_to_lines (str):          {:8.2f} s'.format(
+        seconds_for(student.convert_to_lines, text)))
+
+    folder = tempfile.mkdtemp()
+    filename = os.path.join(folder, 'poems.txt')
+    text_file = open(filename, 'w')
+    text_file.write(text)
+    text_file.close()
+    text_file = open(filename, 'r')
+    start = time.perf_counter()
+    count = 0
+    for line in student.iter_poem_lines(text_file):
+        count += 1
+    print('iter_poem_lines (file):          {:8.2f} s ({} lines)'.format(
+        time.perf_counter() - start, count))
+    text_file.close()
+    os.remove(filename)
+    os.rmdir(folder)
+
+    for size in [25000, 50000, 100000, 200000]:
+        prefix = text[:size]
+        print('previous, {:4d} kB prefix:        {:8.2f} s '
+              '(new: {:.4f} s)'.format(
+                  size // 1000,
+                  seconds_for(previous_convert_to_lines, prefix),
+                  seconds_for(student.convert_to_lines, prefix)))
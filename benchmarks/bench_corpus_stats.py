@@ -0,0 +1,102 @@
+"""
+Compare corpus stress statistics computed word by word with
+get_stress_pattern against the vectorized corpus_stats path, on a corpus of
+a million lines made of the sample poems.
+
+The word-by-word path is timed on the first tenth of the corpus and scaled
+up, since running it on every line takes minutes.  Needs NumPy.
+
+Run from anywhere:
+    python benchmarks/bench_corpus_stats.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import corpus_stats
+import stress_and_rhyme_functions as student
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEMS = ['alt_sonnet.txt', 'cat_verse.txt', 'haiku.txt', 'limerick1.txt',
+         'limerick2.txt', 'petrarchan_sonnet.txt', 'quintain.txt',
+         'rondeau.txt']
+LINES = 1000000
+
+
+def make_corpus(line_count):
+    """ (int) -> list of str
+
+    Return copies of the sample poems with about line_count lines in all.
+    """
+
+    poems = []
+    for name in POEMS:
+        poem_file = open(os.path.join(ROOT, name), 'r')
+        poems.append(poem_file.read())
+        poem_file.close()
+    lines_per_round = sum([len(student.convert_to_lines(poem))
+                           for poem in poems])
+    return poems * (line_count // lines_per_round + 1)
+
+
+def word_by_word(poems, table):
+    """ (list of str, pronouncing table) -> tuple of (list of int, list)
+
+    Return the syllable count and stress digits of every line, found by
+    parsing the padded strings from get_stress_pattern.
+    """
+
+    syllables = []
+    stresses = []
+    for poem in poems:
+        for line in student.convert_to_lines(poem):
+            digits = []
+            for word in line.split():
+                for symbol in student.get_stress_pattern(word, table).split():
+                    if symbol == student.NO_STRESS_SYMBOL:
+                        digits.append(0)
+                    elif symbol == student.PRIMARY_STRESS_SYMBOL:
+                        digits.append(1)
+                    else:
+                        digits.append(2)
+            syllables.append(len(digits))
+            stresses.append(digits)
+    return syllables, stresses
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    poems = make_corpus(LINES)
+    corpus_stats.get_word_arrays(table)
+
+    start = time.perf_counter()
+    corpus = corpus_stats.encode_corpus(poems, table)
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stats = corpus_stats.get_corpus_stress(corpus, table)
+    stats_seconds = time.perf_counter() - start
+
+    sample = poems[:len(poems) // 10]
+    start = time.perf_counter()
+    syllables, stresses = word_by_word(sample, table)
+    word_seconds = (time.perf_counter() - start) * len(poems) / len(sample)
+
+    # Check the two paths agree on the sample.
+    sample_lines = len(syllables)
+    assert stats.line_syllables[:sample_lines].tolist() == syllables
+    assert stats.get_line_stresses(sample_lines - 1).tolist() == stresses[-1]
+
+    print('lines:                     {:10d}'.format(
+        len(corpus.line_offsets) - 1))
+    print('tokens:                    {:10d}'.format(len(corpus.tokens)))
+    print('word by word (scaled):     {:10.2f} s'.format(word_seconds))
+    print('encode tokens (once):      {:10.2f} s'.format(encode_seconds))
+    print('vectorized statistics:     {:10.3f} s'.format(stats_seconds))
+    print('statistics speedup:        {:10.0f}x'.format(
+        word_seconds / stats_seconds))
@@ -0,0 +1,55 @@
+"""
+Run 100k find_rhymes queries for words drawn from the full dictionary and
+report the time per query, with and without near rhymes.
+
+Run from anywhere:
+    python benchmarks/bench_find_rhymes.py
+"""
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import rhyme_index
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+QUERIES = 100000
+
+
+def time_queries(words, table, near, limit):
+    """ (list of str, pronouncing table, bool, int) -> float
+
+    Return the mean seconds per find_rhymes query over words.
+    """
+
+    start = time.perf_counter()
+    for word in words:
+        rhyme_index.find_rhymes(word, table, near=near, limit=limit)
+    return (time.perf_counter() - start) / len(words)
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+
+    start = time.perf_counter()
+    rhyme_index.get_rhyme_index(table)
+    print('index build:           {:8.1f} ms'.format(
+        (time.perf_counter() - start) * 1000))
+
+    random.seed(108)
+    words = random.sample(list(table[0]), QUERIES)
+    # Listing every near rhyme returns thousands of words per query, so it
+    # is only run for the first tenth of the queries.
+    for label, near, limit, count in [('perfect, all', False, None, QUERIES),
+                                      ('perfect, top 20', False, 20, QUERIES),
+                                      ('near, top 20', True, 20, QUERIES),
+                                      ('near, all', True, None,
+                                       QUERIES // 10)]:
+        print('{:<22} {:8.1f} us/query ({} queries)'.format(
+            label + ':', time_queries(words[:count], table, near, limit) * 1e6,
+            count))
@@ -0,0 +1,53 @@
+"""
+Time form recognition on a queue of 20,000 poems made of the sample poems:
+finding each poem's features once, and scoring every form from them.
+
+Run from anywhere:
+    python benchmarks/bench_forms.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import poem_forms
+import stress_and_rhyme_functions as student
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEMS = ['petrarchan_sonnet.txt', 'limerick1.txt', 'limerick2.txt',
+         'alt_sonnet.txt', 'cat_verse.txt', 'haiku.txt', 'rondeau.txt',
+         'quintain.txt']
+QUEUE = 20000
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    poems = []
+    for name in POEMS:
+        poem_file = open(os.path.join(ROOT, name), 'r')
+        poem_lines = student.convert_to_lines(poem_file.read())
+        poem_file.close()
+        poems.append(poem_lines)
+        print('{:24s} {}'.format(
+            name, poem_forms.rank_forms(poem_lines, table)[:2]))
+    queue = poems * (QUEUE // len(poems))
+
+    start = time.perf_counter()
+    features = [poem_forms.get_poem_features(poem_lines, table)
+                for poem_lines in queue]
+    feature_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for poem_features in features:
+        poem_forms.rank_features(poem_features)
+    rank_seconds = time.perf_counter() - start
+
+    print('poems:                     {:10d}'.format(len(queue)))
+    print('features (one pass):       {:10.2f} s'.format(feature_seconds))
+    print('scoring {} forms:           {:10.2f} s'.format(
+        len(poem_forms.FORMS), rank_seconds))
+    print('poems per second:          {:10.0f}'.format(
+        len(queue) / (feature_seconds + rank_seconds)))
@@ -0,0 +1,85 @@
+"""
+Time guessed pronunciations for words that are not in the dictionary: the
+first guess at each word, and repeated guesses answered by the LRU cache.
+Also report how often the guesses for dictionary words, made as if the words
+were missing, get the stress pattern and the syllable count right.
+
+Run from anywhere:
+    python benchmarks/bench_guess.py
+"""
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import pronouncing_table as table_index
+import pronunciation_guess
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+WORDS = 2000
+REPEATS = 50
+
+
+def make_missing_words(table, count):
+    """ (pronouncing table, int) -> list of str
+
+    Return count made-up words, built from pieces of dictionary words, that
+    are not in table.
+    """
+
+    words = table[0]
+    generator = random.Random(13)
+    result = []
+    while len(result) < count:
+        first = words[generator.randrange(len(words))]
+        second = words[generator.randrange(len(words))]
+        word = first[:len(first) // 2 + 1] + second[len(second) // 2:]
+        if word.isalpha() and table_index.find_row(word, table) == -1:
+            result.append(word)
+    return result
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY,
+                                                        guess_missing=True)
+    missing = make_missing_words(table, WORDS)
+
+    start = time.perf_counter()
+    for word in missing:
+        pronunciation_guess.guess_codes(word, table)
+    first_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(REPEATS):
+        for word in missing:
+            pronunciation_guess.guess_codes(word, table)
+    repeat_seconds = (time.perf_counter() - start) / REPEATS
+
+    print('first guesses:             {:10.1f} us/word'.format(
+        first_seconds / len(missing) * 1e6))
+    print('cached guesses:            {:10.2f} us/word'.format(
+        repeat_seconds / len(missing) * 1e6))
+    print('cache:                     {}'.format(
+        pronunciation_guess.get_guess_stats(table)))
+
+    # Guess dictionary words by rules alone, as if they were missing.
+    generator = random.Random(17)
+    rows = generator.sample(range(len(table[0])), WORDS)
+    same_stress = 0
+    same_syllables = 0
+    for row in rows:
+        codes = table_index.encode_pronunciation(
+            pronunciation_guess.guess_by_rules(table[0][row]))
+        digits = table_index.get_stress_digits(codes)
+        if digits == table_index.get_row_stress_digits(row, table):
+            same_stress += 1
+        if len(digits) == len(table_index.get_row_stress_digits(row, table)):
+            same_syllables += 1
+    print('rules, right stress:       {:10.1%}'.format(same_stress / WORDS))
+    print('rules, right syllables:    {:10.1%}'.format(
+        same_syllables / WORDS))
@@ -0,0 +1,79 @@
+"""
+Time what stands between starting the annotator and its window appearing.
+Before, the dictionary was read before the window was created; now the
+window is created first and the dictionary is loaded by a
+DictionaryLoader on a background thread.  Without a display the window
+itself cannot be created here, so this times the parts around it:
+importing annotate_poetry, starting the loader, and the load itself (from
+the cache and by parsing the dictionary, with progress reports).
+
+Run from anywhere:
+    python benchmarks/bench_gui_startup.py
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DICTIONARY = os.path.join(ROOT, 'our_dictionary.txt')
+REPEATS = 5
+
+
+def time_import():
+    """ () -> float
+
+    Return the least seconds, over REPEATS fresh interpreters, taken to
+    import annotate_poetry.
+    """
+
+    code = ('import time; start = time.perf_counter(); '
+            'import annotate_poetry; print(time.perf_counter() - start)')
+    best = None
+    for i in range(REPEATS):
+        output = subprocess.check_output([sys.executable, '-c', code],
+                                         cwd=ROOT)
+        seconds = float(output)
+        if best is None or seconds < best:
+            best = seconds
+    return best
+
+
+def time_load(use_cache):
+    """ (bool) -> tuple of (float, float, int)
+
+    Return the seconds taken to start a loader, the seconds until it has
+    loaded the dictionary, and the number of progress reports it made.
+    """
+
+    reports = []
+
+    def load(*args, **kwargs):
+        progress = kwargs['progress']
+        kwargs['progress'] = lambda done, total: (
+            reports.append(done), progress(done, total))
+        return annotate_poetry.read_pronouncing_dictionary(*args, **kwargs)
+
+    start = time.perf_counter()
+    loader = dictionary_loader.DictionaryLoader(
+        load, DICTIONARY, use_cache=use_cache, guess_missing=True).start()
+    started = time.perf_counter() - start
+    loader.wait()
+    loaded = time.perf_counter() - start
+    return started, loaded, len(reports)
+
+
+if __name__ == '__main__':
+    import annotate_poetry
+    import dictionary_loader
+
+    print('import annotate_poetry:    {:8.1f} ms'.format(time_import() * 1000))
+    for use_cache in [False, True]:
+        started, loaded, reports = time_load(use_cache)
+        print('{:26s} start {:6.2f} ms  loaded {:8.1f} ms  {:3d} '
+              'progress reports'.format(
+                  'load (cache)' if use_cache else 'load (parse)',
+                  started * 1000, loaded * 1000, reports))
@@ -0,0 +1,144 @@
+"""
+Time re-annotating the poem window after editing one line, with the full
+annotation (clear the window, redisplay every line, annotate all of them)
+and with the incremental one (annotate_stress_and_rhyme_scheme with a line
+cache), on the rondeau.
+
+The window's StringVars are real Tk variables on a Tcl interpreter, which
+needs no display; the Entry widgets, which do, are replaced by PoemLine
+objects with the same get, insert and delete methods.
+
+Run from anywhere:
+    python benchmarks/bench_incremental.py
+"""
+
+import os
+import sys
+import time
+import tkinter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEM = 'rondeau.txt'
+EDITS = 500
+
+
+class PoemLine(object):
+    """ A stand-in for a poem line Entry, holding its text in a StringVar.
+    """
+
+    def __init__(self, interpreter):
+        """ (PoemLine, tkinter.Tcl) -> NoneType
+
+        Create an empty poem line.
+        """
+
+        self.text = tkinter.StringVar(interpreter)
+
+    def get(self):
+        """ (PoemLine) -> str
+
+        Return the text of the line.
+        """
+
+        return self.text.get()
+
+    def insert(self, index, text):
+        """ (PoemLine, int, str) -> NoneType
+
+        Insert text at index.
+        """
+
+        old = self.text.get()
+        self.text.set(old[:index] + text + old[index:])
+
+    def delete(self, first, last):
+        """ (PoemLine, int, object) -> NoneType
+
+        Delete the text from first up to last (or to the end if last is
+        tkinter.END).
+        """
+
+        old = self.text.get()
+        if last == tkinter.END:
+            last = len(old)
+        self.text.set(old[:first] + old[last:])
+
+
+def full_annotation(stress_patterns, poem_line_entries, rhyme_scheme_vars,
+                    table):
+    """ (list of StringVar, list of PoemLine, list of StringVar,
+         pronouncing table) -> NoneType
+
+    The previous annotate_stress_and_rhyme_scheme, kept here for comparison.
+    """
+
+    raw_poem = ''
+    for line in poem_line_entries:
+        raw_poem = raw_poem + line.get() + '\n'
+    annotate_poetry.clear_poem(stress_patterns, poem_line_entries,
+                               rhyme_scheme_vars)
+    annotate_poetry.display_poem_in_window(raw_poem, poem_line_entries)
+    for i in range(len(poem_line_entries)):
+        annotate_poetry.annotate_stress(poem_line_entries[i],
+                                        stress_patterns[i], table)
+    annotate_poetry.set_rhyme_scheme(poem_line_entries, rhyme_scheme_vars,
+                                     table)
+
+
+def time_edits(annotate, poem_line_entries):
+    """ (function, list of PoemLine) -> float
+
+    Return the milliseconds per call of annotate() after changing the
+    second line of the poem, alternating between two versions of it.
+    """
+
+    versions = ['Between the crosses, row on row,',
+                'Between the crosses, row by row,']
+    seconds = 0.0
+    for i in range(EDITS):
+        poem_line_entries[1].delete(0, tkinter.END)
+        poem_line_entries[1].insert(0, versions[i % 2])
+        start = time.perf_counter()
+        annotate()
+        seconds += time.perf_counter() - start
+    return seconds / EDITS * 1000
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    interpreter = tkinter.Tcl()
+    stress_patterns = []
+    poem_line_entries = []
+    rhyme_scheme_vars = []
+    for i in range(annotate_poetry.MAX_LINES_IN_POEM):
+        stress_patterns.append(tkinter.StringVar(interpreter))
+        poem_line_entries.append(PoemLine(interpreter))
+        rhyme_scheme_vars.append(tkinter.StringVar(interpreter))
+    poem_file = open(os.path.join(ROOT, POEM), 'r')
+    annotate_poetry.display_poem_in_window(poem_file.read(),
+                                           poem_line_entries)
+    poem_file.close()
+
+    full = time_edits(lambda: full_annotation(
+        stress_patterns, poem_line_entries, rhyme_scheme_vars, table),
+                      poem_line_entries)
+    full_patterns = [pattern.get() for pattern in stress_patterns]
+    full_scheme = [marker.get() for marker in rhyme_scheme_vars]
+
+    line_cache = {}
+    incremental = time_edits(lambda: (
+        annotate_poetry.annotate_stress_and_rhyme_scheme(
+            stress_patterns, poem_line_entries, rhyme_scheme_vars, table,
+            line_cache)), poem_line_entries)
+    assert [pattern.get() for pattern in stress_patterns] == full_patterns
+    assert [marker.get() for marker in rhyme_scheme_vars] == full_scheme
+
+    print('full annotation:           {:10.3f} ms per edit'.format(full))
+    print('incremental annotation:    {:10.3f} ms per edit'.format(
+        incremental))
+    print('lines remembered:          {:10d}'.format(len(line_cache)))
@@ -0,0 +1,76 @@
+"""
+Measure what instrumentation costs: annotate the bundled sample poems many
+times with it disabled, enabled for every call, and enabled with sampling,
+then print the stage report of the sampled run.
+
+Run from anywhere:
+    python benchmarks/bench_instrumentation.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import instrumentation
+import poem_annotation
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEMS = ['petrarchan_sonnet.txt', 'limerick1.txt', 'limerick2.txt',
+         'alt_sonnet.txt', 'cat_verse.txt', 'rondeau.txt', 'quintain.txt',
+         'haiku.txt']
+ROUNDS = 300
+SAMPLE_EVERY = 100
+
+
+def read_poems():
+    """ () -> list of str
+
+    Return the bundled sample poems.
+    """
+
+    poems = []
+    for name in POEMS:
+        poem_file = open(os.path.join(ROOT, name), 'r')
+        poems.append(poem_file.read())
+        poem_file.close()
+    return poems
+
+
+def time_rounds(poems, table):
+    """ (list of str, pronouncing table) -> float
+
+    Return the seconds taken to annotate poems ROUNDS times.
+    """
+
+    start = time.perf_counter()
+    for i in range(ROUNDS):
+        for poem in poems:
+            poem_annotation.annotate_poem(poem, table)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    poems = read_poems()
+    time_rounds(poems, table)
+
+    disabled = time_rounds(poems, table)
+    instrumentation.enable()
+    every_call = time_rounds(poems, table)
+    instrumentation.disable()
+    instrumentation.reset()
+    instrumentation.enable(sample_every=SAMPLE_EVERY)
+    sampled = time_rounds(poems, table)
+    instrumentation.disable()
+
+    count = ROUNDS * len(poems)
+    for name, seconds in [('disabled', disabled), ('every call', every_call),
+                          ('1 in {} sampled'.format(SAMPLE_EVERY), sampled)]:
+        print('{:18s} {:8.1f} us/poem  overhead {:+6.1%}'.format(
+            name, seconds * 1e6 / count, seconds / disabled - 1))
+    print()
+    print(instrumentation.format_report())
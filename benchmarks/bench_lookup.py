@@ -0,0 +1,52 @@
+"""
+Time look_up_pronunciation per word against the full pronouncing dictionary,
+for a plain nested list table (linear scan) and for a PronouncingTable
+(dict index).
+
+Run from anywhere:
+    python benchmarks/bench_lookup.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import stress_and_rhyme_functions as student
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEM = os.path.join(ROOT, 'remember.txt')
+
+
+def time_per_word(words, pronouncing_table, repeat):
+    """ (list of str, pronouncing table, int) -> float
+
+    Return the mean number of seconds taken to look up one word of words in
+    pronouncing_table, looking up every word repeat times.
+    """
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        for word in words:
+            student.look_up_pronunciation(word, pronouncing_table)
+    return (time.perf_counter() - start) / (repeat * len(words))
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    plain_table = [list(table[0]), list(table[1])]
+
+    poem_file = open(POEM, 'r')
+    words = poem_file.read().split()
+    poem_file.close()
+
+    print('dictionary entries:', len(table[0]))
+    print('words looked up:   ', len(words))
+    linear = time_per_word(words, plain_table, 1)
+    indexed = time_per_word(words, table, 1000)
+    print('linear scan:  {:10.2f} us/word'.format(linear * 1e6))
+    print('dict index:   {:10.2f} us/word'.format(indexed * 1e6))
+    print('speedup:      {:10.0f}x'.format(linear / indexed))
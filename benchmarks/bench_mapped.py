@@ -0,0 +1,79 @@
+"""
+Compare the memory a worker process uses for a list-backed pronouncing table
+and for a memory-mapped one, after looking up every word of a sample poem.
+
+Private (anonymous) resident memory is what each worker pays for itself;
+file-backed resident memory of the mapped table is shared by every process
+that maps the same index file.  Linux only, since the numbers come from
+/proc/self/status.
+
+Run from anywhere:
+    python benchmarks/bench_mapped.py
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEM = os.path.join(ROOT, 'remember.txt')
+
+# Run in the child process: print the change in private and file-backed
+# resident kB caused by loading the table and looking up the poem's words.
+CHILD = """
+import sys, time
+sys.path.insert(0, {root!r})
+import annotate_poetry
+import stress_and_rhyme_functions as student
+
+def resident():
+    status = {{}}
+    for line in open('/proc/self/status'):
+        name, value = line.split(':', 1)
+        status[name] = (value.split() + ['0'])[0]
+    return int(status['RssAnon']), int(status['RssFile'])
+
+words = open({poem!r}).read().split()
+before = resident()
+start = time.perf_counter()
+table = annotate_poetry.read_pronouncing_dictionary({filename!r},
+                                                    mapped={mapped})
+for word in words:
+    student.look_up_pronunciation(word, table)
+seconds = time.perf_counter() - start
+after = resident()
+print(after[0] - before[0], after[1] - before[1], seconds)
+"""
+
+
+def measure(mapped):
+    """ (bool) -> tuple of (int, int, float)
+
+    Return the private kB, file-backed kB and seconds a new process needs to
+    open the table and look up the sample poem.
+    """
+
+    code = CHILD.format(root=ROOT, poem=POEM, filename=DICTIONARY,
+                        mapped=mapped)
+    output = subprocess.check_output([sys.executable, '-c', code])
+    private, shared, seconds = output.split()
+    return int(private), int(shared), float(seconds)
+
+
+if __name__ == '__main__':
+    # Build the cache and the index file first so neither run pays for it.
+    annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY,
+                                                        mapped=True)
+    table.close()
+
+    for label, mapped in [('list table (cache)', False),
+                          ('memory-mapped table', True)]:
+        private, shared, seconds = measure(mapped)
+        print('{:<22}{:9.1f} MB private {:7.1f} MB shared {:8.1f} ms'.format(
+            label, private / 1024, shared / 1024, seconds * 1000))
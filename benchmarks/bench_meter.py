@@ -0,0 +1,104 @@
+"""
+Time meter detection on the bundled sample poems and on a corpus of 100,000
+lines.  Half of the corpus is copies of the sample poems; the other half is
+lines of random dictionary words, so that most of their stress sequences
+are distinct.  The corpus is scored line by line with scan_stress (pure
+Python) and all at once with scan_stresses (NumPy, when installed).
+
+Run from anywhere:
+    python benchmarks/bench_meter.py
+"""
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import meter
+import stress_and_rhyme_functions as student
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEMS = ['petrarchan_sonnet.txt', 'limerick1.txt', 'limerick2.txt',
+         'alt_sonnet.txt', 'cat_verse.txt', 'rondeau.txt', 'quintain.txt',
+         'haiku.txt']
+LINES = 100000
+
+
+def read_poem_lines(name):
+    """ (str) -> list of str
+
+    Return the lines of the sample poem in the file name.
+    """
+
+    poem_file = open(os.path.join(ROOT, name), 'r')
+    poem_lines = student.convert_to_lines(poem_file.read())
+    poem_file.close()
+    return poem_lines
+
+
+def make_random_lines(table, count):
+    """ (pronouncing table, int) -> list of str
+
+    Return count lines of 4 to 10 random words from table.
+    """
+
+    words = table[0]
+    generator = random.Random(11)
+    result = []
+    for i in range(count):
+        length = generator.randint(4, 10)
+        result.append(' '.join([words[generator.randrange(len(words))]
+                                for j in range(length)]))
+    return result
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+
+    for name in POEMS:
+        poem_lines = read_poem_lines(name)
+        meter.scan_stress.cache_clear()
+        meter.scan_stress_all.cache_clear()
+        start = time.perf_counter()
+        name_found, deviations = meter.detect_meter(poem_lines, table)
+        seconds = time.perf_counter() - start
+        scored = [d for d in deviations if d is not None]
+        print('{:24s} {:26s} mean deviation {:5.2f} {:8.2f} ms'.format(
+            name, name_found, sum(scored) / max(len(scored), 1),
+            seconds * 1000))
+
+    sample_lines = []
+    for name in POEMS:
+        sample_lines.extend(read_poem_lines(name))
+    corpus = sample_lines * (LINES // 2 // len(sample_lines) + 1)
+    corpus = corpus[:LINES // 2] + make_random_lines(table, LINES // 2)
+
+    start = time.perf_counter()
+    stresses = [meter.get_line_stress(line, table) for line in corpus]
+    stress_seconds = time.perf_counter() - start
+
+    meter.scan_stress.cache_clear()
+    meter.scan_stress_all.cache_clear()
+    start = time.perf_counter()
+    for stress in stresses:
+        meter.scan_stress(stress)
+    scan_seconds = time.perf_counter() - start
+    distinct = meter.scan_stress_all.cache_info().misses
+
+    start = time.perf_counter()
+    all_scans = meter.scan_stresses(stresses)
+    batch_seconds = time.perf_counter() - start
+    assert all_scans[-1] == meter.scan_stress_all(stresses[-1])
+
+    print('corpus lines:              {:10d}'.format(len(corpus)))
+    print('distinct stress sequences: {:10d}'.format(distinct))
+    print('line stress lookup:        {:10.2f} s'.format(stress_seconds))
+    print('scan_stress, line by line: {:10.2f} s'.format(scan_seconds))
+    print('scan_stresses (NumPy: {}):{:10.2f} s'.format(
+        'yes' if meter.numpy is not None else 'no ', batch_seconds))
+    print('lines per second:          {:10.0f}'.format(
+        len(corpus) / (stress_seconds + batch_seconds)))
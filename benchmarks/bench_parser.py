@@ -0,0 +1,74 @@
+"""
+Compare parsing our_dictionary.txt with every line in memory at once (the
+lines read into a list, then make_pronouncing_table) with the streaming
+parser in dictionary_parser.  Each is run in a fresh interpreter so that
+its peak resident set size (ru_maxrss) is its own; the traced peak from
+tracemalloc and the parse time are reported too.
+
+Run from anywhere:
+    python benchmarks/bench_parser.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DICTIONARY = os.path.join(ROOT, 'our_dictionary.txt')
+REPEATS = 3
+
+# Run in a fresh interpreter: parse DICTIONARY with method and print the
+# results as JSON.
+CHILD = '''
+import json, resource, sys, time, tracemalloc
+sys.path.insert(0, {root!r})
+import dictionary_parser
+import stress_and_rhyme_functions as student
+
+def parse_lines(filename):
+    dictionary_file = open(filename, 'r')
+    lines = [line for line in dictionary_file if not line.startswith(';;;')]
+    dictionary_file.close()
+    return student.make_pronouncing_table(lines)
+
+parse = {{'lines': parse_lines,
+          'streaming': dictionary_parser.read_pronouncing_table}}[{method!r}]
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+table = parse({filename!r})
+seconds = time.perf_counter() - start
+peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+del table
+tracemalloc.start()
+table = parse({filename!r})
+traced_peak = tracemalloc.get_traced_memory()[1]
+print(json.dumps({{'seconds': seconds, 'entries': len(table[0]),
+                  'rss_kib': peak_rss - baseline,
+                  'traced_peak': traced_peak}}))
+'''
+
+
+def run(method):
+    """ (str) -> dict
+
+    Return the fastest of REPEATS fresh runs of the parse method method.
+    """
+
+    best = None
+    for i in range(REPEATS):
+        code = CHILD.format(root=ROOT, method=method, filename=DICTIONARY)
+        result = json.loads(subprocess.check_output([sys.executable, '-c',
+                                                     code]))
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+
+if __name__ == '__main__':
+    for method in ['lines', 'streaming']:
+        result = run(method)
+        print('{:10s} {:7d} entries {:8.3f} s  peak RSS +{:7.1f} MiB  '
+              'traced peak {:7.1f} MiB'.format(
+                  method, result['entries'], result['seconds'],
+                  result['rss_kib'] / 1024, result['traced_peak'] / 2 ** 20))
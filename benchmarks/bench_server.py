@@ -0,0 +1,181 @@
+"""
+Load-test the annotation server on localhost.  The server is started on a
+free port in this process, on the same event loop as the clients, with the
+dictionary read once.  CLIENTS connections then send requests over
+keep-alive for each workload in turn, and the latency of every request is
+measured by its client.  The p50, p99 and throughput of each workload are
+reported, followed by the server's own /stats histograms.
+
+Run from anywhere:
+    python benchmarks/bench_server.py
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import annotation_server
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEMS = ['petrarchan_sonnet.txt', 'limerick1.txt', 'limerick2.txt',
+         'alt_sonnet.txt', 'cat_verse.txt', 'rondeau.txt', 'quintain.txt',
+         'haiku.txt']
+CLIENTS = 8
+REQUESTS = 4000
+BATCH_SIZE = 50
+
+
+def read_poems():
+    """ () -> list of str
+
+    Return the bundled sample poems.
+    """
+
+    poems = []
+    for name in POEMS:
+        poem_file = open(os.path.join(ROOT, name), 'r')
+        poems.append(poem_file.read())
+        poem_file.close()
+    return poems
+
+
+def make_request(method, target, params=None):
+    """ (str, str, dict) -> bytes
+
+    Return the bytes of an HTTP/1.1 keep-alive request, with params as its
+    JSON body if given.
+    """
+
+    body = b''
+    if params is not None:
+        body = json.dumps(params).encode('utf-8')
+    head = '{} {} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {}\r\n\r\n'
+    return head.format(method, target, len(body)).encode('latin-1') + body
+
+
+async def send(reader, writer, request):
+    """ (asyncio.StreamReader, asyncio.StreamWriter, bytes) -> dict
+
+    Send request and return the JSON answer.
+    """
+
+    writer.write(request)
+    status_line = await reader.readline()
+    length = 0
+    line = await reader.readline()
+    while line != b'\r\n':
+        name, colon, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        line = await reader.readline()
+    body = await reader.readexactly(length)
+    if b' 200 ' not in status_line:
+        raise ValueError(status_line + body)
+    return json.loads(body.decode('utf-8'))
+
+
+async def run_client(port, requests, latencies):
+    """ (int, list of bytes, list of float) -> NoneType
+
+    Send requests one after another over one connection, appending the
+    seconds each takes to latencies.
+    """
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for request in requests:
+        start = time.perf_counter()
+        await send(reader, writer, request)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_workload(port, name, requests, items):
+    """ (int, str, list of bytes, int) -> NoneType
+
+    Send requests shared among CLIENTS clients and report their latencies,
+    where each request asks about items words or poems.
+    """
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[run_client(port, requests[i::CLIENTS], latencies)
+                           for i in range(CLIENTS)])
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    print('{:26s} p50 {:7.3f} ms  p99 {:7.3f} ms  {:8.0f} req/s '
+          '{:9.0f} items/s'.format(
+              name, latencies[len(latencies) // 2] * 1000,
+              latencies[int(len(latencies) * 0.99)] * 1000,
+              len(requests) / seconds, len(requests) * items / seconds))
+
+
+async def main():
+    """ () -> NoneType
+
+    Start the server and run every workload against it.
+    """
+
+    start = time.perf_counter()
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    print('dictionary loaded once in {:.2f} s'.format(
+        time.perf_counter() - start))
+    service = annotation_server.AnnotationService(table)
+    server = await annotation_server.start_server(service, port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    generator = random.Random(17)
+    words = [table[0][generator.randrange(len(table[0]))]
+             for i in range(REQUESTS * 2)]
+    poems = read_poems()
+
+    await run_workload(port, 'GET /pronunciation', [
+        make_request('GET', '/pronunciation?word=' + word)
+        for word in words[:REQUESTS]], 1)
+    await run_workload(port, 'GET /stress', [
+        make_request('GET', '/stress?word=' + word)
+        for word in words[:REQUESTS]], 1)
+    await run_workload(port, 'POST /stress, batched', [
+        make_request('POST', '/stress',
+                     {'words': words[i:i + BATCH_SIZE]})
+        for i in range(0, len(words), BATCH_SIZE)], BATCH_SIZE)
+    await run_workload(port, 'POST /rhyme-scheme', [
+        make_request('POST', '/rhyme-scheme', {'poem': poems[i % len(poems)]})
+        for i in range(REQUESTS // 4)], 1)
+    await run_workload(port, 'POST /annotate', [
+        make_request('POST', '/annotate', {'poem': poems[i % len(poems)]})
+        for i in range(REQUESTS // 4)], 1)
+    await run_workload(port, 'POST /batch (mixed)', [
+        make_request('POST', '/batch', {'requests': [
+            {'endpoint': 'stress', 'words': words[i:i + 10]},
+            {'endpoint': 'pronunciation', 'words': words[i:i + 10]},
+            {'endpoint': 'annotate', 'poem': poems[i % len(poems)]}]})
+        for i in range(REQUESTS // 4)], 1)
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    stats = await send(reader, writer, make_request('GET', '/stats'))
+    writer.close()
+    await writer.wait_closed()
+    # Let the server see the last connection close before it is shut down.
+    await asyncio.sleep(0.01)
+    print('server-side histograms (bucket upper bounds, ms):')
+    for path in sorted(stats['endpoints']):
+        endpoint = stats['endpoints'][path]
+        if endpoint['count'] > 0:
+            print('  {:16s} {:6d} requests  mean {:7.3f} ms  p50 <= {}  '
+                  'p99 <= {}'.format(path, endpoint['count'],
+                                     endpoint['mean_ms'], endpoint['p50_ms'],
+                                     endpoint['p99_ms']))
+    server.close()
+    await server.wait_closed()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
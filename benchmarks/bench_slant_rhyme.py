@@ -0,0 +1,113 @@
+"""
+Time slant rhyme queries on the BK-trees over the rhyme keys of
+our_dictionary.txt at a few distances, against computing the distance to
+every rhyme key, and count the distances each query computes.
+
+Run from anywhere:
+    python benchmarks/bench_slant_rhyme.py
+"""
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import slant_rhyme
+import stress_and_rhyme_functions as student
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+QUERIES = 1000
+SCAN_QUERIES = 50
+DISTANCES = [0.25, 0.5, 1.0]
+WORD_QUERIES = 1000
+
+
+def time_queries(find, keys, distance):
+    """ (function, list of bytes, float) -> tuple of (float, float)
+
+    Return the mean microseconds taken by find(key, distance) for each key
+    in keys, and the mean number of keys it found.
+    """
+
+    found = 0
+    start = time.perf_counter()
+    for key in keys:
+        found += len(find(key, distance))
+    seconds = time.perf_counter() - start
+    return seconds * 1e6 / len(keys), found / len(keys)
+
+
+def count_distances(index, keys, distance):
+    """ (SlantRhymeIndex, list of bytes, float) -> float
+
+    Return the mean number of distances computed by index.find_keys(key,
+    distance) for each key in keys.
+    """
+
+    original = slant_rhyme._get_units
+    counted = [0]
+
+    def counting(codes1, codes2, limit=None):
+        counted[0] += 1
+        return original(codes1, codes2, limit)
+
+    slant_rhyme._get_units = counting
+    try:
+        for key in keys:
+            index.find_keys(key, distance)
+    finally:
+        slant_rhyme._get_units = original
+    return counted[0] / len(keys)
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+
+    start = time.perf_counter()
+    index = slant_rhyme.get_slant_rhyme_index(table)
+    build_seconds = time.perf_counter() - start
+    all_keys = sorted(set(key for key in table.rhyme_keys if key is not None))
+
+    def scan(rhyme_key, distance):
+        return [key for key in all_keys
+                if slant_rhyme.get_distance(rhyme_key, key) <= distance]
+
+    generator = random.Random(22)
+    keys = [all_keys[generator.randrange(len(all_keys))]
+            for i in range(QUERIES)]
+    print('rhyme keys indexed: {:8d} in {} trees (of {} entries)'.format(
+        len(index), len(index.trees), len(table[0])))
+    print('build:              {:8.1f} ms'.format(build_seconds * 1000))
+    for distance in DISTANCES:
+        query_us, found = time_queries(index.find_keys, keys, distance)
+        scan_us = time_queries(scan, keys[:SCAN_QUERIES], distance)[0]
+        print('distance {:4.2f}: {:8.1f} us/query, {:6.1f} keys found, '
+              '{:6.0f} distances computed (scan {:8.0f} us)'.format(
+                  distance, query_us, found,
+                  count_distances(index, keys, distance), scan_us))
+
+    words = table[0]
+    sample = [words[generator.randrange(len(words))]
+              for i in range(WORD_QUERIES)]
+    start = time.perf_counter()
+    for word in sample:
+        slant_rhyme.find_slant_rhymes(word, table)
+    print('find_slant_rhymes:  {:8.1f} us/word (k={})'.format(
+        (time.perf_counter() - start) * 1e6 / len(sample), slant_rhyme.TOP_K))
+    slant_rhymes = [word for distance, word in slant_rhyme.find_slant_rhymes(
+        'night', table, k=1000) if distance > 0]
+    print('slant (not perfect) rhymes of NIGHT: ' +
+          ', '.join(slant_rhymes[:10]))
+
+    lines = [' '.join(words[generator.randrange(len(words))]
+                      for j in range(6)) for i in range(10000)]
+    for near in [False, True]:
+        start = time.perf_counter()
+        scheme = student.detect_rhyme_scheme(lines, table, near)
+        print('detect_rhyme_scheme near={!s:5}: {:8.1f} ms for {} lines, '
+              '{} letters'.format(near, (time.perf_counter() - start) * 1000,
+                                  len(lines), len(set(scheme))))
@@ -0,0 +1,86 @@
+"""
+Time finding the sound patterns of poems of growing length, built from the
+sample poems and from random dictionary words, to check that the time per
+line stays flat as poems grow.  The first run on each poem finds the
+sounds of its words; later runs use the sounds remembered for the table's
+rows.
+
+Run from anywhere:
+    python benchmarks/bench_sound_patterns.py
+"""
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import sound_patterns
+import stress_and_rhyme_functions as student
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEMS = ['petrarchan_sonnet.txt', 'limerick1.txt', 'alt_sonnet.txt',
+         'cat_verse.txt', 'rondeau.txt', 'longPoem.txt']
+LENGTHS = [1000, 10000, 100000]
+REPEATS = 3
+
+
+def read_sample_lines():
+    """ () -> list of str
+
+    Return the lines of the sample poems.
+    """
+
+    lines = []
+    for name in POEMS:
+        poem_file = open(os.path.join(ROOT, name), 'r')
+        lines.extend(student.convert_to_lines(poem_file.read()))
+        poem_file.close()
+    return lines
+
+
+def time_find(poem_lines, table):
+    """ (list of str, pronouncing table) -> tuple of (float, float, int)
+
+    Return the seconds taken by the first and the fastest later run of
+    find_sound_patterns on poem_lines, and the number of spans found.
+    """
+
+    table.derived.pop(sound_patterns.ROW_SOUNDS, None)
+    start = time.perf_counter()
+    spans = sound_patterns.find_sound_patterns(poem_lines, table)
+    first = time.perf_counter() - start
+    best = None
+    for i in range(REPEATS):
+        start = time.perf_counter()
+        sound_patterns.find_sound_patterns(poem_lines, table)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return first, best, len(spans)
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    sample = read_sample_lines()
+    generator = random.Random(23)
+    words = table[0]
+
+    print('{:8s} {:>8s} {:>12s} {:>12s} {:>12s} {:>10s}'.format(
+        'poem', 'lines', 'first ms', 'warm ms', 'warm us/line', 'spans'))
+    for length in LENGTHS:
+        random_lines = []
+        for i in range(length):
+            random_lines.append(' '.join(
+                [words[generator.randrange(len(words))]
+                 for j in range(generator.randint(4, 9))]))
+        poems = [('sample', (sample * (length // len(sample) + 1))[:length]),
+                 ('random', random_lines)]
+        for name, poem_lines in poems:
+            first, warm, spans = time_find(poem_lines, table)
+            print('{:8s} {:8d} {:12.1f} {:12.1f} {:12.2f} {:10d}'.format(
+                name, length, first * 1000, warm * 1000, warm * 1e6 / length,
+                spans))
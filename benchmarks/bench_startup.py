@@ -0,0 +1,79 @@
+"""
+Report cold start (parse the text dictionary and write the cache), warm start
+(load the cache) and peak memory of read_pronouncing_dictionary.
+
+Each measurement runs in a fresh Python process on a temporary copy of the
+dictionary, so the cache next to the real dictionary is left alone.
+
+Run from anywhere:
+    python benchmarks/bench_startup.py
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+
+# Run in the child process: load the dictionary, print seconds and peak
+# resident set size in kB.  Tracing memory slows loading down a lot, so the
+# peak traced bytes come from a second load with tracemalloc running.
+CHILD = """
+import resource, sys, time, tracemalloc
+sys.path.insert(0, {root!r})
+import annotate_poetry
+start = time.perf_counter()
+table = annotate_poetry.read_pronouncing_dictionary({filename!r}, {use_cache})
+seconds = time.perf_counter() - start
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+del table
+tracemalloc.start()
+table = annotate_poetry.read_pronouncing_dictionary({filename!r}, {use_cache})
+print(seconds, tracemalloc.get_traced_memory()[1], max_rss)
+"""
+
+
+def measure(filename, use_cache):
+    """ (str, bool) -> tuple of (float, int, int)
+
+    Return the seconds taken, peak traced bytes and peak resident kB of
+    reading filename in a new process.
+    """
+
+    code = CHILD.format(root=ROOT, filename=filename, use_cache=use_cache)
+    output = subprocess.check_output([sys.executable, '-c', code])
+    seconds, peak, max_rss = output.split()
+    return float(seconds), int(peak), int(max_rss)
+
+
+def show(label, result):
+    """ (str, tuple of (float, int, int)) -> NoneType
+
+    Print one line of the report.
+    """
+
+    seconds, peak, max_rss = result
+    print('{:<28}{:8.1f} ms {:8.1f} MB traced {:8.1f} MB rss'.format(
+        label, seconds * 1000, peak / 2 ** 20, max_rss / 2 ** 10))
+
+
+if __name__ == '__main__':
+    folder = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(folder, os.path.basename(DICTIONARY))
+        shutil.copy(DICTIONARY, filename)
+
+        show('no cache (parse only)', measure(filename, False))
+        show('cold (parse, write cache)', measure(filename, True))
+        # The second load of the cold run already used the cache, so only the
+        # first load of each process counts towards the times above.
+        show('warm (load cache)', measure(filename, True))
+    finally:
+        shutil.rmtree(folder)
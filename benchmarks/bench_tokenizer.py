@@ -0,0 +1,95 @@
+"""
+Time the shared tokenizer on the lines of the sample poems against the old
+way of splitting a line, preparing each word and searching the line for it,
+and count how many times annotate_poem prepares each token.
+
+Run from anywhere:
+    python benchmarks/bench_tokenizer.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import poem_annotation
+import stress_and_rhyme_functions as student
+import tokenizer
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEMS = ['petrarchan_sonnet.txt', 'limerick1.txt', 'limerick2.txt',
+         'alt_sonnet.txt', 'cat_verse.txt', 'rondeau.txt', 'quintain.txt',
+         'haiku.txt', 'longPoem.txt']
+LINES = 100000
+
+
+def split_and_search(poem_line):
+    """ (str) -> list of tuple of (str, str, int, int)
+
+    Return the tokens of poem_line the old way: split it, prepare each word
+    and search the line for where it is.
+    """
+
+    tokens = []
+    end = 0
+    for word in poem_line.split():
+        start = poem_line.index(word, end)
+        end = start + len(word)
+        tokens.append((word, student.prepare_word(word), start, end))
+    return tokens
+
+
+def time_lines(function, poem_lines):
+    """ (function, list of str) -> float
+
+    Return the mean microseconds taken by function for each of poem_lines.
+    """
+
+    start = time.perf_counter()
+    for poem_line in poem_lines:
+        function(poem_line)
+    return (time.perf_counter() - start) * 1e6 / len(poem_lines)
+
+
+if __name__ == '__main__':
+    poems = []
+    sample = []
+    for name in POEMS:
+        poem_file = open(os.path.join(ROOT, name), 'r')
+        poems.append(poem_file.read())
+        poem_file.close()
+        sample.extend(student.convert_to_lines(poems[-1]))
+    poem_lines = (sample * (LINES // len(sample) + 1))[:LINES]
+
+    print('lines:              {:10d}'.format(len(poem_lines)))
+    print('split and search:   {:10.2f} us/line'.format(
+        time_lines(split_and_search, poem_lines)))
+    print('tokenize:           {:10.2f} us/line'.format(
+        time_lines(tokenizer.tokenize, poem_lines)))
+    print('last key only:      {:10.2f} us/line'.format(
+        time_lines(tokenizer.get_line_last_key, poem_lines)))
+
+    # Count the calls to prepare_word while annotating the sample poems.
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    tokens = 0
+    for poem in poems:
+        for poem_line in student.convert_to_lines(poem):
+            tokens += len(tokenizer.tokenize(poem_line))
+    original = student.prepare_word
+    calls = [0]
+
+    def counting(s):
+        calls[0] += 1
+        return original(s)
+
+    student.prepare_word = counting
+    try:
+        for poem in poems:
+            poem_annotation.annotate_poem(poem, table)
+    finally:
+        student.prepare_word = original
+    print('annotate_poem:      {:10d} tokens, {} prepare_word calls '
+          '({:.2f} per token)'.format(tokens, calls[0], calls[0] / tokens))
@@ -0,0 +1,113 @@
+"""
+Measure what alternate pronunciations cost: build the table from our
+dictionary, and again with an alternate pronunciation (WORD(1)) added after
+every twentieth word, as the full CMU Pronouncing Dictionary has for about
+one word in fifteen.  Report the memory of each table and the time to look
+up words and to detect the rhyme scheme of the sample poems.
+
+Run from anywhere:
+    python benchmarks/bench_variants.py
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import stress_and_rhyme_functions as student
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEMS = ['petrarchan_sonnet.txt', 'limerick1.txt', 'rondeau.txt',
+         'cat_verse.txt', 'longPoem.txt']
+VARIANT_EVERY = 20
+ROUNDS = 200
+
+
+def read_lines():
+    """ () -> list of str
+
+    Return the entry lines of our dictionary.
+    """
+
+    dictionary_file = open(DICTIONARY, 'r')
+    lines = [line for line in dictionary_file if not line.startswith(';;;')]
+    dictionary_file.close()
+    return lines
+
+
+def add_variants(lines):
+    """ (list of str) -> list of str
+
+    Return lines with an alternate pronunciation after every VARIANT_EVERY
+    entries: the same phonemes with the stress digits reversed.
+    """
+
+    result = []
+    for i in range(len(lines)):
+        result.append(lines[i])
+        if i % VARIANT_EVERY == 0:
+            word = student.get_word(lines[i])
+            phonemes = student.get_pronunciation(lines[i])
+            digits = [phoneme[-1] for phoneme in phonemes
+                      if phoneme[-1].isdigit()]
+            digits.reverse()
+            variant = []
+            for phoneme in phonemes:
+                if phoneme[-1].isdigit():
+                    phoneme = phoneme[:-1] + digits.pop(0)
+                variant.append(phoneme)
+            result.append(word + '(1)  ' + ' '.join(variant) + '\n')
+    return result
+
+
+def measure(lines):
+    """ (list of str) -> tuple of (PronouncingTable, int)
+
+    Return the table made from lines and the bytes allocated to build it.
+    """
+
+    tracemalloc.start()
+    table = student.make_pronouncing_table(lines)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return table, size
+
+
+def time_poems(table, poems):
+    """ (PronouncingTable, list of list of str) -> float
+
+    Return the microseconds per poem to detect the rhyme schemes of poems.
+    """
+
+    start = time.perf_counter()
+    for i in range(ROUNDS):
+        for poem_lines in poems:
+            student.detect_rhyme_scheme(poem_lines, table)
+    return (time.perf_counter() - start) / ROUNDS / len(poems) * 1e6
+
+
+if __name__ == '__main__':
+    lines = read_lines()
+    poems = []
+    for name in POEMS:
+        poem_file = open(os.path.join(ROOT, name), 'r')
+        poems.append(student.convert_to_lines(poem_file.read()))
+        poem_file.close()
+
+    single, single_size = measure(lines)
+    multiple, multiple_size = measure(add_variants(lines))
+    print('entries:            {:10d} {:10d}'.format(len(single[0]),
+                                                  len(multiple[0])))
+    print('words with variants:{:10d} {:10d}'.format(
+        len(single.variant_ends), len(multiple.variant_ends)))
+    print('table memory (MB):  {:10.1f} {:10.1f}'.format(
+        single_size / 2 ** 20, multiple_size / 2 ** 20))
+    print('bytes per variant:  {:>10s} {:10.0f}'.format(
+        '', (multiple_size - single_size) /
+        (len(multiple[0]) - len(single[0]))))
+    print('rhyme scheme (us):  {:10.1f} {:10.1f}'.format(
+        time_poems(single, poems), time_poems(multiple, poems)))
@@ -0,0 +1,76 @@
+"""
+Time prefix and suffix queries on the word search index over
+our_dictionary.txt, against a linear scan of the words, and report the
+memory the index adds to the table.
+
+Run from anywhere:
+    python benchmarks/bench_word_search.py
+"""
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import word_search
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+QUERIES = 2000
+SCAN_QUERIES = 20
+K = 10
+
+
+def time_queries(find, starts):
+    """ (function, list of str) -> float
+
+    Return the mean microseconds taken by find(start, K) for each start in
+    starts.
+    """
+
+    start_time = time.perf_counter()
+    for start in starts:
+        find(start, K)
+    return (time.perf_counter() - start_time) * 1e6 / len(starts)
+
+
+if __name__ == '__main__':
+    table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+    words = table[0]
+
+    start = time.perf_counter()
+    index = word_search.get_word_search(table)
+    build_seconds = time.perf_counter() - start
+
+    generator = random.Random(21)
+    sample = [words[generator.randrange(len(words))] for i in range(QUERIES)]
+    prefixes = [word[:generator.randint(1, 4)] for word in sample]
+    suffixes = [word[-generator.randint(2, 4):] for word in sample]
+
+    def scan_prefix(prefix, k):
+        return [word for word in words if word.startswith(prefix)][:k]
+
+    def scan_suffix(suffix, k):
+        return [word for word in words if word.endswith(suffix)][:k]
+
+    report = index.get_memory_report()
+    print('words indexed:        {:10d}'.format(report['words_indexed']))
+    print('build:                {:10.1f} ms'.format(build_seconds * 1000))
+    print('index memory:         {:10.1f} KiB ({:.1%} of the table\'s words, '
+          '{:.1f} KiB)'.format(report['index_bytes'] / 1024,
+                               report['index_bytes'] /
+                               report['table_words_bytes'],
+                               report['table_words_bytes'] / 1024))
+    print('prefix query (k={}):  {:10.2f} us  (scan {:10.0f} us)'.format(
+        K, time_queries(index.find_prefix, prefixes),
+        time_queries(scan_prefix, prefixes[:SCAN_QUERIES])))
+    print('suffix query (k={}):  {:10.2f} us  (scan {:10.0f} us)'.format(
+        K, time_queries(index.find_suffix, suffixes),
+        time_queries(scan_suffix, suffixes[:SCAN_QUERIES])))
+    print('prefix count:         {:10.2f} us'.format(time_queries(
+        lambda prefix, k: index.count_prefix(prefix), prefixes)))
+    print('words ending in IGHT: {:10d}, first {}: {}'.format(
+        index.count_suffix('IGHT'), K, ', '.join(index.find_suffix('IGHT'))))
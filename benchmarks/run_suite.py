@@ -0,0 +1,329 @@
+"""
+The benchmark suite: time the dictionary path and the annotation pipeline
+on fixed inputs, and compare runs.
+
+Each case is run REPEATS times (after one warm-up run) and its fastest and
+median times are kept, then run once more under tracemalloc for its memory
+high-water mark: the peak bytes allocated during the run, above what was
+allocated before it.  Inputs are built from the bundled files and a seeded
+random generator, so every run times the same work.
+
+The results can be saved as JSON with --output, and compared against a
+saved run with --compare: a case regresses when its fastest time or its
+peak memory grows by more than --threshold (a fraction, 0.25 by default),
+and the suite then exits with status 1.
+
+Run from anywhere:
+    python benchmarks/run_suite.py [--output FILE] [--compare FILE]
+                                   [--threshold FRACTION] [--repeat N]
+                                   [--case NAME ...]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import annotate_poetry
+import annotation_cache
+import poem_annotation
+import stress_and_rhyme_functions as student
+
+DICTIONARY = os.path.join(ROOT, annotate_poetry.OUR_PRONOUNCING_DICTIONARY)
+POEMS = ['petrarchan_sonnet.txt', 'limerick1.txt', 'limerick2.txt',
+         'alt_sonnet.txt', 'cat_verse.txt', 'rondeau.txt', 'quintain.txt',
+         'haiku.txt']
+REPEATS = 5
+THRESHOLD = 0.25
+SEED = 108
+
+# The number of words looked up, and the lines in the synthetic poem and
+# the large text.
+LOOKUPS = 10000
+SYNTHETIC_LINES = 10000
+LARGE_TEXT_LINES = 100000
+
+
+def read_poems():
+    """ () -> list of str
+
+    Return the bundled sample poems.
+    """
+
+    poems = []
+    for name in POEMS:
+        poem_file = open(os.path.join(ROOT, name), 'r')
+        poems.append(poem_file.read())
+        poem_file.close()
+    return poems
+
+
+class Inputs(object):
+    """ The inputs shared by the cases, built once per run. """
+
+    def __init__(self):
+        """ (Inputs) -> NoneType
+
+        Build the inputs: the table, the sample poems, LOOKUPS random words
+        in mixed case, a SYNTHETIC_LINES line poem of random words in
+        stanzas of four lines, and a LARGE_TEXT_LINES line text.
+        """
+
+        generator = random.Random(SEED)
+        self.table = annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+        self.poems = read_poems()
+        self.poem_lines = [student.convert_to_lines(poem)
+                           for poem in self.poems]
+        words = self.table[0]
+        self.words = [words[generator.randrange(len(words))].capitalize()
+                      for i in range(LOOKUPS)]
+        lines = []
+        for i in range(SYNTHETIC_LINES):
+            if i % 4 == 0 and i > 0:
+                lines.append('')
+            lines.append(' '.join([words[generator.randrange(len(words))]
+                                   for j in range(generator.randint(4, 9))]))
+        self.synthetic_lines = lines
+        text_lines = []
+        sample_text = '\n'.join(self.poems).split('\n')
+        while len(text_lines) < LARGE_TEXT_LINES:
+            text_lines.extend(sample_text)
+        self.large_text = '\n'.join(text_lines[:LARGE_TEXT_LINES])
+        # filled with the sample poems by the warm-up run
+        self.cache = annotation_cache.AnnotationCache()
+
+
+def run_parse_dictionary(inputs):
+    """ (Inputs) -> NoneType
+
+    Parse the dictionary, without its cache.
+    """
+
+    annotate_poetry.read_pronouncing_dictionary(DICTIONARY, use_cache=False)
+
+
+def run_load_cached_dictionary(inputs):
+    """ (Inputs) -> NoneType
+
+    Load the dictionary from its cache.
+    """
+
+    annotate_poetry.read_pronouncing_dictionary(DICTIONARY)
+
+
+def run_look_up_single(inputs):
+    """ (Inputs) -> NoneType
+
+    Look up the same word LOOKUPS times.
+    """
+
+    table = inputs.table
+    for i in range(LOOKUPS):
+        student.look_up_pronunciation('Consistent', table)
+
+
+def run_look_up_batch(inputs):
+    """ (Inputs) -> NoneType
+
+    Look up the LOOKUPS random words.
+    """
+
+    table = inputs.table
+    [student.look_up_pronunciation(word, table) for word in inputs.words]
+
+
+def run_stress_pattern(inputs):
+    """ (Inputs) -> NoneType
+
+    Find the stress patterns of the LOOKUPS random words.
+    """
+
+    table = inputs.table
+    [student.get_stress_pattern(word, table) for word in inputs.words]
+
+
+def run_rhyme_short(inputs):
+    """ (Inputs) -> NoneType
+
+    Detect the rhyme schemes of the sample poems.
+    """
+
+    for poem_lines in inputs.poem_lines:
+        student.detect_rhyme_scheme(poem_lines, inputs.table)
+
+
+def run_rhyme_synthetic(inputs):
+    """ (Inputs) -> NoneType
+
+    Detect the rhyme scheme of the synthetic poem.
+    """
+
+    student.detect_rhyme_scheme(inputs.synthetic_lines, inputs.table)
+
+
+def run_convert_large(inputs):
+    """ (Inputs) -> NoneType
+
+    Split the large text into poem lines.
+    """
+
+    student.convert_to_lines(inputs.large_text)
+
+
+def run_annotate(inputs):
+    """ (Inputs) -> NoneType
+
+    Annotate the sample poems.
+    """
+
+    for poem in inputs.poems:
+        poem_annotation.annotate_poem(poem, inputs.table)
+
+
+def run_annotate_cached(inputs):
+    """ (Inputs) -> NoneType
+
+    Answer the sample poems from the annotation cache's memory tier.
+    """
+
+    for poem in inputs.poems:
+        inputs.cache.annotate(poem, inputs.table)
+
+
+# Each case: (name, function run with the Inputs, items it handles, what an
+# item is).
+CASES = [
+    ('parse_dictionary', run_parse_dictionary, 1, 'dictionary'),
+    ('load_cached_dictionary', run_load_cached_dictionary, 1, 'dictionary'),
+    ('look_up_pronunciation_single', run_look_up_single, LOOKUPS, 'lookup'),
+    ('look_up_pronunciation_batch', run_look_up_batch, LOOKUPS, 'lookup'),
+    ('get_stress_pattern', run_stress_pattern, LOOKUPS, 'word'),
+    ('detect_rhyme_scheme_short', run_rhyme_short, len(POEMS), 'poem'),
+    ('detect_rhyme_scheme_10k', run_rhyme_synthetic, SYNTHETIC_LINES, 'line'),
+    ('convert_to_lines_large', run_convert_large, LARGE_TEXT_LINES, 'line'),
+    ('annotate_poem', run_annotate, len(POEMS), 'poem'),
+    ('annotate_poem_cached', run_annotate_cached, len(POEMS), 'poem')]
+
+
+def run_case(function, items, inputs, repeats):
+    """ (function, int, Inputs, int) -> dict
+
+    Return the results of running function(inputs), which handles items
+    items, repeats times.
+    """
+
+    function(inputs)
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        function(inputs)
+        times.append(time.perf_counter() - start)
+    times.sort()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    function(inputs)
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    return {'seconds_min': times[0], 'seconds_median': times[len(times) // 2],
+            'items': items, 'us_per_item': times[0] * 1e6 / items,
+            'peak_bytes': peak}
+
+
+def compare(results, baseline, threshold):
+    """ (dict, dict, float) -> list of str
+
+    Return a description of each case in results whose fastest time or
+    peak memory is more than threshold (a fraction) above baseline's.
+    """
+
+    regressions = []
+    for name in results['cases']:
+        if name not in baseline['cases']:
+            continue
+        new = results['cases'][name]
+        old = baseline['cases'][name]
+        for key in ['seconds_min', 'peak_bytes']:
+            if old[key] > 0 and new[key] > old[key] * (1 + threshold):
+                regressions.append('{}: {} {:.4g} -> {:.4g} ({:+.0%})'.format(
+                    name, key, old[key], new[key], new[key] / old[key] - 1))
+    return regressions
+
+
+def main(arguments=None):
+    """ (list of str) -> int
+
+    Run the suite with the command line arguments arguments and return the
+    exit status: 1 if a case regressed against the --compare baseline.
+    """
+
+    parser = argparse.ArgumentParser(description='Run the benchmark suite.')
+    parser.add_argument('--output', metavar='FILE',
+                        help='save the results to FILE as JSON')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare against results saved with --output')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='regression threshold as a fraction '
+                        '(default: {})'.format(THRESHOLD))
+    parser.add_argument('--repeat', type=int, default=REPEATS,
+                        help='timed runs per case (default: {})'.format(
+                            REPEATS))
+    parser.add_argument('--case', nargs='+', metavar='NAME',
+                        help='run only the named cases')
+    options = parser.parse_args(arguments)
+
+    names = [case[0] for case in CASES]
+    for name in options.case or []:
+        if name not in names:
+            parser.error('no such case: {} (cases: {})'.format(
+                name, ', '.join(names)))
+
+    inputs = Inputs()
+    results = {'python': platform.python_version(),
+               'platform': platform.platform(),
+               'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+               'repeats': options.repeat, 'cases': {}}
+    print('{:30s} {:>10s} {:>10s} {:>12s} {:>10s}'.format(
+        'case', 'min ms', 'median ms', 'us/item', 'peak KiB'))
+    for name, function, items, unit in CASES:
+        if options.case and name not in options.case:
+            continue
+        result = run_case(function, items, inputs, options.repeat)
+        result['unit'] = unit
+        results['cases'][name] = result
+        print('{:30s} {:10.2f} {:10.2f} {:12.3f} {:10.0f}'.format(
+            name, result['seconds_min'] * 1000,
+            result['seconds_median'] * 1000, result['us_per_item'],
+            result['peak_bytes'] / 1024))
+
+    if options.output:
+        output_file = open(options.output, 'w')
+        json.dump(results, output_file, indent=2, sort_keys=True)
+        output_file.write('\n')
+        output_file.close()
+
+    if options.compare:
+        baseline_file = open(options.compare, 'r')
+        baseline = json.load(baseline_file)
+        baseline_file.close()
+        regressions = compare(results, baseline, options.threshold)
+        if regressions:
+            print('regressions past {:.0%}:'.format(options.threshold))
+            for regression in regressions:
+                print('  ' + regression)
+            return 1
+        print('no regressions past {:.0%}'.format(options.threshold))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Stress and syllable statistics for whole corpora, computed with NumPy.
+
+A corpus is first encoded once: every token becomes the row of its word in
+the pronouncing table (or -1 if the word is not there), with offsets
+marking where each line and each poem starts.  The statistics are then
+computed for every line and poem at once from per-word arrays built from
+the table's precomputed stress and syllable columns, instead of calling
+get_stress_pattern word by word.
+
+NumPy is needed for this module only; the rest of the annotator does not
+use it.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import pronouncing_table as table_index
+import stress_and_rhyme_functions as student
+import tokenizer
+
+# The name the word arrays are kept under in a table's derived indexes.
+WORD_ARRAYS = 'corpus word arrays'
+
+
+def _require_numpy():
+    """ () -> NoneType
+
+    Raise ImportError if NumPy is not installed.
+    """
+
+    if numpy is None:
+        raise ImportError('corpus_stats needs NumPy: pip install numpy')
+
+
+class EncodedCorpus(object):
+    """ The tokens of a corpus as pronouncing table rows.
+
+    tokens[line_offsets[i]:line_offsets[i + 1]] are the rows of the tokens
+    of line i, and lines poem_offsets[p] up to poem_offsets[p + 1] are the
+    lines of poem p.
+    """
+
+    def __init__(self, tokens, line_offsets, poem_offsets):
+        """ (EncodedCorpus, numpy.ndarray, numpy.ndarray,
+             numpy.ndarray) -> NoneType
+
+        Create an encoded corpus from its three arrays.
+        """
+
+        self.tokens = tokens
+        self.line_offsets = line_offsets
+        self.poem_offsets = poem_offsets
+
+
+def encode_corpus(poems, pronouncing_table):
+    """ (iterable of str, pronouncing table) -> EncodedCorpus
+
+    Return the encoded corpus for poems, looking each token up in
+    pronouncing_table.  Poem lines are found with iter_poem_lines, so blank
+    lines between stanzas are kept as lines with no tokens.
+
+    >>> corpus = encode_corpus(['Fox in socks\\n\\nA box'],
+    ...                        student.SMALL_TABLE)
+    >>> corpus.tokens.tolist()
+    [4, 5, 6, 0, 1]
+    >>> corpus.line_offsets.tolist()
+    [0, 3, 3, 5]
+    """
+
+    _require_numpy()
+    rows = []
+    line_offsets = [0]
+    poem_offsets = [0]
+    # A table's own word index is used directly when it has one.
+    word_rows = getattr(pronouncing_table, 'word_rows', None)
+    for poem in poems:
+        for line in student.iter_poem_lines(poem):
+            keys = [token[1] for token in tokenizer.iter_tokens(line)]
+            if word_rows is not None:
+                rows.extend([word_rows.get(key, -1) for key in keys])
+            else:
+                rows.extend([table_index.find_row(key, pronouncing_table)
+                             for key in keys])
+            line_offsets.append(len(rows))
+        poem_offsets.append(len(line_offsets) - 1)
+    return EncodedCorpus(numpy.array(rows, dtype=numpy.int32),
+                         numpy.array(line_offsets, dtype=numpy.int64),
+                         numpy.array(poem_offsets, dtype=numpy.int64))
+
+
+class WordArrays(object):
+    """ Per-word NumPy arrays for a pronouncing table.
+
+    Each per-word array has one extra last row for words not in the table,
+    so a token row of -1 picks it out.
+      o syllables[r]: the number of syllables of row r
+      o primaries[r]: the number of syllables with primary stress of row r
+      o pattern_ids[r]: the stress pattern of row r
+      o pattern_digits[pattern_starts[i]:pattern_starts[i + 1]]: the stress
+        digits of stress pattern i
+    """
+
+    def __init__(self, pronouncing_table):
+        """ (WordArrays, pronouncing table) -> NoneType
+
+        Build the arrays for pronouncing_table.  Tables with precomputed
+        columns only need their few distinct stress patterns expanded.
+        """
+
+        _require_numpy()
+        if hasattr(pronouncing_table, 'stress_ids'):
+            patterns = pronouncing_table.stress_patterns
+            pattern_ids = numpy.frombuffer(
+                pronouncing_table.stress_ids.tobytes(), dtype=numpy.uint32)
+        else:
+            patterns = []
+            pattern_id_of = {}
+            ids = []
+            for row in range(len(pronouncing_table[0])):
+                digits = table_index.get_row_stress_digits(
+                    row, pronouncing_table)
+                if digits not in pattern_id_of:
+                    pattern_id_of[digits] = len(patterns)
+                    patterns.append(digits)
+                ids.append(pattern_id_of[digits])
+            pattern_ids = numpy.array(ids, dtype=numpy.uint32)
+
+        # One extra, empty pattern for words not in the table.
+        patterns = list(patterns) + ['']
+        pattern_ids = numpy.append(pattern_ids, len(patterns) - 1)
+        lengths = numpy.array([len(pattern) for pattern in patterns],
+                              dtype=numpy.int64)
+        primaries = numpy.array([pattern.count('1') for pattern in patterns],
+                                dtype=numpy.int32)
+
+        self.pattern_ids = pattern_ids
+        self.pattern_starts = numpy.concatenate(([0], numpy.cumsum(lengths)))
+        self.pattern_digits = numpy.array(
+            [int(digit) for digit in ''.join(patterns)], dtype=numpy.int8)
+        self.syllables = lengths[pattern_ids].astype(numpy.int32)
+        self.primaries = primaries[pattern_ids]
+
+
+def get_word_arrays(pronouncing_table):
+    """ (pronouncing table) -> WordArrays
+
+    Return the word arrays for pronouncing_table, building them the first
+    time they are needed.
+
+    >>> get_word_arrays(student.SMALL_TABLE).syllables.tolist()
+    [1, 1, 3, 1, 1, 1, 1, 0]
+    """
+
+    return table_index.get_derived(pronouncing_table, WORD_ARRAYS,
+                                   WordArrays)
+
+
+class CorpusStress(object):
+    """ Stress and syllable statistics for an encoded corpus.
+
+      o line_syllables[i]: syllables in line i
+      o line_stressed[i]: syllables with primary stress in line i
+      o line_stress_density[i]: line_stressed[i] / line_syllables[i]
+        (0 for lines without syllables)
+      o poem_syllables[p]: syllables in poem p
+      o stresses: the stress digit of every syllable of the corpus in order
+      o syllable_offsets: stresses[syllable_offsets[i]:
+        syllable_offsets[i + 1]] is the stress vector of line i
+    """
+
+    def get_line_stresses(self, line):
+        """ (CorpusStress, int) -> numpy.ndarray
+
+        Return the stress vector of line number line.
+        """
+
+        return self.stresses[self.syllable_offsets[line]:
+                             self.syllable_offsets[line + 1]]
+
+    def get_poem_stresses(self, poem, corpus):
+        """ (CorpusStress, int, EncodedCorpus) -> numpy.ndarray
+
+        Return the stress vector of poem number poem of corpus.
+        """
+
+        first_line = corpus.poem_offsets[poem]
+        end_line = corpus.poem_offsets[poem + 1]
+        return self.stresses[self.syllable_offsets[first_line]:
+                             self.syllable_offsets[end_line]]
+
+
+def _sum_by_group(values, offsets):
+    """ (numpy.ndarray, numpy.ndarray) -> numpy.ndarray
+
+    Return the sums of values[offsets[i]:offsets[i + 1]] for each i.
+    """
+
+    totals = numpy.concatenate(([0], numpy.cumsum(values, dtype=numpy.int64)))
+    return totals[offsets[1:]] - totals[offsets[:-1]]
+
+
+def get_corpus_stress(corpus, pronouncing_table):
+    """ (EncodedCorpus, pronouncing table) -> CorpusStress
+
+    Return the stress and syllable statistics of corpus, whose tokens were
+    encoded against pronouncing_table.
+
+    >>> corpus = encode_corpus(['Fox in socks\\n\\nA box'],
+    ...                        student.SMALL_TABLE)
+    >>> stats = get_corpus_stress(corpus, student.SMALL_TABLE)
+    >>> stats.line_syllables.tolist()
+    [3, 0, 2]
+    >>> stats.get_line_stresses(2).tolist()
+    [0, 1]
+    >>> stats.poem_syllables.tolist()
+    [5]
+    """
+
+    _require_numpy()
+    words = get_word_arrays(pronouncing_table)
+    token_syllables = words.syllables[corpus.tokens]
+    token_starts = words.pattern_starts[words.pattern_ids[corpus.tokens]]
+
+    stats = CorpusStress()
+    # Syllable k of the corpus is syllable (k - first syllable of its token)
+    # of its token's stress pattern, so repeating each token's (pattern
+    # start - first syllable) once per syllable and adding k gives the index
+    # of every syllable's stress digit in pattern_digits.
+    token_firsts = numpy.cumsum(token_syllables) - token_syllables
+    indexes = numpy.repeat(token_starts - token_firsts, token_syllables)
+    indexes += numpy.arange(len(indexes))
+    stats.stresses = words.pattern_digits[indexes]
+    stats.line_syllables = _sum_by_group(token_syllables, corpus.line_offsets)
+    stats.line_stressed = _sum_by_group(words.primaries[corpus.tokens],
+                                        corpus.line_offsets)
+    stats.line_stress_density = numpy.divide(
+        stats.line_stressed, stats.line_syllables,
+        out=numpy.zeros(len(stats.line_syllables)),
+        where=stats.line_syllables > 0)
+    stats.syllable_offsets = numpy.concatenate(
+        ([0], numpy.cumsum(stats.line_syllables)))
+    stats.poem_syllables = _sum_by_group(stats.line_syllables,
+                                         corpus.poem_offsets)
+    return stats
+
+
+def get_syllable_distribution(stats):
+    """ (CorpusStress) -> numpy.ndarray
+
+    Return counts of lines by number of syllables: item n is the number of
+    non-empty lines with n syllables.
+
+    >>> corpus = encode_corpus(['Fox in socks\\n\\nA box'],
+    ...                        student.SMALL_TABLE)
+    >>> get_syllable_distribution(get_corpus_stress(
+    ...     corpus, student.SMALL_TABLE)).tolist()
+    [0, 0, 1, 1]
+    """
+
+    _require_numpy()
+    return numpy.bincount(stats.line_syllables[stats.line_syllables > 0],
+                          minlength=1)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
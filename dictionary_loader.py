@@ -0,0 +1,137 @@
+"""
+Load a pronouncing dictionary on a background thread, so that a window can
+be shown while it loads.
+
+A DictionaryLoader runs a load function, such as read_pronouncing_dictionary
+in annotate_poetry, on a daemon thread and keeps the progress it reports.
+The GUI polls is_loaded and get_progress from its own thread (Tk must only
+be used from the thread that created it), and only then uses the table.
+"""
+
+import threading
+
+
+class DictionaryLoader(object):
+    """ A pronouncing table being loaded on a background thread.
+
+      o done, total: the progress last reported by the load function, in
+        dictionary entries (total is 0 until the first report)
+      o table: the pronouncing table, or None until it is loaded
+      o error: the exception the load function raised, or None
+    """
+
+    def __init__(self, load, *args, **kwargs):
+        """ (DictionaryLoader, function, ...) -> NoneType
+
+        Create a loader that will call load(*args, progress=..., **kwargs)
+        to get a pronouncing table.  The load does not start until start is
+        called.
+        """
+
+        self._load = load
+        self._args = args
+        self._kwargs = kwargs
+        self._finished = threading.Event()
+        self._thread = None
+        self.done = 0
+        self.total = 0
+        self.table = None
+        self.error = None
+
+    def start(self):
+        """ (DictionaryLoader) -> DictionaryLoader
+
+        Start loading the table on a daemon thread, and return this loader.
+        """
+
+        self._thread = threading.Thread(target=self._run,
+                                        name='dictionary loader')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def _run(self):
+        """ (DictionaryLoader) -> NoneType
+
+        Load the table, keeping it or the error raised.
+        """
+
+        try:
+            self.table = self._load(*self._args, progress=self._report,
+                                    **self._kwargs)
+        except Exception as error:
+            self.error = error
+        self._finished.set()
+
+    def _report(self, done, total):
+        """ (DictionaryLoader, int, int) -> NoneType
+
+        Keep the progress reported by the load function.
+        """
+
+        self.total = total
+        self.done = done
+
+    def is_loaded(self):
+        """ (DictionaryLoader) -> bool
+
+        Return True if the load has finished, whether or not it succeeded.
+        """
+
+        return self._finished.is_set()
+
+    def get_progress(self):
+        """ (DictionaryLoader) -> float
+
+        Return the fraction of the dictionary loaded so far, from 0.0 to 1.0.
+
+        >>> loader = DictionaryLoader(lambda progress: progress(3, 4))
+        >>> loader.get_progress()
+        0.0
+        >>> loader.start().wait()
+        >>> loader.get_progress()
+        1.0
+        """
+
+        if self.is_loaded():
+            return 1.0
+        total = self.total
+        if total == 0:
+            return 0.0
+        return min(self.done / total, 1.0)
+
+    def wait(self, timeout=None):
+        """ (DictionaryLoader, float) -> pronouncing table
+
+        Wait up to timeout seconds (forever if timeout is None) for the load
+        to finish, and return the table, or None if it is still loading.
+        Raise the load function's error if it failed.
+        """
+
+        self._finished.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.table
+
+
+def make_loaded(pronouncing_table):
+    """ (pronouncing table) -> DictionaryLoader
+
+    Return a loader that has already finished loading pronouncing_table.
+
+    >>> loader = make_loaded([[], []])
+    >>> loader.is_loaded()
+    True
+    >>> loader.wait()
+    [[], []]
+    """
+
+    loader = DictionaryLoader(None)
+    loader.table = pronouncing_table
+    loader._finished.set()
+    return loader
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,177 @@
+"""
+A streaming parser for pronouncing dictionaries in the CMU format.
+
+The file is read in chunks of CHUNK_SIZE bytes (or characters, for a file
+opened as text), and each chunk is split into lines and parsed before the
+next is read, so the whole file is never held in memory at once.  Entries
+are appended straight into a PronouncingTable's compact storage as phoneme
+codes, without building a list of phonemes for each.
+
+The format is read loosely, so that users' own dictionaries work too:
+  o lines starting with ';;;' are comments, and blank lines are skipped
+  o the word and its phonemes may be separated by any whitespace
+  o anything from a '#' after the word (as in newer CMU releases) is a
+    comment
+  o words are upper-cased, so 'read(1)' is the same as 'READ(1)'
+"""
+
+import locale
+import os
+
+import pronouncing_table as table_index
+
+# The number of bytes (or characters) read at a time.
+CHUNK_SIZE = 1 << 17
+
+# The start of a comment line.
+COMMENT = ';;;'
+
+
+def parse_pronouncing_line(line):
+    """ (str) -> tuple of (str, list of str)
+
+    Return the word and phonemes of line, or None if line is blank or a
+    comment.
+
+    >>> parse_pronouncing_line('read(1)\\tR EH1 D  # past tense\\n')
+    ('READ(1)', ['R', 'EH1', 'D'])
+    >>> parse_pronouncing_line(';;; # CMUdict') is None
+    True
+    """
+
+    if line.startswith(COMMENT):
+        return None
+    parts = line.split()
+    if len(parts) == 0:
+        return None
+    phonemes = parts[1:]
+    if '#' in line:
+        for i in range(len(phonemes)):
+            if phonemes[i].startswith('#'):
+                phonemes = phonemes[:i]
+                break
+    return parts[0].upper(), phonemes
+
+
+def iter_line_chunks(dictionary_file, chunk_size=CHUNK_SIZE, encoding=None):
+    """ (file, int, str) -> iterator of tuple of (list of str, int)
+
+    Yield the lines of dictionary_file a chunk at a time, reading about
+    chunk_size characters for each, together with the number of characters
+    read so far.  A line is never split between chunks.  If dictionary_file
+    is opened in binary mode, chunk_size and the number read are in bytes,
+    and the lines are decoded with encoding (the locale's preferred
+    encoding, as for a text file, if None).
+
+    >>> import io
+    >>> list(iter_line_chunks(io.StringIO('A  AH0\\nB  B IY1\\nC'), 8))
+    [(['A  AH0'], 8), (['B  B IY1'], 16), (['C'], 17)]
+    >>> list(iter_line_chunks(io.BytesIO('É  EY1\\nB  B IY1'.encode()), 8,
+    ...                       'utf-8'))
+    [(['É  EY1'], 8), (['B  B IY1'], 16)]
+    """
+
+    read = 0
+    chunk = dictionary_file.read(chunk_size)
+    if isinstance(chunk, bytes):
+        if encoding is None:
+            encoding = locale.getpreferredencoding(False)
+        newline = b'\n'
+    else:
+        newline = '\n'
+    rest = chunk[:0]
+    while chunk:
+        read += len(chunk)
+        block = rest + chunk
+        end = block.rfind(newline)
+        if end != -1:
+            rest = block[end + 1:]
+            block = block[:end]
+            # bytes are decoded a chunk of whole lines at a time, so no
+            # character is split between chunks
+            if newline == b'\n':
+                block = block.decode(encoding)
+            yield block.split('\n'), read
+        else:
+            rest = block
+        chunk = dictionary_file.read(chunk_size)
+    if rest:
+        if newline == b'\n':
+            rest = rest.decode(encoding)
+        yield [rest], read
+
+
+def iter_entries(dictionary_file, chunk_size=CHUNK_SIZE):
+    """ (file, int) -> iterator of tuple of (str, list of str)
+
+    Yield the word and phonemes of each entry of dictionary_file in order,
+    reading it in chunks of chunk_size characters.
+
+    >>> import io
+    >>> dictionary_file = io.StringIO(
+    ...     ';;; header\\nA  AH0\\n\\nBOX B AA1 K S\\n')
+    >>> list(iter_entries(dictionary_file))
+    [('A', ['AH0']), ('BOX', ['B', 'AA1', 'K', 'S'])]
+    """
+
+    for lines, read in iter_line_chunks(dictionary_file, chunk_size):
+        for line in lines:
+            entry = parse_pronouncing_line(line)
+            if entry is not None:
+                yield entry
+
+
+def read_pronouncing_table(filename, progress=None, chunk_size=CHUNK_SIZE):
+    """ (str, function, int) -> PronouncingTable
+
+    Return a pronouncing table for the dictionary file filename, reading it
+    in chunks of chunk_size bytes.  If progress is given, it is called as
+    progress(done, total) after each chunk, with the number of bytes read
+    so far and the size of the file, so done reaches total however the file
+    is encoded.
+
+    Docstring example(s) not given since this function depends on file input.
+    """
+
+    table = table_index.PronouncingTable()
+    codes_of = table_index.PHONEME_CODES
+    encode_pronunciation = table_index.encode_pronunciation
+    total = os.path.getsize(filename)
+    if progress is not None:
+        progress(0, total)
+
+    dictionary_file = open(filename, 'rb')
+    try:
+        for lines, read in iter_line_chunks(dictionary_file, chunk_size):
+            words = []
+            codes_list = []
+            for line in lines:
+                parts = line.split()
+                # the usual entry: an upper-case word and known phonemes
+                if (len(parts) == 0 or line.startswith(COMMENT) or
+                        '#' in line or not parts[0].isupper()):
+                    entry = parse_pronouncing_line(line)
+                    if entry is not None:
+                        words.append(entry[0])
+                        codes_list.append(encode_pronunciation(entry[1]))
+                    continue
+                words.append(parts[0])
+                try:
+                    codes_list.append(bytes(map(codes_of.__getitem__,
+                                                parts[1:])))
+                except KeyError:
+                    codes_list.append(encode_pronunciation(parts[1:]))
+            # the whole chunk is added at once
+            table.add_words_codes(words, codes_list)
+            if progress is not None:
+                progress(min(read, total), total)
+    finally:
+        dictionary_file.close()
+    if progress is not None:
+        progress(total, total)
+    return table
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
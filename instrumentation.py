@@ -0,0 +1,314 @@
+"""
+Opt-in instrumentation of the annotation pipeline: call counts, cumulative
+time and allocations for each stage, reported as text or as JSON.
+
+A stage is a module-level function named 'module.function', such as
+'stress_and_rhyme_functions.look_up_pronunciation'.  enable replaces each
+stage in its module with a wrapper that records its calls, and disable puts
+the original functions back.  The modules call each other through their
+module globals, so the wrappers see the calls made inside the pipeline as
+well as from outside it.  While instrumentation is disabled nothing is
+wrapped, so it costs nothing at all.
+
+For each stage the wrappers keep:
+  o calls: the number of calls
+  o timed: the number of calls that were measured
+  o seconds: the time spent in the measured calls, including the stages
+    they call (so nested stages are counted in both)
+  o blocks: the change in sys.getallocatedblocks() over the measured
+    calls: the memory blocks they left allocated
+
+With sample_every=N each call of a stage is measured with probability
+1/N, and the reports scale the measured time and blocks up to all calls;
+every call is still counted.  The calls are picked at random rather than
+every Nth one, so a workload that repeats with a period dividing N is not
+always measured at the same point.  Most of the cost of a measured call is
+sys.getallocatedblocks, which walks the allocator's arenas (a few
+microseconds with the dictionary loaded), so sampling keeps the cost low
+enough to leave instrumentation enabled under real load.
+
+Instrumentation can also be turned on with the environment variable
+ANNOTATOR_INSTRUMENT (see enable_from_environment).
+"""
+
+import functools
+import importlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+# The stages instrumented by default, in pipeline order.
+DEFAULT_STAGES = [
+    'annotate_poetry.read_pronouncing_dictionary',
+    'stress_and_rhyme_functions.convert_to_lines',
+    'poem_annotation.annotate_poem',
+    'annotation_cache.get_key',
+    'tokenizer.tokenize',
+    'meter.detect_meter',
+    'meter.detect_meter_variants',
+    'meter.get_line_variants',
+    'meter.get_token_variants',
+    'stress_and_rhyme_functions.detect_rhyme_scheme',
+    'sound_patterns.find_sound_patterns',
+    'stress_and_rhyme_functions.look_up_pronunciation',
+    'stress_and_rhyme_functions.get_stress_pattern',
+    'stress_and_rhyme_functions.look_up_stress_digits',
+    'stress_and_rhyme_functions.look_up_rhyme_keys',
+    'stress_and_rhyme_functions.last_syllable',
+    'pronunciation_guess.guess_codes']
+
+# The environment variable that enables instrumentation: its value is the
+# sample_every to use (1 measures every call).
+ENVIRONMENT_VARIABLE = 'ANNOTATOR_INSTRUMENT'
+
+# The StageStats of each instrumented stage, by stage name.
+_stats = {}
+
+# The original function of each instrumented stage, by stage name.
+_originals = {}
+
+
+class StageStats(object):
+    """ The calls recorded for one stage: see the module docstring. """
+
+    def __init__(self, name):
+        """ (StageStats, str) -> NoneType
+
+        Create empty stats for the stage named name.
+        """
+
+        self.name = name
+        # held while the counts are updated, as the stages may be called
+        # from more than one thread
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.timed = 0
+        self.seconds = 0.0
+        self.blocks = 0
+
+    def get_estimates(self):
+        """ (StageStats) -> tuple of (float, float)
+
+        Return the estimated total seconds and blocks of all calls, scaling
+        the measured calls up to every call.
+
+        >>> stats = StageStats('f')
+        >>> stats.calls, stats.timed = 10, 2
+        >>> stats.seconds, stats.blocks = 0.5, 4
+        >>> stats.get_estimates()
+        (2.5, 20.0)
+        """
+
+        if self.timed == 0:
+            return 0.0, 0.0
+        scale = self.calls / self.timed
+        return self.seconds * scale, self.blocks * scale
+
+
+def _find_stage(name):
+    """ (str) -> tuple of (module, str)
+
+    Return the module and function name of the stage named name.
+    """
+
+    module_name, dot, function_name = name.rpartition('.')
+    if dot == '' or function_name == '':
+        raise ValueError('a stage is named module.function: ' + name)
+    module = importlib.import_module(module_name)
+    if not callable(getattr(module, function_name, None)):
+        raise ValueError('no such function: ' + name)
+    return module, function_name
+
+
+def _make_wrapper(function, stats, sample_every):
+    """ (function, StageStats, int) -> function
+
+    Return a function that calls function, recording its calls in stats and
+    measuring each with probability 1 / sample_every.
+    """
+
+    perf_counter = time.perf_counter
+    getallocatedblocks = sys.getallocatedblocks
+    sample = random.Random()
+    chance = 1.0 / sample_every
+
+    lock = stats.lock
+
+    @functools.wraps(function)
+    def instrumented(*args, **kwargs):
+        with lock:
+            stats.calls += 1
+        if chance < 1.0 and sample.random() >= chance:
+            return function(*args, **kwargs)
+        blocks = getallocatedblocks()
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = perf_counter() - start
+            blocks = getallocatedblocks() - blocks
+            with lock:
+                stats.seconds += seconds
+                stats.blocks += blocks
+                stats.timed += 1
+
+    return instrumented
+
+
+def enable(stages=None, sample_every=1):
+    """ (list of str, int) -> NoneType
+
+    Instrument the stages named in stages (DEFAULT_STAGES if None),
+    measuring one in sample_every calls of each, picked at random.  Stages
+    that are already instrumented keep their stats.  The stats are updated
+    under a lock, so stages may be called from any thread (as the
+    dictionary is read by the poem window).
+
+    >>> enable(['stress_and_rhyme_functions.get_stress_pattern'])
+    >>> import stress_and_rhyme_functions as student
+    >>> student.get_stress_pattern('box', student.SMALL_TABLE)
+    '/  '
+    >>> get_stats()['stress_and_rhyme_functions.get_stress_pattern'].calls
+    1
+    >>> disable()
+    >>> is_enabled()
+    False
+    """
+
+    if sample_every < 1:
+        raise ValueError('sample_every must be at least 1')
+    if stages is None:
+        stages = DEFAULT_STAGES
+    for name in stages:
+        if name in _originals:
+            continue
+        module, function_name = _find_stage(name)
+        function = getattr(module, function_name)
+        if name not in _stats:
+            _stats[name] = StageStats(name)
+        _originals[name] = function
+        setattr(module, function_name,
+                _make_wrapper(function, _stats[name], sample_every))
+
+
+def disable():
+    """ () -> NoneType
+
+    Put back the original function of every instrumented stage.  The stats
+    recorded so far are kept until reset.
+    """
+
+    for name in list(_originals):
+        module, function_name = _find_stage(name)
+        setattr(module, function_name, _originals[name])
+        del _originals[name]
+
+
+def is_enabled():
+    """ () -> bool
+
+    Return True if any stage is instrumented.
+    """
+
+    return len(_originals) > 0
+
+
+def reset():
+    """ () -> NoneType
+
+    Forget the stats recorded so far.
+    """
+
+    for stats in _stats.values():
+        with stats.lock:
+            stats.calls = 0
+            stats.timed = 0
+            stats.seconds = 0.0
+            stats.blocks = 0
+
+
+def get_stats():
+    """ () -> dict of {str: StageStats}
+
+    Return the stats of every stage instrumented so far, by stage name.
+    """
+
+    return _stats
+
+
+def enable_from_environment():
+    """ () -> bool
+
+    Enable instrumentation of DEFAULT_STAGES if the environment variable
+    ANNOTATOR_INSTRUMENT is set to a whole number, which is used as
+    sample_every, and return True if it was enabled.
+    """
+
+    value = os.environ.get(ENVIRONMENT_VARIABLE, '')
+    if not value.isdigit() or int(value) < 1:
+        return False
+    enable(sample_every=int(value))
+    return True
+
+
+def to_dict():
+    """ () -> dict
+
+    Return the stats of every stage, with the estimated totals, as a dict
+    that can be written as JSON.
+    """
+
+    stages = {}
+    for name in _stats:
+        stats = _stats[name]
+        seconds, blocks = stats.get_estimates()
+        stages[name] = {'calls': stats.calls, 'timed_calls': stats.timed,
+                        'measured_seconds': stats.seconds,
+                        'measured_blocks': stats.blocks,
+                        'estimated_seconds': seconds,
+                        'estimated_blocks': blocks}
+    return {'enabled': is_enabled(), 'stages': stages}
+
+
+def write_json(filename):
+    """ (str) -> NoneType
+
+    Write the stats of every stage, as returned by to_dict, to the file
+    filename as JSON.
+    """
+
+    output_file = open(filename, 'w')
+    json.dump(to_dict(), output_file, indent=2, sort_keys=True)
+    output_file.write('\n')
+    output_file.close()
+
+
+def format_report():
+    """ () -> str
+
+    Return a text report of the stats of every stage that was called, the
+    stage with the most estimated time first.
+    """
+
+    rows = []
+    for stats in _stats.values():
+        if stats.calls > 0:
+            seconds, blocks = stats.get_estimates()
+            rows.append((seconds, blocks, stats))
+    rows.sort(key=lambda row: row[0], reverse=True)
+
+    lines = ['{:50s} {:>10s} {:>10s} {:>10s} {:>10s}'.format(
+        'stage', 'calls', 'total ms', 'us/call', 'blocks')]
+    for seconds, blocks, stats in rows:
+        lines.append('{:50s} {:10d} {:10.1f} {:10.2f} {:10.0f}'.format(
+            stats.name, stats.calls, seconds * 1000,
+            seconds * 1e6 / stats.calls, blocks))
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,354 @@
+"""
+A read-only pronouncing table backed by a memory-mapped index file.
+
+The index file is written next to the dictionary file (with MAP_SUFFIX added
+to its name).  It holds the dictionary entries sorted by word, one
+"WORD PHONEME_1 ... PHONEME_LAST" line per entry, and an array with the
+offset of each line.  Words are found by binary search over the offsets and
+a word's phonemes are only decoded when they are asked for.  The lines are
+encoded with the locale's preferred encoding, which dictionary_parser reads
+the dictionary with, and the encoding is recorded in the index file so that
+an index built under another encoding is rebuilt.
+
+Nothing is copied into Python objects up front, so processes that open the
+same index file (or that are forked after opening it) share its pages
+instead of each holding its own lists of phonemes.
+"""
+
+import locale
+import mmap
+import os
+import struct
+
+import dictionary_parser
+import pronouncing_cache
+
+# Added to the dictionary file name to get the index file name.
+MAP_SUFFIX = '.map'
+
+# Start of every index file; the last byte is the layout version.
+MAP_MAGIC = b'PTMAP\x00\x00\x02'
+
+# magic, dictionary size, dictionary mtime in ns, dictionary SHA-1,
+# encoding of the entry lines, entries
+HEADER = struct.Struct('<8sQq40s32sI')
+
+
+class _MappedColumn(object):
+    """ One column (words or pronunciations) of a MappedPronouncingTable. """
+
+    def __init__(self, table, decode):
+        """ (_MappedColumn, MappedPronouncingTable, function) -> NoneType
+
+        Create a column of table whose items are made by calling decode
+        with the bytes of an entry line and the encoding of table.
+        """
+
+        self._table = table
+        self._decode = decode
+
+    def __len__(self):
+        """ (_MappedColumn) -> int
+
+        Return the number of entries in the column.
+        """
+
+        return self._table.entry_count
+
+    def __getitem__(self, row):
+        """ (_MappedColumn, int) -> object
+
+        Return the decoded item at row.
+        """
+
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('pronouncing table row out of range')
+        return self._decode(self._table.get_line(row), self._table.encoding)
+
+    def __iter__(self):
+        """ (_MappedColumn) -> iterator
+
+        Yield every item of the column in order.
+        """
+
+        for row in range(len(self)):
+            yield self._decode(self._table.get_line(row),
+                               self._table.encoding)
+
+
+def _decode_word(line, encoding):
+    """ (bytes, str) -> str
+
+    Return the word of an index file line in encoding.
+
+    >>> _decode_word(b'BOX B AA1 K S', 'ascii')
+    'BOX'
+    >>> _decode_word('CAFÉ K AE0 F EY1'.encode('utf-8'), 'utf-8')
+    'CAFÉ'
+    """
+
+    return line.split(b' ', 1)[0].decode(encoding)
+
+
+def _decode_pronunciation(line, encoding):
+    """ (bytes, str) -> list of str
+
+    Return the phonemes of an index file line in encoding.
+
+    >>> _decode_pronunciation(b'BOX B AA1 K S', 'ascii')
+    ['B', 'AA1', 'K', 'S']
+    """
+
+    return line.decode(encoding).split()[1:]
+
+
+class MappedPronouncingTable(object):
+    """ A read-only pronouncing table stored in a memory-mapped file.
+
+    Like a pronouncing table, table[0] is the sequence of words and table[1]
+    is the parallel sequence of pronunciations, but both are decoded from
+    the mapped file when an item is read.  As with a PronouncingTable,
+    indexes built from it are kept in derived, and guess_missing turns on
+    guessed pronunciations for missing words.
+    """
+
+    def __init__(self, map_filename):
+        """ (MappedPronouncingTable, str) -> NoneType
+
+        Open the index file map_filename.
+        """
+
+        map_file = open(map_filename, 'rb')
+        try:
+            self._map = mmap.mmap(map_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        finally:
+            map_file.close()
+
+        header = HEADER.unpack_from(self._map, 0)
+        if header[0] != MAP_MAGIC:
+            raise ValueError(map_filename + ' is not a pronouncing index')
+        self.fingerprint = (header[1], header[2], header[3].decode('ascii'))
+        self.encoding = header[4].rstrip(b'\x00').decode('ascii')
+        self.entry_count = header[5]
+
+        offsets_end = HEADER.size + 4 * (self.entry_count + 1)
+        self._offsets = memoryview(self._map)[HEADER.size:offsets_end].cast(
+            'I')
+        self._data_start = offsets_end
+        self._columns = [_MappedColumn(self, _decode_word),
+                         _MappedColumn(self, _decode_pronunciation)]
+        self.derived = {}
+        self.guess_missing = False
+
+    def __len__(self):
+        """ (MappedPronouncingTable) -> int
+
+        Return 2, the number of columns in a pronouncing table.
+        """
+
+        return 2
+
+    def __getitem__(self, column):
+        """ (MappedPronouncingTable, int) -> _MappedColumn
+
+        Return column 0 (the words) or column 1 (the pronunciations).
+        """
+
+        return self._columns[column]
+
+    def __iter__(self):
+        """ (MappedPronouncingTable) -> iterator
+
+        Yield the words column and then the pronunciations column.
+        """
+
+        return iter(self._columns)
+
+    def get_line(self, row):
+        """ (MappedPronouncingTable, int) -> bytes
+
+        Return the entry line for row, without its newline.
+        """
+
+        start = self._data_start + self._offsets[row]
+        end = self._data_start + self._offsets[row + 1] - 1
+        return self._map[start:end]
+
+    def _word_at(self, row):
+        """ (MappedPronouncingTable, int) -> bytes
+
+        Return the word of the entry at row, without decoding it.
+        """
+
+        start = self._data_start + self._offsets[row]
+        return self._map[start:self._map.find(b' ', start)]
+
+    def find_row(self, word):
+        """ (MappedPronouncingTable, str) -> int
+
+        Return the row of the prepared word, or -1 if it is not in the
+        table.  Entries are sorted, so this is a binary search.
+        """
+
+        try:
+            key = word.encode(self.encoding)
+        except UnicodeEncodeError:
+            return -1
+        low = 0
+        high = self.entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._word_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.entry_count and self._word_at(low) == key:
+            return low
+        return -1
+
+    def get_variant_rows(self, row):
+        """ (MappedPronouncingTable, int) -> list of int
+
+        Return the rows of all pronunciations of the word at row: row
+        itself and the rows of its alternates, WORD(1), WORD(2), ..., which
+        are not next to it in the sorted index.
+        """
+
+        word = self._word_at(row).decode(self.encoding)
+        rows = [row]
+        variant_row = self.find_row(word + '(1)')
+        while variant_row != -1:
+            rows.append(variant_row)
+            variant_row = self.find_row('{}({})'.format(word, len(rows)))
+        return rows
+
+    def close(self):
+        """ (MappedPronouncingTable) -> NoneType
+
+        Unmap the index file.  The table cannot be used afterwards.
+        """
+
+        self._offsets.release()
+        self._map.close()
+
+
+def get_map_filename(filename):
+    """ (str) -> str
+
+    Return the name of the index file for dictionary file filename.
+
+    >>> get_map_filename('our_dictionary.txt')
+    'our_dictionary.txt.map'
+    """
+
+    return filename + MAP_SUFFIX
+
+
+def get_map_encoding():
+    """ () -> str
+
+    Return the encoding that index files are written in: the one
+    dictionary_parser reads dictionary files with.
+
+    Docstring example(s) not given since the result depends on the locale.
+    """
+
+    return locale.getpreferredencoding(False)
+
+
+def make_index_lines(pronouncing_lines, encoding):
+    """ (list of str, str) -> list of bytes
+
+    Return the index file lines for pronouncing_lines in encoding: each
+    entry with its word and phonemes separated by single spaces, sorted by
+    the encoded word.  Only the first entry for a word is kept.
+
+    >>> make_index_lines(['FOX  F AA1 K S\\n', 'BOX  B AA1 K S\\n'], 'ascii')
+    [b'BOX B AA1 K S\\n', b'FOX F AA1 K S\\n']
+    >>> make_index_lines(['CAFÉ  K AE0 F EY1', 'CAB  K AE1 B'], 'utf-8')
+    [b'CAB K AE1 B\\n', b'CAF\\xc3\\x89 K AE0 F EY1\\n']
+    """
+
+    entries = {}
+    for pronouncing_line in pronouncing_lines:
+        parts = pronouncing_line.split()
+        if len(parts) > 0:
+            word = parts[0].encode(encoding)
+            if word not in entries:
+                entries[word] = (' '.join(parts) + '\n').encode(encoding)
+    lines = []
+    for word in sorted(entries):
+        lines.append(entries[word])
+    return lines
+
+
+def write_index_file(filename):
+    """ (str) -> NoneType
+
+    Build the index file for the dictionary file filename.
+
+    Docstring example(s) not given since this function writes a file.
+    """
+
+    encoding = get_map_encoding()
+    dictionary_file = open(filename, 'r', encoding=encoding)
+    pronouncing_lines = []
+    for word, phonemes in dictionary_parser.iter_entries(dictionary_file):
+        pronouncing_lines.append(word + ' ' + ' '.join(phonemes))
+    dictionary_file.close()
+    lines = make_index_lines(pronouncing_lines, encoding)
+
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+
+    size, mtime_ns, digest = pronouncing_cache.get_fingerprint(filename)
+    map_filename = get_map_filename(filename)
+    temporary_filename = map_filename + '.tmp'
+    map_file = open(temporary_filename, 'wb')
+    try:
+        map_file.write(HEADER.pack(MAP_MAGIC, size, mtime_ns,
+                                   digest.encode('ascii'),
+                                   encoding.encode('ascii'), len(lines)))
+        map_file.write(struct.pack('<{}I'.format(len(offsets)), *offsets))
+        map_file.writelines(lines)
+    finally:
+        map_file.close()
+    # Replace the old index in one step; processes that still map the old
+    # file keep their pages until they close it.
+    os.replace(temporary_filename, map_filename)
+
+
+def open_mapped_table(filename):
+    """ (str) -> MappedPronouncingTable
+
+    Return a memory-mapped pronouncing table for the dictionary file
+    filename, building (or rebuilding) its index file first if the index is
+    missing, was built from a different version of filename or was written
+    in a different encoding.
+
+    Docstring example(s) not given since this function depends on file input.
+    """
+
+    map_filename = get_map_filename(filename)
+    if os.path.exists(map_filename):
+        try:
+            table = MappedPronouncingTable(map_filename)
+        except (OSError, ValueError, struct.error):
+            table = None
+        if table is not None:
+            if (table.fingerprint == pronouncing_cache.get_fingerprint(
+                    filename) and table.encoding == get_map_encoding()):
+                return table
+            table.close()
+
+    write_index_file(filename)
+    return MappedPronouncingTable(map_filename)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
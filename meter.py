@@ -0,0 +1,561 @@
+"""
+Meter detection: decide which metrical foot (iamb, trochee, anapest, ...)
+and how many feet per line best fit the stress of a poem.
+
+Each syllable of a line gets a stress class from the pronouncing table.
+The syllables are then aligned with the stress template of every meter, a
+foot repeated once per foot in the line ('u' for an unstressed and 's' for
+a stressed position), by dynamic programming over (syllable, template
+position), the way an edit distance is computed:
+  o a syllable in a template position costs SUBSTITUTION_COST for its
+    stress class and the position.  One syllable words can be stressed or
+    unstressed depending on their place in the line, so they cost little
+    in either position.  The dictionary marks nearly all of them as
+    stressed, so common function words (FUNCTION_WORDS) are treated as
+    unstressed instead.
+  o an extra syllable or a missing template position costs EDIT_COST,
+    except that a missing first unstressed position (a headless line) or an
+    extra unstressed last syllable (a feminine ending) costs VARIANT_COST.
+The meter with the lowest total cost is the best fit, and that cost is the
+line's deviation from it.
+
+Many lines at once are scanned by scan_stresses, which runs the same
+dynamic programming for all lines of a length together with NumPy when it
+is installed.  NumPy is only imported then, so that importing this module
+(which the poem window does) stays quick.
+"""
+
+import functools
+
+import stress_and_rhyme_functions as student
+import tokenizer
+
+# The NumPy module once _import_numpy has imported it.
+numpy = None
+
+# The metrical feet, with their stress templates.
+FEET = [('iambic', 'us'), ('trochaic', 'su'), ('anapestic', 'uus'),
+        ('dactylic', 'suu'), ('amphibrachic', 'usu')]
+
+# The names for lines of 1, 2, 3, ... feet.
+LINE_LENGTHS = ['monometer', 'dimeter', 'trimeter', 'tetrameter',
+                'pentameter', 'hexameter', 'heptameter', 'octameter']
+
+# Syllable stress classes: the stress digit of the syllable, plus 3 if it is
+# the only syllable of its word.
+UNSTRESSED, PRIMARY, SECONDARY = 0, 1, 2
+ONE_SYLLABLE = 3
+
+# SUBSTITUTION_COST[stress class] is (cost in a 'u' position, cost in an
+# 's' position).
+SUBSTITUTION_COST = [(0.0, 1.0), (1.0, 0.0), (0.25, 0.0),
+                     (0.0, 0.25), (0.25, 0.0), (0.25, 0.0)]
+
+# One syllable words that are usually unstressed in verse.
+FUNCTION_WORDS = set(['A', 'AN', 'AND', 'AS', 'AT', 'BUT', 'BY', 'FOR',
+                      'FROM', 'HAD', 'HAS', 'HER', 'HIS', 'I', 'IF', 'IN',
+                      'IS', 'IT', 'ITS', 'ME', 'MY', 'NOR', 'OF', 'ON', 'OR',
+                      'OUR', 'SO', 'THAN', 'THAT', 'THE', 'THEIR', 'THEY',
+                      'TO', 'US', 'WAS', 'WE', 'WERE', 'WITH', 'YOU',
+                      'YOUR'])
+
+EDIT_COST = 1.0
+VARIANT_COST = 0.5
+
+# Alignments drifting more than this many positions from the diagonal are
+# never the cheapest for real lines, so they are not computed.
+BAND = 3
+
+# The most readings of a line with alternate pronunciations that are scored.
+MAX_LINE_VARIANTS = 16
+
+# scan_stresses uses NumPy for at least this many distinct stress sequences;
+# for fewer, scanning them one at a time is faster.
+VECTOR_MIN = 64
+
+
+def _get_word_stress(word, stress_digits):
+    """ (str, str) -> tuple of int
+
+    Return the stress classes of the syllables of the prepared word word,
+    with the stress digits stress_digits.
+
+    >>> _get_word_stress('THE', '1')
+    (3,)
+    """
+
+    if len(stress_digits) == 1 and word in FUNCTION_WORDS:
+        return (UNSTRESSED + ONE_SYLLABLE,)
+    if len(stress_digits) == 1:
+        return (int(stress_digits) + ONE_SYLLABLE,)
+    stress = []
+    for digit in stress_digits:
+        stress.append(int(digit))
+    return tuple(stress)
+
+
+def get_line_variants(poem_line, pronouncing_table):
+    """ (str, pronouncing table) -> list of tuple of (tuple of int, list)
+
+    Return (stress classes of every syllable, stress digits of every word)
+    for each way of reading poem_line with the alternate pronunciations of
+    its words in pronouncing_table, the first pronunciations first.  Once
+    there would be more than MAX_LINE_VARIANTS readings, the remaining words
+    are read by their first pronunciations only.  Words that are not in the
+    table are skipped (unless the table guesses missing words).
+
+    >>> get_line_variants('Consistent socks', student.SMALL_TABLE)
+    [((0, 1, 0, 4), ['010', '1'])]
+    """
+
+    return get_token_variants(tokenizer.tokenize(poem_line),
+                              pronouncing_table)
+
+
+def get_token_variants(tokens, pronouncing_table):
+    """ (list of tuple of (str, str, int, int), pronouncing table) -> list
+
+    Return the readings of the line with the tokens tokens, as returned by
+    tokenizer.tokenize, in the form get_line_variants returns them.
+
+    >>> get_token_variants(tokenizer.tokenize('A box'), student.SMALL_TABLE)
+    [((3, 4), ['0', '1'])]
+    """
+
+    variants = [((), [])]
+    for token in tokens:
+        key = token[1]
+        word_variants = student.look_up_stress_variants(key,
+                                                        pronouncing_table)
+        if len(variants) * len(word_variants) > MAX_LINE_VARIANTS:
+            word_variants = word_variants[:1]
+        if len(word_variants) == 1:
+            word_stress = _get_word_stress(key, word_variants[0])
+            for stress, word_digits in variants:
+                word_digits.append(word_variants[0])
+            variants = [(stress + word_stress, word_digits)
+                        for stress, word_digits in variants]
+        else:
+            new_variants = []
+            for stress, word_digits in variants:
+                for digits in word_variants:
+                    new_variants.append(
+                        (stress + _get_word_stress(key, digits),
+                         word_digits + [digits]))
+            variants = new_variants
+    return variants
+
+
+def get_line_stress(poem_line, pronouncing_table):
+    """ (str, pronouncing table) -> tuple of int
+
+    Return the stress class of every syllable of poem_line, found with
+    pronouncing_table, reading each word by its first pronunciation.  Words
+    that are not in the table are skipped (unless the table guesses missing
+    words), and words in FUNCTION_WORDS count as unstressed one syllable
+    words.
+
+    >>> get_line_stress('Consistent socks', student.SMALL_TABLE)
+    (0, 1, 0, 4)
+    """
+
+    return get_line_variants(poem_line, pronouncing_table)[0][0]
+
+
+def _get_foot_index(foot_name):
+    """ (str) -> int
+
+    Return the index in FEET of the foot called foot_name, or -1 if there is
+    none.
+
+    >>> _get_foot_index('anapestic')
+    2
+    """
+
+    for i in range(len(FEET)):
+        if FEET[i][0] == foot_name:
+            return i
+    return -1
+
+
+def choose_stress_digits(poem_line, pronouncing_table, foot_name=''):
+    """ (str, pronouncing table, str) -> list of str
+
+    Return the stress digits of each word of poem_line for the reading of
+    its alternate pronunciations that best fits the foot called foot_name
+    (such as 'iambic'), or that best fits any meter if foot_name is ''.
+
+    >>> table = [['I', 'RECORD', 'RECORD(1)', 'THE', 'SONG'],
+    ...          [['AY1'], ['R', 'EH1', 'K', 'ER0', 'D'],
+    ...           ['R', 'IH0', 'K', 'AO1', 'R', 'D'], ['DH', 'AH0'],
+    ...           ['S', 'AO1', 'NG']]]
+    >>> choose_stress_digits('I record the song', table, 'iambic')
+    ['1', '01', '0', '1']
+    >>> choose_stress_digits('I record the song', table, 'anapestic')
+    ['1', '10', '0', '1']
+    """
+
+    return choose_variant(get_line_variants(poem_line, pronouncing_table),
+                          foot_name)
+
+
+def choose_variant(variants, foot_name=''):
+    """ (list of tuple of (tuple of int, list of str), str) -> list of str
+
+    Return the stress digits of each word for the line reading in variants,
+    as returned by get_line_variants, that best fits the foot called
+    foot_name, or that best fits any meter if foot_name is ''.  Ties go to
+    the earlier reading.
+
+    >>> choose_variant([((0, 1), ['01']), ((1, 0), ['10'])], 'trochaic')
+    ['10']
+    """
+
+    if len(variants) == 1:
+        return variants[0][1]
+    foot = _get_foot_index(foot_name)
+    best = None
+    best_cost = None
+    for stress, word_digits in variants:
+        if foot == -1:
+            cost = scan_stress(stress)[2]
+        else:
+            cost = scan_stress_all(stress)[foot][2]
+        if best_cost is None or cost < best_cost:
+            best = word_digits
+            best_cost = cost
+    return best
+
+
+def _align(stress, template):
+    """ (tuple of int, str) -> list of float
+
+    Return the cost of aligning the syllables in stress with each prefix of
+    template: item j is the cost for template[:j] (only prefixes within
+    BAND positions of len(stress) are computed; the rest are None).
+    """
+
+    infinity = float('inf')
+    width = len(template)
+    # previous[j]: cost of aligning the syllables so far with template[:j]
+    previous = [infinity] * (width + 1)
+    previous[0] = 0.0
+    for j in range(1, min(width, BAND) + 1):
+        if j == 1 and template[0] == 'u':
+            previous[j] = VARIANT_COST
+        else:
+            previous[j] = previous[j - 1] + EDIT_COST
+
+    for i in range(1, len(stress) + 1):
+        # kept for a feminine ending: the costs before the last syllable
+        before_last = previous
+        costs = SUBSTITUTION_COST[stress[i - 1]]
+        current = [infinity] * (width + 1)
+        low = max(0, i - BAND)
+        high = min(width, i + BAND)
+        for j in range(low, high + 1):
+            # an extra syllable
+            best = previous[j] + EDIT_COST
+            if j > 0:
+                # the syllable in template position j - 1
+                cost = previous[j - 1] + costs[template[j - 1] == 's']
+                if cost < best:
+                    best = cost
+                # a missing template position
+                cost = current[j - 1] + EDIT_COST
+                if cost < best:
+                    best = cost
+            current[j] = best
+        previous = current
+
+    # A feminine ending: one extra unstressed syllable after the template.
+    if len(stress) > 0 and SUBSTITUTION_COST[stress[-1]][0] == 0.0:
+        for j in range(width + 1):
+            if before_last[j] + VARIANT_COST < previous[j]:
+                previous[j] = before_last[j] + VARIANT_COST
+
+    result = []
+    for cost in previous:
+        if cost == infinity:
+            result.append(None)
+        else:
+            result.append(cost)
+    return result
+
+
+@functools.lru_cache(maxsize=65536)
+def scan_stress(stress):
+    """ (tuple of int) -> tuple of (str, int, float)
+
+    Return the best foot name, number of feet and deviation for a line with
+    syllable stress classes stress.  Lines with the same stress are scanned
+    once.  A line with no syllables gets ('', 0, 0.0).
+
+    >>> scan_stress((0, 1, 0, 1, 0, 1, 0, 1, 0, 1))
+    ('iambic', 5, 0.0)
+    >>> scan_stress((3, 4, 3, 3, 4, 3, 3, 4))
+    ('anapestic', 3, 0.5)
+    """
+
+    if len(stress) == 0:
+        return ('', 0, 0.0)
+    return min(scan_stress_all(stress), key=lambda scan: scan[2])
+
+
+@functools.lru_cache(maxsize=65536)
+def scan_stress_all(stress):
+    """ (tuple of int) -> list of tuple of (str, int, float)
+
+    Return, for each foot in FEET in order, the foot name, the best number
+    of feet and the deviation for a line with syllable stress classes
+    stress.
+
+    >>> scan_stress_all((0, 1, 0, 1))[:2]
+    [('iambic', 2, 0.0), ('trochaic', 1, 2.0)]
+    """
+
+    scans = []
+    for name, foot in FEET:
+        template = foot * len(LINE_LENGTHS)
+        costs = _align(stress, template)
+        best_feet = 0
+        best_cost = None
+        for feet in range(1, len(LINE_LENGTHS) + 1):
+            cost = costs[feet * len(foot)]
+            if cost is not None and (best_cost is None or cost < best_cost):
+                best_feet = feet
+                best_cost = cost
+        if best_cost is None:
+            best_cost = float(len(stress)) * EDIT_COST
+        scans.append((name, best_feet, best_cost))
+    return scans
+
+
+def _import_numpy():
+    """ () -> bool
+
+    Import NumPy, if it has not been imported yet, and return whether it is
+    installed.
+    """
+
+    global numpy
+    if numpy is None:
+        try:
+            import numpy as numpy_module
+        except ImportError:
+            return False
+        numpy = numpy_module
+    return True
+
+
+def _align_many(stresses, template):
+    """ (list of tuple of int, str) -> numpy.ndarray
+
+    Return _align(stress, template) for every stress in stresses, which all
+    have the same length of at least 1, as the rows of a NumPy array, with
+    infinity in place of None.
+    """
+
+    infinity = float('inf')
+    width = len(template)
+    positions = numpy.arange(width + 1)
+    deletions = positions * EDIT_COST
+    classes = numpy.array(stresses, dtype=numpy.intp)
+    u_costs = numpy.array([costs[0] for costs in SUBSTITUTION_COST])
+    s_costs = numpy.array([costs[1] for costs in SUBSTITUTION_COST])
+    stressed = numpy.array([position == 's' for position in template])
+
+    first = [infinity] * (width + 1)
+    first[0] = 0.0
+    for j in range(1, min(width, BAND) + 1):
+        if j == 1 and template[0] == 'u':
+            first[j] = VARIANT_COST
+        else:
+            first[j] = first[j - 1] + EDIT_COST
+    previous = numpy.tile(numpy.array(first), (len(stresses), 1))
+
+    for i in range(1, classes.shape[1] + 1):
+        before_last = previous
+        column = classes[:, i - 1]
+        substitutions = numpy.where(stressed, s_costs[column][:, None],
+                                    u_costs[column][:, None])
+        current = previous + EDIT_COST
+        current[:, 1:] = numpy.minimum(current[:, 1:],
+                                       previous[:, :-1] + substitutions)
+        outside = (positions < i - BAND) | (positions > i + BAND)
+        current[:, outside] = infinity
+        # Missing template positions, for every j at once: the cheapest
+        # current[k] + (j - k) * EDIT_COST over k <= j.
+        current = numpy.minimum.accumulate(current - deletions, axis=1)
+        current += deletions
+        current[:, outside] = infinity
+        previous = current
+
+    feminine = u_costs[classes[:, -1]] == 0.0
+    previous[feminine] = numpy.minimum(previous[feminine],
+                                       before_last[feminine] + VARIANT_COST)
+    return previous
+
+
+def _scan_many(stresses):
+    """ (list of tuple of int) -> list of list of tuple of (str, int, float)
+
+    Return scan_stress_all(stress) for every stress in stresses, which all
+    have the same length of at least 1.
+    """
+
+    scans = [[] for stress in stresses]
+    for name, foot in FEET:
+        costs = _align_many(stresses, foot * len(LINE_LENGTHS))
+        ends = costs[:, len(foot)::len(foot)]
+        best = numpy.argmin(ends, axis=1)
+        best_costs = ends[numpy.arange(len(stresses)), best]
+        for k in range(len(stresses)):
+            if best_costs[k] == float('inf'):
+                scans[k].append((name, 0, float(len(stresses[k])) * EDIT_COST))
+            else:
+                scans[k].append((name, int(best[k]) + 1, float(best_costs[k])))
+    return scans
+
+
+def scan_stresses(stresses):
+    """ (list of tuple of int) -> list of list of tuple of (str, int, float)
+
+    Return scan_stress_all(stress) for every stress in stresses.  Each
+    distinct stress sequence is scanned once, and with NumPy installed,
+    many sequences are scanned together.
+
+    >>> scan_stresses([(0, 1, 0, 1), (0, 1, 0, 1)])[1][0]
+    ('iambic', 2, 0.0)
+    """
+
+    distinct = set(stresses)
+    found = {}
+    if len(distinct) < VECTOR_MIN or not _import_numpy():
+        for stress in distinct:
+            found[stress] = scan_stress_all(stress)
+    else:
+        by_length = {}
+        for stress in distinct:
+            if len(stress) == 0:
+                found[stress] = scan_stress_all(stress)
+            else:
+                by_length.setdefault(len(stress), []).append(stress)
+        for group in by_length.values():
+            for stress, scans in zip(group, _scan_many(group)):
+                found[stress] = scans
+    return [found[stress] for stress in stresses]
+
+
+def get_meter_name(foot_name, feet):
+    """ (str, int) -> str
+
+    Return the name of the meter with feet feet of kind foot_name.
+
+    >>> get_meter_name('iambic', 5)
+    'iambic pentameter'
+    """
+
+    if 1 <= feet <= len(LINE_LENGTHS):
+        return foot_name + ' ' + LINE_LENGTHS[feet - 1]
+    return foot_name
+
+
+def scan_line(poem_line, pronouncing_table):
+    """ (str, pronouncing table) -> tuple of (str, float)
+
+    Return the name of the meter that best fits poem_line, read with the
+    alternate pronunciations of its words that fit best, and the line's
+    deviation from it.
+
+    >>> scan_line('Consistent socks', student.SMALL_TABLE)
+    ('iambic dimeter', 0.0)
+    """
+
+    best = None
+    for stress, word_digits in get_line_variants(poem_line,
+                                                 pronouncing_table):
+        scan = scan_stress(stress)
+        if best is None or scan[2] < best[2]:
+            best = scan
+    foot_name, feet, cost = best
+    return get_meter_name(foot_name, feet), cost
+
+
+def detect_meter(poem_lines, pronouncing_table):
+    """ (list of str, pronouncing table) -> tuple of (str, list)
+
+    Return the meter that best fits the poem in poem_lines, and each line's
+    deviation from that kind of foot (None for lines without known words,
+    such as blank lines between stanzas).  Each line is read with the
+    alternate pronunciations of its words that fit each foot best.  The
+    meter's foot is the one with the lowest total deviation over all lines;
+    its length is the most common number of feet per line for that foot.
+
+    >>> detect_meter(['Consistent socks', '', 'A box'], student.SMALL_TABLE)
+    ('iambic dimeter', [0.0, None, 0.0])
+    """
+
+    line_variants = []
+    for poem_line in poem_lines:
+        line_variants.append(get_line_variants(poem_line, pronouncing_table))
+    return detect_meter_variants(line_variants)
+
+
+def detect_meter_variants(line_variants):
+    """ (list of list of tuple of (tuple of int, list)) -> tuple of (str, list)
+
+    Return the meter and each line's deviation from it, as detect_meter
+    does, for the poem lines with the readings in line_variants, each as
+    returned by get_line_variants.
+
+    >>> detect_meter_variants([[((0, 1), ['01'])], [((), [])]])
+    ('iambic monometer', [0.0, None])
+    """
+
+    line_counts = []
+    stresses = []
+    for variants in line_variants:
+        line_counts.append(len(variants))
+        for stress, word_digits in variants:
+            stresses.append(stress)
+    all_scans = scan_stresses(stresses)
+
+    totals = [0.0] * len(FEET)
+    line_scans = []
+    position = 0
+    for count in line_counts:
+        if len(stresses[position]) == 0:
+            line_scans.append(None)
+        else:
+            # each foot is scored with the line's best reading for it
+            scans = all_scans[position]
+            for other in all_scans[position + 1:position + count]:
+                scans = [min(scan, other_scan, key=lambda item: item[2])
+                         for scan, other_scan in zip(scans, other)]
+            line_scans.append(scans)
+            for i in range(len(FEET)):
+                totals[i] += scans[i][2]
+        position += count
+
+    if len(line_scans) == line_scans.count(None):
+        return '', [None] * len(line_variants)
+
+    best = totals.index(min(totals))
+    deviations = []
+    feet_counts = {}
+    for scans in line_scans:
+        if scans is None:
+            deviations.append(None)
+        else:
+            deviations.append(scans[best][2])
+            feet = scans[best][1]
+            feet_counts[feet] = feet_counts.get(feet, 0) + 1
+    # The most common length; ties go to the longer line.
+    feet = max(feet_counts, key=lambda n: (feet_counts[n], n))
+    return get_meter_name(FEET[best][0], feet), deviations
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,117 @@
+"""
+Annotation of a poem without a window: the same stress patterns and rhyme
+scheme that the poem window shows, returned as plain Python values.  Used
+by the poem window, the batch annotator and anything else that annotates
+poems.
+
+An annotated poem is a dict with these keys:
+  o 'lines': the poem lines from convert_to_lines (list of str)
+  o 'stress_patterns': the stress line for each poem line, with each word's
+    stress pattern under the word (list of str)
+  o 'rhyme_scheme': the rhyme scheme marker for each poem line (list of str)
+  o 'sound_patterns': only if asked for, the spans of the alliteration,
+    assonance and internal rhyme in the lines (list of dict; see
+    sound_patterns)
+"""
+
+import meter
+import sound_patterns as sounds
+import stress_and_rhyme_functions as student
+import tokenizer
+
+
+def format_stress_line(poem_line, stress_digits, tokens=None):
+    """ (str, list of str, list of tuple) -> str
+
+    Return the stress patterns for the words in poem_line, where
+    stress_digits holds the stress digits of each word, with each word's
+    stress pattern starting at the same index as the word.  tokens, if
+    given, are the tokens of poem_line as tokenizer.tokenize returns them.
+
+    >>> format_stress_line('Fox  in socks', ['1', '0', '1'])
+    '/    x  /    '
+    """
+
+    if tokens is None:
+        tokens = tokenizer.tokenize(poem_line)
+    stress_line = ''
+    end = 0
+    for i in range(len(tokens)):
+        token, key, start, token_end = tokens[i]
+        # add the blanks between the words, as in poem_line
+        if len(stress_line) > 0:
+            stress_line = stress_line + ' ' * (start - end)
+        stress_line = stress_line + student.format_stress_pattern(
+            stress_digits[i], token)
+        end = token_end
+    return stress_line
+
+
+def get_stress_line(poem_line, pronouncing_table, foot_name=''):
+    """ (str, pronouncing table, str) -> str
+
+    Return the stress patterns for the words in poem_line, found with
+    pronouncing_table, with each word's stress pattern starting at the same
+    index as the word.  Words with alternate pronunciations are read the
+    way that best fits the foot called foot_name (such as 'iambic'), or any
+    meter if foot_name is ''.
+
+    >>> get_stress_line('Fox  in socks', student.SMALL_TABLE)
+    '/    x  /    '
+    """
+
+    tokens = tokenizer.tokenize(poem_line)
+    return format_stress_line(poem_line, meter.choose_variant(
+        meter.get_token_variants(tokens, pronouncing_table), foot_name),
+        tokens)
+
+
+def annotate_poem(raw_poem, pronouncing_table, sound_patterns=False):
+    """ (str, pronouncing table, bool) -> dict of {str: list}
+
+    Return the annotated poem for raw_poem, using pronouncing_table.  If any
+    word has alternate pronunciations, the poem's meter is detected first
+    and those words are read the way that best fits it.  If sound_patterns
+    is True, the poem's sound patterns are found too.
+
+    >>> annotated = annotate_poem('Fox in box\\n\\n\\nSocks',
+    ...                           student.SMALL_TABLE)
+    >>> annotated['lines']
+    ['Fox in box', '', 'Socks']
+    >>> annotated['rhyme_scheme']
+    ['A', ' ', 'A']
+    """
+
+    poem_lines = student.convert_to_lines(raw_poem)
+    # each line is tokenized once, and its tokens used by every stage
+    line_tokens = []
+    line_variants = []
+    has_variants = False
+    for poem_line in poem_lines:
+        tokens = tokenizer.tokenize(poem_line)
+        line_tokens.append(tokens)
+        variants = meter.get_token_variants(tokens, pronouncing_table)
+        line_variants.append(variants)
+        if len(variants) > 1:
+            has_variants = True
+    foot_name = ''
+    if has_variants:
+        foot_name = meter.detect_meter_variants(line_variants)[0].split(' ')[0]
+    stress_patterns = []
+    for i in range(len(poem_lines)):
+        stress_patterns.append(format_stress_line(
+            poem_lines[i], meter.choose_variant(line_variants[i], foot_name),
+            line_tokens[i]))
+    rhyme_scheme = student.detect_rhyme_scheme(poem_lines, pronouncing_table,
+                                               line_tokens=line_tokens)
+    annotated = {'lines': poem_lines, 'stress_patterns': stress_patterns,
+                 'rhyme_scheme': rhyme_scheme}
+    if sound_patterns:
+        annotated['sound_patterns'] = sounds.find_sound_patterns(
+            poem_lines, pronouncing_table, line_tokens)
+    return annotated
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,239 @@
+"""
+Poem form recognition: rank how well a poem fits each of the fixed forms in
+FORMS (sonnet, limerick, haiku, rondeau and quintain), with a confidence
+score from 0.0 to 1.0 for each.
+
+The features of a poem are found once, in a single pass over its lines:
+the number of syllables in each line, the rhyme scheme from
+detect_rhyme_scheme and the sizes of its stanzas.  Every form is then
+scored from those features alone, so adding a form does not add another
+pass over the poem:
+  o lines: how close the number of poem lines is to the form's
+  o rhyme: the fraction of pairs of lines that rhyme in the poem exactly
+    when they rhyme in the form's rhyme scheme (the best of its schemes)
+  o syllables: how close each line's syllable count is to the form's
+  o stanzas: 1.0 if the poem has a single stanza or stanzas of one of the
+    form's stanza layouts, 0.5 otherwise
+The confidence is the weighted mean of those scores, using WEIGHTS.
+"""
+
+import stress_and_rhyme_functions as student
+import tokenizer
+
+# Each form: (name, rhyme schemes, syllables per line or None if the form
+# does not fix them, stanza layouts).  The number of lines is the length of
+# the rhyme schemes.  R marks a refrain.
+FORMS = [
+    ('sonnet',
+     ['ABBAABBACDECDE', 'ABBAABBACDCDCD', 'ABABCDCDEFEFGG',
+      'ABABBCBCCDCDEE'],
+     [10] * 14,
+     [[8, 6], [4, 4, 3, 3], [4, 4, 4, 2]]),
+    ('limerick', ['AABBA'], [8, 8, 5, 5, 8], [[5]]),
+    ('haiku', ['ABC'], [5, 7, 5], [[3]]),
+    ('rondeau', ['AABBAAABRAABBAR'],
+     [8, 8, 8, 8, 8, 8, 8, 8, 4, 8, 8, 8, 8, 8, 4],
+     [[5, 4, 6]]),
+    ('quintain', ['ABABB', 'ABAAB', 'ABBAB', 'AABAB'], None, [[5]])]
+
+# The weight of each score in the confidence.
+WEIGHTS = {'lines': 0.3, 'rhyme': 0.35, 'syllables': 0.25, 'stanzas': 0.1}
+
+
+class PoemFeatures(object):
+    """ The features of a poem that its form is recognized from.
+
+      o syllables[i]: the number of syllables in poem line i (blank lines
+        between stanzas are left out), counting only words in the table
+        unless it guesses missing words
+      o rhymes[i]: a number for the rhyme of poem line i; lines rhyme
+        exactly when their numbers are equal
+      o stanza_sizes: the number of poem lines in each stanza
+    """
+
+    def __init__(self, syllables, rhymes, stanza_sizes):
+        """ (PoemFeatures, list of int, list of int,
+             list of int) -> NoneType
+
+        Create the features of a poem.
+        """
+
+        self.syllables = syllables
+        self.rhymes = rhymes
+        self.stanza_sizes = stanza_sizes
+
+
+def get_poem_features(poem_lines, pronouncing_table):
+    """ (list of str, pronouncing table) -> PoemFeatures
+
+    Return the features of the poem in poem_lines, as returned by
+    convert_to_lines, using pronouncing_table.
+
+    >>> features = get_poem_features(['Fox in socks', '', 'A box', 'Tox'],
+    ...                              student.SMALL_TABLE)
+    >>> features.syllables
+    [3, 2, 0]
+    >>> features.rhymes
+    [0, 0, 2]
+    >>> features.stanza_sizes
+    [1, 2]
+    """
+
+    line_tokens = []
+    for poem_line in poem_lines:
+        line_tokens.append(tokenizer.tokenize(poem_line))
+    scheme = student.detect_rhyme_scheme(poem_lines, pronouncing_table,
+                                         line_tokens=line_tokens)
+    syllables = []
+    rhymes = []
+    stanza_sizes = [0]
+    letter_numbers = {}
+    for poem_line, tokens, letter in zip(poem_lines, line_tokens, scheme):
+        if poem_line == '':
+            stanza_sizes.append(0)
+            continue
+        count = 0
+        for token in tokens:
+            count += len(student.look_up_stress_digits(token[1],
+                                                       pronouncing_table))
+        syllables.append(count)
+        # each rhyme is numbered by the first line with it; a line whose last
+        # word is not in the table rhymes with no other
+        if letter == ' ':
+            rhymes.append(len(rhymes))
+        else:
+            if letter not in letter_numbers:
+                letter_numbers[letter] = len(rhymes)
+            rhymes.append(letter_numbers[letter])
+        stanza_sizes[-1] += 1
+    return PoemFeatures(syllables, rhymes, stanza_sizes)
+
+
+def _closeness(value, target):
+    """ (number, number) -> float
+
+    Return 1.0 if value is target, falling linearly to 0.0 as value moves
+    away from target, reaching 0.0 at a distance of target.
+
+    >>> _closeness(12, 10)
+    0.8
+    """
+
+    return max(0.0, 1.0 - abs(value - target) / target)
+
+
+def _rhyme_agreement(rhymes, scheme):
+    """ (list of int, str) -> float
+
+    Return the fraction of pairs of the first len(scheme) lines with rhymes
+    rhymes that rhyme exactly when scheme says they do.
+
+    >>> _rhyme_agreement([0, 0, 2, 2, 0], 'AABBA')
+    1.0
+    >>> _rhyme_agreement([0, 1, 0, 1, 1], 'AABBA')
+    0.4
+    """
+
+    count = min(len(rhymes), len(scheme))
+    pairs = count * (count - 1) // 2
+    if pairs == 0:
+        return 0.0
+    # Rather than compare every pair, count the pairs that rhyme in the poem,
+    # in the scheme and in both: a pair disagrees when it rhymes in just one.
+    poem_groups = {}
+    scheme_groups = {}
+    both_groups = {}
+    for i in range(count):
+        poem_groups[rhymes[i]] = poem_groups.get(rhymes[i], 0) + 1
+        scheme_groups[scheme[i]] = scheme_groups.get(scheme[i], 0) + 1
+        both = (rhymes[i], scheme[i])
+        both_groups[both] = both_groups.get(both, 0) + 1
+    disagreeing = (_count_pairs(poem_groups) + _count_pairs(scheme_groups) -
+                   2 * _count_pairs(both_groups))
+    return (pairs - disagreeing) / pairs
+
+
+def _count_pairs(group_sizes):
+    """ (dict of {object: int}) -> int
+
+    Return the number of pairs within the same group, for groups with the
+    sizes in group_sizes.
+
+    >>> _count_pairs({'A': 3, 'B': 1})
+    3
+    """
+
+    total = 0
+    for size in group_sizes.values():
+        total += size * (size - 1) // 2
+    return total
+
+
+def score_form(features, form):
+    """ (PoemFeatures, tuple) -> float
+
+    Return the confidence that a poem with features features is written in
+    form, an item of FORMS.
+
+    >>> features = PoemFeatures([5, 7, 5], [0, 1, 2], [3])
+    >>> score_form(features, FORMS[2])
+    1.0
+    """
+
+    name, schemes, syllables, layouts = form
+    lines = len(features.rhymes)
+    if lines == 0:
+        return 0.0
+    scores = {}
+    scores['lines'] = _closeness(lines, len(schemes[0]))
+    scores['rhyme'] = max([_rhyme_agreement(features.rhymes, scheme)
+                           for scheme in schemes])
+    if syllables is not None:
+        count = min(lines, len(syllables))
+        total = 0.0
+        for i in range(count):
+            total += _closeness(features.syllables[i], syllables[i])
+        scores['syllables'] = total / count
+    if len(features.stanza_sizes) == 1 or features.stanza_sizes in layouts:
+        scores['stanzas'] = 1.0
+    else:
+        scores['stanzas'] = 0.5
+
+    weighted = 0.0
+    weights = 0.0
+    for score_name in scores:
+        weighted += WEIGHTS[score_name] * scores[score_name]
+        weights += WEIGHTS[score_name]
+    return round(weighted / weights, 4)
+
+
+def rank_features(features):
+    """ (PoemFeatures) -> list of tuple of (str, float)
+
+    Return (form name, confidence) for every form in FORMS for a poem with
+    features features, the most likely form first.
+
+    >>> rank_features(PoemFeatures([5, 7, 5], [0, 1, 2], [3]))[0]
+    ('haiku', 1.0)
+    """
+
+    ranking = []
+    for form in FORMS:
+        ranking.append((form[0], score_form(features, form)))
+    ranking.sort(key=lambda item: item[1], reverse=True)
+    return ranking
+
+
+def rank_forms(poem_lines, pronouncing_table):
+    """ (list of str, pronouncing table) -> list of tuple of (str, float)
+
+    Return (form name, confidence) for every form in FORMS for the poem in
+    poem_lines, using pronouncing_table, the most likely form first.
+    """
+
+    return rank_features(get_poem_features(poem_lines, pronouncing_table))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
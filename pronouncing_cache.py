@@ -0,0 +1,143 @@
+"""
+A compiled cache of a parsed pronouncing dictionary file.
+
+The cache is written next to the dictionary file (with CACHE_SUFFIX added to
+its name) and records the size, modification time and SHA-1 hash of the
+dictionary file it was built from.  It is only used while all three still
+match, so editing the dictionary file makes the cache rebuild itself.
+"""
+
+import hashlib
+import marshal
+import os
+
+import pronouncing_table
+
+# Added to the dictionary file name to get the cache file name.
+CACHE_SUFFIX = '.cache'
+
+# Bump whenever the layout of the cached data changes.
+CACHE_VERSION = 4
+
+
+def get_cache_filename(filename):
+    """ (str) -> str
+
+    Return the name of the cache file for dictionary file filename.
+
+    >>> get_cache_filename('our_dictionary.txt')
+    'our_dictionary.txt.cache'
+    """
+
+    return filename + CACHE_SUFFIX
+
+
+def get_fingerprint(filename):
+    """ (str) -> tuple of (int, int, str)
+
+    Return the size, modification time (in nanoseconds) and SHA-1 hex digest
+    of file filename.
+
+    Docstring example(s) not given since this function depends on file input.
+    """
+
+    digest = hashlib.sha1()
+    dictionary_file = open(filename, 'rb')
+    chunk = dictionary_file.read(1 << 20)
+    while chunk:
+        digest.update(chunk)
+        chunk = dictionary_file.read(1 << 20)
+    dictionary_file.close()
+
+    status = os.stat(filename)
+    return (status.st_size, status.st_mtime_ns, digest.hexdigest())
+
+
+def load_cached_table(filename):
+    """ (str) -> PronouncingTable or NoneType
+
+    Return the pronouncing table cached for dictionary file filename, or
+    None if there is no cache or it was built from a different version of
+    the file.
+
+    Docstring example(s) not given since this function depends on file input.
+    """
+
+    cache_filename = get_cache_filename(filename)
+    if not os.path.exists(cache_filename):
+        return None
+
+    try:
+        cache_file = open(cache_filename, 'rb')
+        try:
+            # marshal.loads on the whole file is much faster than
+            # marshal.load, which reads the file a few bytes at a time.
+            (version, fingerprint, words, phonemes, codes, offsets,
+             columns) = marshal.loads(cache_file.read())
+        finally:
+            cache_file.close()
+    except (OSError, EOFError, ValueError, TypeError):
+        # An unreadable or truncated cache is rebuilt like a stale one.
+        return None
+
+    if version != CACHE_VERSION or fingerprint != get_fingerprint(filename):
+        return None
+
+    # The codes were written with the codebook of the process that wrote the
+    # cache, which may have added phonemes in a different order than this
+    # one.  If so, translate them to this process's codes.
+    if phonemes != pronouncing_table.PHONEMES[:len(phonemes)]:
+        translation = bytearray(range(256))
+        for old_code in range(len(phonemes)):
+            translation[old_code] = pronouncing_table.add_phoneme(
+                phonemes[old_code])
+        codes = codes.translate(translation)
+        # The rhyme keys are codes too; the other columns do not change.
+        rhyme_keys = []
+        for rhyme_key in columns[0]:
+            if rhyme_key is not None:
+                rhyme_key = rhyme_key.translate(translation)
+            rhyme_keys.append(rhyme_key)
+        columns = (rhyme_keys,) + tuple(columns[1:])
+
+    pronunciations = pronouncing_table.PronunciationColumn.from_buffers(
+        codes, offsets)
+    return pronouncing_table.PronouncingTable(words, pronunciations, columns)
+
+
+def save_cached_table(filename, table):
+    """ (str, pronouncing table) -> bool
+
+    Write table to the cache file for dictionary file filename.  Return
+    True if the cache was written, or False if it could not be (for example
+    because the folder is read-only).
+
+    Docstring example(s) not given since this function writes a file.
+    """
+
+    cache_filename = get_cache_filename(filename)
+    temporary_filename = cache_filename + '.tmp'
+    # The pronunciations are written as their phoneme codes, along with the
+    # codebook needed to read the codes back and the precomputed columns.
+    if not isinstance(table, pronouncing_table.PronouncingTable):
+        table = pronouncing_table.PronouncingTable(table[0], table[1])
+    codes, offsets = table[1].get_buffers()
+    data = (CACHE_VERSION, get_fingerprint(filename), list(table[0]),
+            list(pronouncing_table.PHONEMES), codes, offsets,
+            table.get_columns())
+    try:
+        cache_file = open(temporary_filename, 'wb')
+        try:
+            marshal.dump(data, cache_file)
+        finally:
+            cache_file.close()
+        # Replace the old cache in one step so readers never see half of it.
+        os.replace(temporary_filename, cache_filename)
+    except OSError:
+        return False
+    return True
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,722 @@
+"""
+A PronouncingTable is a pronouncing table (see stress_and_rhyme_functions)
+that also remembers where each word is stored, so that looking up a word
+does not require scanning the whole list of words.
+
+It is still a two item list, [list of str, list of list of str], so any code
+that works with a plain pronouncing table works with a PronouncingTable too.
+Alternate pronunciations, given in the CMU Pronouncing Dictionary as entries
+such as READ(1) right after READ, are rows of their own; the table records
+which rows are variants of the same word (see get_variant_rows).
+Its pronunciations are kept compactly in a PronunciationColumn: every
+phoneme is stored as a one byte code from the phoneme codebook, and the
+codes of all pronunciations are kept in one contiguous array.
+"""
+
+from array import array
+
+# The phoneme codebook: the phoneme with code c is PHONEMES[c].  It starts
+# with the phonemes of the CMU Pronouncing Dictionary; phonemes from other
+# dictionaries are added when first seen (see add_phoneme).
+PHONEMES = []
+
+# The code of each phoneme in PHONEMES.
+PHONEME_CODES = {}
+
+# Maps a vowel phoneme code to the byte of its stress digit; consonant codes
+# map to 0.  Used with bytes.translate to pull the stress digits out of a
+# pronunciation.
+_STRESS_DIGIT_TABLE = bytearray(256)
+
+# The codes of all consonant phonemes, deleted by bytes.translate when
+# pulling the stress digits out of a pronunciation.
+_CONSONANT_CODES = bytearray()
+
+# Maps a vowel phoneme code to 1 and a consonant code to 0.  Used with
+# bytes.translate to find vowels without a Python loop.
+_VOWEL_MASK = bytearray(256)
+
+# The most phonemes that fit in a one byte code.
+MAX_PHONEMES = 256
+
+
+def add_phoneme(phoneme):
+    """ (str) -> int
+
+    Return the code for phoneme, adding phoneme to the codebook if it is
+    not already there.  Like is_vowel_phoneme, a phoneme is a vowel if it
+    ends with a digit.
+
+    >>> PHONEMES[add_phoneme('AE0')]
+    'AE0'
+    """
+
+    code = PHONEME_CODES.get(phoneme)
+    if code is not None:
+        return code
+    if len(PHONEMES) == MAX_PHONEMES:
+        raise ValueError('too many distinct phonemes: ' + phoneme)
+
+    code = len(PHONEMES)
+    PHONEMES.append(phoneme)
+    PHONEME_CODES[phoneme] = code
+    if phoneme[-1].isnumeric():
+        _STRESS_DIGIT_TABLE[code] = ord(phoneme[-1])
+        _VOWEL_MASK[code] = 1
+    else:
+        _CONSONANT_CODES.append(code)
+    return code
+
+
+for _vowel in ['AA', 'AE', 'AH', 'AO', 'AW', 'AY', 'EH', 'ER', 'EY', 'IH',
+               'IY', 'OW', 'OY', 'UH', 'UW']:
+    for _stress in '012':
+        add_phoneme(_vowel + _stress)
+for _consonant in ['B', 'CH', 'D', 'DH', 'F', 'G', 'HH', 'JH', 'K', 'L', 'M',
+                   'N', 'NG', 'P', 'R', 'S', 'SH', 'T', 'TH', 'V', 'W', 'Y',
+                   'Z', 'ZH']:
+    add_phoneme(_consonant)
+
+
+def encode_pronunciation(phonemes):
+    """ (list of str) -> bytes
+
+    Return the codes of the phonemes in phonemes.
+
+    >>> decode_pronunciation(encode_pronunciation(['B', 'AA1', 'K', 'S']))
+    ['B', 'AA1', 'K', 'S']
+    """
+
+    codes = bytearray()
+    for phoneme in phonemes:
+        code = PHONEME_CODES.get(phoneme)
+        if code is None:
+            code = add_phoneme(phoneme)
+        codes.append(code)
+    return bytes(codes)
+
+
+def decode_pronunciation(codes):
+    """ (bytes) -> list of str
+
+    Return the phonemes for the phoneme codes in codes.  The phonemes are
+    the codebook's own strings, so no new strings are made.
+
+    >>> decode_pronunciation(bytes([PHONEME_CODES['IH0'], PHONEME_CODES['N']]))
+    ['IH0', 'N']
+    """
+
+    phonemes = PHONEMES
+    return [phonemes[code] for code in codes]
+
+
+def is_vowel_code(code):
+    """ (int) -> bool
+
+    Return True if and only if code is the code of a vowel phoneme.
+
+    >>> is_vowel_code(PHONEME_CODES['AE0'])
+    True
+    >>> is_vowel_code(PHONEME_CODES['K'])
+    False
+    """
+
+    return _STRESS_DIGIT_TABLE[code] != 0
+
+
+def find_last_vowel(codes):
+    """ (bytes) -> int
+
+    Return the index of the last vowel phoneme code in codes, or -1 if there
+    is no vowel phoneme code in codes.
+
+    >>> find_last_vowel(encode_pronunciation(['D', 'OW1', 'N', 'T']))
+    1
+    >>> find_last_vowel(encode_pronunciation(['SH']))
+    -1
+    """
+
+    return codes.translate(_VOWEL_MASK).rfind(1)
+
+
+def get_stress_digits(codes):
+    """ (bytes) -> str
+
+    Return the stress digits of the vowel phonemes in codes, in order.
+
+    >>> get_stress_digits(encode_pronunciation(['K', 'AH0', 'N', 'S', 'IH1',
+    ...                                         'S', 'T', 'AH0', 'N', 'T']))
+    '010'
+    """
+
+    return codes.translate(_STRESS_DIGIT_TABLE, _CONSONANT_CODES).decode(
+        'ascii')
+
+
+class PronunciationColumn(object):
+    """ The pronunciations of a pronouncing table, stored as phoneme codes.
+
+    The codes of pronunciation i are codes[offsets[i]:offsets[i + 1]].
+    Reading item i gives a new list of the codebook's phoneme strings, so a
+    PronunciationColumn can be used wherever a list of pronunciations is.
+    """
+
+    def __init__(self, pronunciations=None):
+        """ (PronunciationColumn, list of list of str) -> NoneType
+
+        Create a column holding the pronunciations in pronunciations.
+
+        >>> PronunciationColumn([['AH0'], ['IH0', 'N']])
+        [['AH0'], ['IH0', 'N']]
+        """
+
+        self.codes = array('B')
+        self.offsets = array('I', [0])
+        if pronunciations is not None:
+            for pronunciation in pronunciations:
+                self.append(pronunciation)
+
+    @classmethod
+    def from_buffers(cls, codes, offsets):
+        """ (bytes, bytes) -> PronunciationColumn
+
+        Return a column that uses the phoneme codes codes and the machine
+        representation of the offsets array offsets, as saved by
+        get_buffers.
+
+        >>> column = PronunciationColumn([['AH0'], ['IH0', 'N']])
+        >>> PronunciationColumn.from_buffers(*column.get_buffers()) == column
+        True
+        """
+
+        column = cls()
+        column.codes.frombytes(codes)
+        column.offsets = array('I')
+        column.offsets.frombytes(offsets)
+        return column
+
+    def get_buffers(self):
+        """ (PronunciationColumn) -> tuple of (bytes, bytes)
+
+        Return the codes and the offsets of the column as bytes.
+        """
+
+        return self.codes.tobytes(), self.offsets.tobytes()
+
+    def append(self, pronunciation):
+        """ (PronunciationColumn, list of str) -> NoneType
+
+        Append pronunciation to the end of the column.
+        """
+
+        self.extend_codes([encode_pronunciation(pronunciation)])
+
+    def extend_codes(self, codes_list):
+        """ (PronunciationColumn, list of bytes) -> NoneType
+
+        Append the pronunciations with the phoneme codes in codes_list to the
+        end of the column.
+
+        >>> column = PronunciationColumn([['AH0']])
+        >>> column.extend_codes([encode_pronunciation(['IH0', 'N'])])
+        >>> column
+        [['AH0'], ['IH0', 'N']]
+        """
+
+        end = len(self.codes)
+        offsets = array('I', [0]) * len(codes_list)
+        for i in range(len(codes_list)):
+            end += len(codes_list[i])
+            offsets[i] = end
+        self.codes.frombytes(b''.join(codes_list))
+        self.offsets.extend(offsets)
+
+    def get_codes(self, row):
+        """ (PronunciationColumn, int) -> bytes
+
+        Return the phoneme codes of the pronunciation at row.
+
+        >>> column = PronunciationColumn([['AH0'], ['IH0', 'N']])
+        >>> decode_pronunciation(column.get_codes(1))
+        ['IH0', 'N']
+        """
+
+        offsets = self.offsets
+        return self.codes[offsets[row]:offsets[row + 1]].tobytes()
+
+    def __len__(self):
+        """ (PronunciationColumn) -> int
+
+        Return the number of pronunciations in the column.
+        """
+
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        """ (PronunciationColumn, int or slice) -> list
+
+        Return the pronunciation at row, or a list of the pronunciations in
+        the slice row.
+        """
+
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('pronunciation row out of range')
+        return decode_pronunciation(self.get_codes(row))
+
+    def __iter__(self):
+        """ (PronunciationColumn) -> iterator
+
+        Yield each pronunciation in the column in order.
+        """
+
+        for row in range(len(self)):
+            yield decode_pronunciation(self.get_codes(row))
+
+    def __eq__(self, other):
+        """ (PronunciationColumn, object) -> bool
+
+        Return True if and only if other holds the same pronunciations in the
+        same order.  other may be a list of pronunciations.
+        """
+
+        if isinstance(other, PronunciationColumn):
+            return (self.codes == other.codes and
+                    self.offsets == other.offsets)
+        if not isinstance(other, (list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and list(self) == list(other)
+
+    def __ne__(self, other):
+        """ (PronunciationColumn, object) -> bool
+
+        Return True if and only if self == other is False.
+        """
+
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __repr__(self):
+        """ (PronunciationColumn) -> str
+
+        Return the same representation as a list of the pronunciations.
+        """
+
+        return repr(list(self))
+
+
+class PronouncingTable(list):
+    """ A pronouncing table with a dict index from each word to its row.
+
+    Besides the words and pronunciations, the table keeps precomputed
+    columns for every row so that annotating a poem only reads them:
+      o the rhyme key (the codes of the last syllable, or None if the
+        pronunciation has no vowel), stored as an id into rhyme_keys
+      o the stress digits, stored as an id into stress_patterns
+      o the syllable count
+
+    Indexes built from the table (such as the rhyme index) are kept in the
+    derived dict, so they are built once; adding a word clears them.
+
+    If guess_missing is True, words that are not in the table are given a
+    guessed pronunciation (see pronunciation_guess) when they are looked up.
+
+    A word with alternate pronunciations (READ followed by READ(1), ...)
+    has them in the rows right after its first row; variant_ends maps the
+    first row of each such word to the row after its last variant.  Words
+    with one pronunciation, nearly all of them, are not in variant_ends.
+    """
+
+    def __init__(self, words=None, pronunciations=None, columns=None):
+        """ (PronouncingTable, list of str, list of list of str,
+             tuple) -> NoneType
+
+        Create a pronouncing table for the parallel lists words and
+        pronunciations.  pronunciations may also be a PronunciationColumn,
+        which is used as is.  If a word appears more than once, the first
+        row for that word is the one found by find_row.
+
+        columns, if given, are precomputed columns returned by get_columns
+        for the same pronunciations; otherwise they are computed here.
+
+        >>> table = PronouncingTable(['BOX', 'FOX'], [['B', 'AA1', 'K', 'S'],
+        ...                                           ['F', 'AA1', 'K', 'S']])
+        >>> table == [['BOX', 'FOX'], [['B', 'AA1', 'K', 'S'],
+        ...                            ['F', 'AA1', 'K', 'S']]]
+        True
+        """
+
+        if words is None:
+            words = []
+        if not isinstance(pronunciations, PronunciationColumn):
+            pronunciations = PronunciationColumn(pronunciations)
+        list.__init__(self, [words, pronunciations])
+        self.derived = {}
+        self.guess_missing = False
+        self.word_rows = {}
+        self.variant_ends = {}
+        for row in range(len(words)):
+            self._index_word(words[row], row)
+
+        if columns is None:
+            self.rhyme_keys = [None]
+            self.rhyme_ids = array('I')
+            self.stress_patterns = []
+            self.stress_ids = array('I')
+            self.syllable_counts = array('B')
+            self._rhyme_key_ids = {None: 0}
+            self._stress_pattern_ids = {}
+            self._add_columns([pronunciations.get_codes(row)
+                               for row in range(len(pronunciations))])
+        else:
+            self.rhyme_keys = columns[0]
+            self.rhyme_ids = array('I', columns[1])
+            self.stress_patterns = columns[2]
+            self.stress_ids = array('I', columns[3])
+            self.syllable_counts = array('B', columns[4])
+            self._rhyme_key_ids = {}
+            for i in range(len(self.rhyme_keys)):
+                self._rhyme_key_ids[self.rhyme_keys[i]] = i
+            self._stress_pattern_ids = {}
+            for i in range(len(self.stress_patterns)):
+                self._stress_pattern_ids[self.stress_patterns[i]] = i
+
+    def _index_word(self, word, row):
+        """ (PronouncingTable, str, int) -> NoneType
+
+        Index word, stored at row.  An alternate pronunciation that follows
+        the rows of its word is recorded as one of its variants.
+        """
+
+        self.word_rows.setdefault(word, row)
+        base = get_variant_base(word)
+        if base != word:
+            first = self.word_rows.get(base)
+            if first is not None and self.variant_ends.get(first,
+                                                           first + 1) == row:
+                self.variant_ends[first] = row + 1
+
+    def _add_columns(self, codes_list):
+        """ (PronouncingTable, list of bytes) -> NoneType
+
+        Append the precomputed columns for each of the pronunciation codes in
+        codes_list.
+        """
+
+        rhyme_keys = self.rhyme_keys
+        rhyme_key_ids = self._rhyme_key_ids
+        stress_patterns = self.stress_patterns
+        stress_pattern_ids = self._stress_pattern_ids
+        rhyme_ids = array('I', [0]) * len(codes_list)
+        stress_ids = array('I', [0]) * len(codes_list)
+        syllable_counts = bytearray(len(codes_list))
+        for i in range(len(codes_list)):
+            codes = codes_list[i]
+            last_index = codes.translate(_VOWEL_MASK).rfind(1)
+            if last_index == -1:
+                rhyme_key = None
+            else:
+                rhyme_key = codes[last_index:]
+            rhyme_id = rhyme_key_ids.get(rhyme_key)
+            if rhyme_id is None:
+                rhyme_id = len(rhyme_keys)
+                rhyme_key_ids[rhyme_key] = rhyme_id
+                rhyme_keys.append(rhyme_key)
+            rhyme_ids[i] = rhyme_id
+
+            stress_digits = codes.translate(_STRESS_DIGIT_TABLE,
+                                            _CONSONANT_CODES).decode('ascii')
+            stress_id = stress_pattern_ids.get(stress_digits)
+            if stress_id is None:
+                stress_id = len(stress_patterns)
+                stress_pattern_ids[stress_digits] = stress_id
+                stress_patterns.append(stress_digits)
+            stress_ids[i] = stress_id
+            syllable_counts[i] = min(len(stress_digits), 255)
+        self.rhyme_ids.extend(rhyme_ids)
+        self.stress_ids.extend(stress_ids)
+        self.syllable_counts.frombytes(syllable_counts)
+
+    def get_columns(self):
+        """ (PronouncingTable) -> tuple
+
+        Return the precomputed columns as plain lists and bytes, ready to be
+        saved and passed back to PronouncingTable.
+        """
+
+        return (list(self.rhyme_keys), self.rhyme_ids.tobytes(),
+                list(self.stress_patterns), self.stress_ids.tobytes(),
+                self.syllable_counts.tobytes())
+
+    def add_word(self, word, pronunciation):
+        """ (PronouncingTable, str, list of str) -> NoneType
+
+        Append word and its pronunciation to the table and index it.
+
+        >>> table = PronouncingTable()
+        >>> table.add_word('BOX', ['B', 'AA1', 'K', 'S'])
+        >>> table
+        [['BOX'], [['B', 'AA1', 'K', 'S']]]
+        """
+
+        self.add_word_codes(word, encode_pronunciation(pronunciation))
+
+    def add_word_codes(self, word, codes):
+        """ (PronouncingTable, str, bytes) -> NoneType
+
+        Append word and the pronunciation with phoneme codes codes to the
+        table and index it, without building a list of phonemes.
+
+        >>> table = PronouncingTable()
+        >>> table.add_word_codes('FOX', encode_pronunciation(['F', 'AA1']))
+        >>> table
+        [['FOX'], [['F', 'AA1']]]
+        """
+
+        self.add_words_codes([word], [codes])
+
+    def add_words_codes(self, words, codes_list):
+        """ (PronouncingTable, list of str, list of bytes) -> NoneType
+
+        Append the words in words and the pronunciations with the parallel
+        phoneme codes in codes_list, and index them.  Adding many words at
+        once is much faster than adding them one at a time.
+
+        >>> table = PronouncingTable()
+        >>> table.add_words_codes(['A', 'A(1)'],
+        ...                       [encode_pronunciation(['AH0']),
+        ...                        encode_pronunciation(['EY1'])])
+        >>> table.variant_ends
+        {0: 2}
+        """
+
+        word_rows = self.word_rows
+        row = len(self[0])
+        for word in words:
+            if '(' in word:
+                self._index_word(word, row)
+            elif word not in word_rows:
+                word_rows[word] = row
+            row += 1
+        self[0].extend(words)
+        self[1].extend_codes(codes_list)
+        self._add_columns(codes_list)
+        if self.derived:
+            self.derived.clear()
+
+    def get_rhyme_key(self, row):
+        """ (PronouncingTable, int) -> bytes
+
+        Return the codes of the last syllable of the pronunciation at row,
+        or None if it has no vowel phoneme.
+
+        >>> table = PronouncingTable(['FOX'], [['F', 'AA1', 'K', 'S']])
+        >>> decode_pronunciation(table.get_rhyme_key(0))
+        ['AA1', 'K', 'S']
+        """
+
+        return self.rhyme_keys[self.rhyme_ids[row]]
+
+    def get_stress_digits(self, row):
+        """ (PronouncingTable, int) -> str
+
+        Return the stress digits of the pronunciation at row.
+
+        >>> table = PronouncingTable(['IN', 'BOX'], [['IH0', 'N'],
+        ...                                          ['B', 'AA1', 'K', 'S']])
+        >>> table.get_stress_digits(1)
+        '1'
+        """
+
+        return self.stress_patterns[self.stress_ids[row]]
+
+    def get_syllable_count(self, row):
+        """ (PronouncingTable, int) -> int
+
+        Return the number of syllables (vowel phonemes) at row.
+
+        >>> table = PronouncingTable(['IN', 'BOX'], [['IH0', 'N'],
+        ...                                          ['B', 'AA1', 'K', 'S']])
+        >>> table.get_syllable_count(0)
+        1
+        """
+
+        return self.syllable_counts[row]
+
+    def get_variant_rows(self, row):
+        """ (PronouncingTable, int) -> range
+
+        Return the rows of all pronunciations of the word at row, which is
+        the first row of that word.
+
+        >>> table = PronouncingTable(['READ', 'READ(1)'],
+        ...                          [['R', 'EH1', 'D'], ['R', 'IY1', 'D']])
+        >>> list(table.get_variant_rows(table.find_row('READ')))
+        [0, 1]
+        """
+
+        return range(row, self.variant_ends.get(row, row + 1))
+
+    def find_row(self, word):
+        """ (PronouncingTable, str) -> int
+
+        Return the row of word in the table, or -1 if word is not in the
+        table.  word must already be prepared (see prepare_word).
+
+        >>> table = PronouncingTable(['BOX', 'FOX'], [['B', 'AA1', 'K', 'S'],
+        ...                                           ['F', 'AA1', 'K', 'S']])
+        >>> table.find_row('FOX')
+        1
+        >>> table.find_row('SOCKS')
+        -1
+        """
+
+        return self.word_rows.get(word, -1)
+
+
+def get_variant_base(word):
+    """ (str) -> str
+
+    Return the word that word is an alternate pronunciation of, for entries
+    such as READ(1), or word itself if it is not an alternate.
+
+    >>> get_variant_base('READ(1)')
+    'READ'
+    >>> get_variant_base('READ')
+    'READ'
+    """
+
+    if word.endswith(')'):
+        start = word.rfind('(')
+        if start > 0 and word[start + 1:-1].isdigit():
+            return word[:start]
+    return word
+
+
+def get_variant_rows(row, pronouncing_table):
+    """ (int, pronouncing table) -> sequence of int
+
+    Return the rows of all pronunciations of the word at row of
+    pronouncing_table, which is the first row of that word.  Tables that
+    keep track of variants are asked directly; in a plain nested list, the
+    variants are the rows right after row.
+
+    >>> list(get_variant_rows(0, [['LIVE', 'LIVE(1)', 'LIVED'],
+    ...     [['L', 'IH1', 'V'], ['L', 'AY1', 'V'], ['L', 'IH1', 'V', 'D']]]))
+    [0, 1]
+    """
+
+    if hasattr(pronouncing_table, 'get_variant_rows'):
+        return pronouncing_table.get_variant_rows(row)
+    words = pronouncing_table[0]
+    end = row + 1
+    while end < len(words) and get_variant_base(words[end]) == words[row]:
+        end += 1
+    return range(row, end)
+
+
+def find_row(word, pronouncing_table):
+    """ (str, pronouncing table) -> int
+
+    Return the row of the prepared word in pronouncing_table, or -1 if it is
+    not there.  Tables that keep an index (such as PronouncingTable) are
+    looked up directly; a plain nested list is scanned from the start.
+
+    >>> find_row('FOX', [['BOX', 'FOX'], [['B', 'AA1', 'K', 'S'],
+    ...                                   ['F', 'AA1', 'K', 'S']]])
+    1
+    """
+
+    if hasattr(pronouncing_table, 'find_row'):
+        return pronouncing_table.find_row(word)
+    row = 0
+    for w in pronouncing_table[0]:
+        if w == word:
+            return row
+        row += 1
+    return -1
+
+
+def get_derived(pronouncing_table, name, build):
+    """ (pronouncing table, str, function) -> object
+
+    Return the index called name that build(pronouncing_table) makes from
+    pronouncing_table.  Tables with a derived dict (such as PronouncingTable)
+    build each index once and keep it; for other tables it is rebuilt on
+    every call.
+
+    >>> table = PronouncingTable(['IN'], [['IH0', 'N']])
+    >>> get_derived(table, 'size', len) is get_derived(table, 'size', None)
+    True
+    """
+
+    derived = getattr(pronouncing_table, 'derived', None)
+    if derived is None:
+        return build(pronouncing_table)
+    if name not in derived:
+        derived[name] = build(pronouncing_table)
+    return derived[name]
+
+
+def get_codes(row, pronouncing_table):
+    """ (int, pronouncing table) -> bytes
+
+    Return the phoneme codes of the pronunciation at row of
+    pronouncing_table, encoding the pronunciation if the table does not
+    already store codes.
+
+    >>> get_codes(0, [['IN'], [['IH0', 'N']]]) == encode_pronunciation(
+    ...     ['IH0', 'N'])
+    True
+    """
+
+    pronunciations = pronouncing_table[1]
+    if hasattr(pronunciations, 'get_codes'):
+        return pronunciations.get_codes(row)
+    return encode_pronunciation(pronunciations[row])
+
+
+def get_rhyme_key(row, pronouncing_table):
+    """ (int, pronouncing table) -> bytes
+
+    Return the codes of the last syllable of the pronunciation at row of
+    pronouncing_table, or None if it has no vowel phoneme.  The precomputed
+    column is used when the table has one.
+
+    >>> decode_pronunciation(get_rhyme_key(0, [['IN'], [['IH0', 'N']]]))
+    ['IH0', 'N']
+    """
+
+    if hasattr(pronouncing_table, 'get_rhyme_key'):
+        return pronouncing_table.get_rhyme_key(row)
+    codes = get_codes(row, pronouncing_table)
+    last_index = find_last_vowel(codes)
+    if last_index == -1:
+        return None
+    return codes[last_index:]
+
+
+def get_row_stress_digits(row, pronouncing_table):
+    """ (int, pronouncing table) -> str
+
+    Return the stress digits of the pronunciation at row of
+    pronouncing_table.  The precomputed column is used when the table has
+    one.
+
+    >>> get_row_stress_digits(0, [['IN'], [['IH0', 'N']]])
+    '0'
+    """
+
+    if hasattr(pronouncing_table, 'get_stress_digits'):
+        return pronouncing_table.get_stress_digits(row)
+    return get_stress_digits(get_codes(row, pronouncing_table))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
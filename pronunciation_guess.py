@@ -0,0 +1,388 @@
+"""
+Best-guess pronunciations for words that are not in the pronouncing table.
+
+A missing word is guessed in two ways, in order:
+  o as an inflected form of a word that is in the table: the stem's
+    pronunciation followed by the suffix's, as in DOGS (DOG + Z), PLANTED
+    (PLANT + IH0 D), MAKING (MAKE + IH0 NG) or CITIES (CITY + Z)
+  o by letter-to-sound rules: each run of letters in LETTER_RULES, longest
+    first, becomes its phonemes, with a silent final E lengthening the vowel
+    before it.  The first vowel gets primary stress and the others none.
+    The rules get the end of a word wrong more often than not, so the last
+    syllable is then taken from the table word whose spelling shares the
+    longest ending with the missing word (BLORPTASTIC ends like FANTASTIC),
+    found by binary search in the table's words sorted back to front.
+
+Guesses are memoized per table in a bounded LRU cache, so guessing the same
+word again costs one dict lookup; get_guess_stats reports the cache's hits
+and misses.
+"""
+
+import bisect
+import functools
+
+import pronouncing_table as table_index
+
+# The most guesses remembered per pronouncing table.
+GUESS_CACHE_SIZE = 4096
+
+# The name the guess cache is kept under in a table's derived indexes.
+GUESSES = 'pronunciation guesses'
+
+# The name the words sorted back to front are kept under in a table's derived
+# indexes.
+SPELLING_ENDINGS = 'spelling endings'
+
+# The fewest letters a missing word must share with the end of a table word
+# to take its last syllable from it.
+MIN_SHARED_ENDING = 3
+
+# Letter-to-sound rules: a run of letters and its phonemes.  A vowel without
+# a stress digit is given one by _add_stress.
+LETTER_RULES = {
+    'TION': ['SH', 'AH0', 'N'], 'SION': ['ZH', 'AH0', 'N'],
+    'OUGH': ['AO'], 'EIGH': ['EY'], 'IGH': ['AY'], 'TCH': ['CH'],
+    'QU': ['K', 'W'], 'CK': ['K'], 'CH': ['CH'], 'SH': ['SH'],
+    'TH': ['TH'], 'PH': ['F'], 'WH': ['W'], 'NG': ['NG'], 'GH': [],
+    'KN': ['N'], 'WR': ['R'], 'EE': ['IY'], 'EA': ['IY'], 'OO': ['UW'],
+    'OA': ['OW'], 'OU': ['AW'], 'OW': ['OW'], 'OI': ['OY'], 'OY': ['OY'],
+    'AI': ['EY'], 'AY': ['EY'], 'AU': ['AO'], 'AW': ['AO'], 'EI': ['EY'],
+    'EY': ['IY'], 'IE': ['IY'], 'UE': ['UW'], 'EW': ['UW'],
+    'AR': ['AA', 'R'], 'OR': ['AO', 'R'], 'ER': ['ER'], 'IR': ['ER'],
+    'UR': ['ER'],
+    'A': ['AE'], 'E': ['EH'], 'I': ['IH'], 'O': ['AA'], 'U': ['AH'],
+    'B': ['B'], 'C': ['K'], 'D': ['D'], 'F': ['F'], 'G': ['G'],
+    'H': ['HH'], 'J': ['JH'], 'K': ['K'], 'L': ['L'], 'M': ['M'],
+    'N': ['N'], 'P': ['P'], 'Q': ['K'], 'R': ['R'], 'S': ['S'],
+    'T': ['T'], 'V': ['V'], 'W': ['W'], 'X': ['K', 'S'], 'Z': ['Z']}
+
+# The longest run of letters in LETTER_RULES.
+LONGEST_RULE = 4
+
+# The long sound of a vowel letter before a consonant and a silent final E.
+LONG_VOWELS = {'A': 'EY', 'E': 'IY', 'I': 'AY', 'O': 'OW', 'U': 'UW'}
+
+VOWEL_LETTERS = 'AEIOUY'
+
+# Suffixes tried when guessing an inflected form: (suffix, stem endings to
+# try in place of the suffix, phonemes of the suffix).  An empty phoneme
+# list means the phonemes depend on the stem; see _suffix_phonemes.
+SUFFIXES = [("'S", [''], []), ("S'", [''], []), ('IES', ['Y'], ['Z']),
+            ('IED', ['Y'], ['D']), ('ES', [''], []), ('S', [''], []),
+            ('ED', ['', 'E'], []), ('ING', ['', 'E'], ['IH0', 'NG']),
+            ('ER', ['', 'E'], ['ER0']), ('EST', ['', 'E'], ['AH0', 'S', 'T']),
+            ('LY', [''], ['L', 'IY0']), ('NESS', [''], ['N', 'AH0', 'S'])]
+
+# Stem endings after which S is pronounced IH0 Z, and after which S is S
+# and ED is T.
+SIBILANTS = set(['S', 'Z', 'SH', 'ZH', 'CH', 'JH'])
+VOICELESS = set(['P', 'T', 'K', 'F', 'TH', 'S', 'SH', 'CH'])
+
+
+def _suffix_phonemes(suffix, stem_phonemes):
+    """ (str, list of str) -> list of str
+
+    Return the phonemes of the S, ES or ED suffix suffix after a stem with
+    the phonemes stem_phonemes.
+
+    >>> _suffix_phonemes('S', ['B', 'AA1', 'K', 'S'])
+    ['IH0', 'Z']
+    >>> _suffix_phonemes('ED', ['P', 'L', 'AE1', 'N', 'T'])
+    ['IH0', 'D']
+    """
+
+    last = stem_phonemes[-1]
+    if suffix == 'ED':
+        if last in ('T', 'D'):
+            return ['IH0', 'D']
+        if last in VOICELESS:
+            return ['T']
+        return ['D']
+    if last in SIBILANTS:
+        return ['IH0', 'Z']
+    if last in VOICELESS:
+        return ['S']
+    return ['Z']
+
+
+def _stem_candidates(stem, stem_endings):
+    """ (str, list of str) -> list of str
+
+    Return the words that stem might be the inflected form of: stem with
+    each of stem_endings added, and stem with a doubled last letter undone
+    (as in RUNN for RUNNING).
+
+    >>> _stem_candidates('RUNN', [''])
+    ['RUNN', 'RUN']
+    """
+
+    candidates = []
+    for ending in stem_endings:
+        candidates.append(stem + ending)
+    if len(stem) > 2 and stem[-1] == stem[-2] and stem[-1] not in 'AEIOUS':
+        candidates.append(stem[:-1])
+    return candidates
+
+
+def guess_inflection(word, pronouncing_table):
+    """ (str, pronouncing table) -> list of str
+
+    Return the pronunciation of the prepared word as an inflected form of a
+    word in pronouncing_table, or [] if it is not one.
+
+    >>> guess_inflection('BOXES', [['BOX'], [['B', 'AA1', 'K', 'S']]])
+    ['B', 'AA1', 'K', 'S', 'IH0', 'Z']
+    """
+
+    for suffix, stem_endings, phonemes in SUFFIXES:
+        if not word.endswith(suffix) or len(word) <= len(suffix) + 1:
+            continue
+        stem = word[:len(word) - len(suffix)]
+        for candidate in _stem_candidates(stem, stem_endings):
+            row = table_index.find_row(candidate, pronouncing_table)
+            if row != -1:
+                stem_phonemes = table_index.decode_pronunciation(
+                    table_index.get_codes(row, pronouncing_table))
+                if len(stem_phonemes) == 0:
+                    continue
+                if len(phonemes) == 0:
+                    ending = suffix.strip("'")
+                    # ES and 'S are said like S; only ED keeps its E
+                    if suffix != 'ED':
+                        ending = ending.replace('E', '', 1)
+                    return stem_phonemes + _suffix_phonemes(ending,
+                                                            stem_phonemes)
+                return stem_phonemes + phonemes
+    return []
+
+
+def _add_stress(phonemes):
+    """ (list of str) -> list of str
+
+    Return phonemes with a stress digit added to each vowel that has none:
+    1 for the first vowel of the word and 0 for the others.
+
+    >>> _add_stress(['K', 'AE', 'T', 'AH0', 'L', 'AA', 'G'])
+    ['K', 'AE1', 'T', 'AH0', 'L', 'AA0', 'G']
+    """
+
+    result = []
+    stressed = False
+    for phoneme in phonemes:
+        if phoneme + '1' in table_index.PHONEME_CODES:
+            if stressed:
+                phoneme = phoneme + '0'
+            else:
+                phoneme = phoneme + '1'
+                stressed = True
+        elif phoneme[-1] in '12':
+            stressed = True
+        result.append(phoneme)
+    return result
+
+
+def guess_by_rules(word):
+    """ (str) -> list of str
+
+    Return a pronunciation for the prepared word from letter-to-sound
+    rules.  Letters without a rule (such as digits) are skipped.
+
+    >>> guess_by_rules('ZORBLAKE')
+    ['Z', 'AO1', 'R', 'B', 'L', 'EY0', 'K']
+    >>> guess_by_rules('SHY')
+    ['SH', 'AY1']
+    """
+
+    letters = word.replace("'", '')
+    # A silent final E after a consonant lengthens the vowel before it.
+    long_vowel = -1
+    if (len(letters) > 3 and letters[-1] == 'E' and
+            letters[-2] not in VOWEL_LETTERS and
+            letters[-3] in LONG_VOWELS and
+            letters[-4] not in VOWEL_LETTERS):
+        long_vowel = len(letters) - 3
+        letters = letters[:-1]
+
+    phonemes = []
+    i = 0
+    while i < len(letters):
+        letter = letters[i]
+        if letter == 'Y':
+            if i == 0:
+                phonemes.append('Y')
+            elif i == len(letters) - 1:
+                # a final Y: long in short words (MY), short otherwise (CITY)
+                vowels = 0
+                for other in letters[:i]:
+                    if other in VOWEL_LETTERS:
+                        vowels += 1
+                if vowels == 0:
+                    phonemes.append('AY')
+                else:
+                    phonemes.append('IY')
+            else:
+                phonemes.append('IH')
+            i += 1
+        elif i == long_vowel:
+            phonemes.append(LONG_VOWELS[letter])
+            i += 1
+        elif letter == 'C' and letters[i + 1:i + 2] in ('E', 'I', 'Y'):
+            phonemes.append('S')
+            i += 1
+        elif (i > 0 and letter == letters[i - 1] and
+              letter not in VOWEL_LETTERS):
+            # a doubled consonant is sounded once
+            i += 1
+        else:
+            size = min(LONGEST_RULE, len(letters) - i)
+            while size > 0 and letters[i:i + size] not in LETTER_RULES:
+                size -= 1
+            if size == 0:
+                i += 1
+            else:
+                phonemes.extend(LETTER_RULES[letters[i:i + size]])
+                i += size
+    return _add_stress(phonemes)
+
+
+def _make_spelling_endings(pronouncing_table):
+    """ (pronouncing table) -> tuple of (list of str, list of int)
+
+    Return the words of pronouncing_table spelled back to front, sorted, and
+    the row of each of them.
+    """
+
+    endings = []
+    words = pronouncing_table[0]
+    for row in range(len(words)):
+        endings.append((words[row][::-1], row))
+    endings.sort()
+    reversed_words = []
+    rows = []
+    for reversed_word, row in endings:
+        reversed_words.append(reversed_word)
+        rows.append(row)
+    return reversed_words, rows
+
+
+def _shared_length(word1, word2):
+    """ (str, str) -> int
+
+    Return the number of letters at the start of word1 and word2 that are
+    the same.
+
+    >>> _shared_length('XOB', 'XOF')
+    2
+    """
+
+    length = 0
+    while (length < len(word1) and length < len(word2) and
+           word1[length] == word2[length]):
+        length += 1
+    return length
+
+
+def guess_last_syllable(word, pronouncing_table):
+    """ (str, pronouncing table) -> bytes
+
+    Return the codes of the last syllable of the word in pronouncing_table
+    whose spelling shares the longest ending with the prepared word, or None
+    if no word shares MIN_SHARED_ENDING letters with it.
+
+    >>> table = [['BOX', 'FANTASTIC'], [['B', 'AA1', 'K', 'S'],
+    ...          ['F', 'AE0', 'N', 'T', 'AE1', 'S', 'T', 'IH0', 'K']]]
+    >>> table_index.decode_pronunciation(
+    ...     guess_last_syllable('BLORPTASTIC', table))
+    ['IH0', 'K']
+    """
+
+    reversed_words, rows = table_index.get_derived(
+        pronouncing_table, SPELLING_ENDINGS, _make_spelling_endings)
+    reversed_word = word[::-1]
+    # The word sharing the longest ending sorts right next to word.
+    index = bisect.bisect_left(reversed_words, reversed_word)
+    best_length = MIN_SHARED_ENDING - 1
+    best_row = -1
+    for neighbour in (index - 1, index):
+        if 0 <= neighbour < len(reversed_words):
+            length = _shared_length(reversed_word, reversed_words[neighbour])
+            if length > best_length:
+                best_length = length
+                best_row = rows[neighbour]
+    if best_row == -1:
+        return None
+    return table_index.get_rhyme_key(best_row, pronouncing_table)
+
+
+def _guess_codes(pronouncing_table, word):
+    """ (pronouncing table, str) -> bytes
+
+    Return the phoneme codes of the best guess at pronouncing the prepared
+    word, which is not in pronouncing_table.
+    """
+
+    phonemes = guess_inflection(word, pronouncing_table)
+    if len(phonemes) > 0:
+        return table_index.encode_pronunciation(phonemes)
+    codes = table_index.encode_pronunciation(guess_by_rules(word))
+    last_vowel = table_index.find_last_vowel(codes)
+    last_syllable = guess_last_syllable(word, pronouncing_table)
+    if last_vowel != -1 and last_syllable is not None:
+        if len(table_index.get_stress_digits(codes)) == 1:
+            # the only syllable of a word is stressed
+            vowel = table_index.PHONEMES[last_syllable[0]][:-1] + '1'
+            last_syllable = (table_index.encode_pronunciation([vowel]) +
+                             last_syllable[1:])
+        codes = codes[:last_vowel] + last_syllable
+    return codes
+
+
+def _make_guesser(pronouncing_table):
+    """ (pronouncing table) -> function
+
+    Return a memoized function from a prepared word to the codes of the
+    guess at pronouncing it, for words missing from pronouncing_table.
+    """
+
+    return functools.lru_cache(maxsize=GUESS_CACHE_SIZE)(
+        functools.partial(_guess_codes, pronouncing_table))
+
+
+def guess_codes(word, pronouncing_table):
+    """ (str, pronouncing table) -> bytes
+
+    Return the phoneme codes of the best guess at pronouncing the prepared
+    word, which is not in pronouncing_table.  Guesses are remembered for
+    tables that keep derived indexes (such as PronouncingTable).
+
+    >>> table = table_index.PronouncingTable(['DOG'], [['D', 'AO1', 'G']])
+    >>> table_index.decode_pronunciation(guess_codes('DOGS', table))
+    ['D', 'AO1', 'G', 'Z']
+    """
+
+    return table_index.get_derived(pronouncing_table, GUESSES,
+                                   _make_guesser)(word)
+
+
+def get_guess_stats(pronouncing_table):
+    """ (pronouncing table) -> dict of {str: int}
+
+    Return the hits, misses and current size of pronouncing_table's guess
+    cache.
+
+    >>> table = table_index.PronouncingTable(['DOG'], [['D', 'AO1', 'G']])
+    >>> codes = guess_codes('DOGS', table)
+    >>> codes = guess_codes('DOGS', table)
+    >>> get_guess_stats(table)
+    {'hits': 1, 'misses': 1, 'size': 1}
+    """
+
+    info = table_index.get_derived(pronouncing_table, GUESSES,
+                                   _make_guesser).cache_info()
+    return {'hits': info.hits, 'misses': info.misses,
+            'size': info.currsize}
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
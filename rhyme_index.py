@@ -0,0 +1,248 @@
+"""
+A reverse rhyme index: for each rhyme key (the codes of a last syllable, as
+returned by last_syllable_codes) the words of a pronouncing table that end
+with it.  It answers "what rhymes with this word?" without comparing the
+word against every other word.
+
+Two words are perfect rhymes when their last syllables are the same.  They
+are near rhymes when their last syllables share the same vowel (ignoring
+stress) but end with different consonants.
+"""
+
+import bisect
+
+import pronouncing_table as table_index
+import stress_and_rhyme_functions as student
+
+# The name the rhyme index is kept under in a table's derived indexes.
+RHYME_INDEX = 'rhyme index'
+
+
+class RhymeIndex(object):
+    """ The words of a pronouncing table grouped by rhyme key. """
+
+    def __init__(self, pronouncing_table):
+        """ (RhymeIndex, pronouncing table) -> NoneType
+
+        Build the rhyme index for pronouncing_table.  Each group of words is
+        sorted alphabetically and holds each word once.  An alternate
+        pronunciation (such as LIVE(1)) is listed under its word (LIVE).
+
+        >>> index = RhymeIndex(student.SMALL_TABLE)
+        >>> codes = table_index.encode_pronunciation(['AA1', 'K', 'S'])
+        >>> index.get_words(codes)
+        ('BOX', 'FOX', 'SOCKS')
+        """
+
+        groups = {}
+        words = pronouncing_table[0]
+        for row in range(len(words)):
+            rhyme_key = table_index.get_rhyme_key(row, pronouncing_table)
+            if rhyme_key is not None:
+                word = words[row]
+                if word[-1] == ')':
+                    word = table_index.get_variant_base(word)
+                groups.setdefault(rhyme_key, []).append(word)
+
+        # Words for each rhyme key, and rhyme keys and words for each vowel.
+        self.words_by_key = {}
+        self.keys_by_vowel = {}
+        vowel_groups = {}
+        for rhyme_key in groups:
+            self.words_by_key[rhyme_key] = tuple(sorted(set(
+                groups[rhyme_key])))
+            vowel = get_vowel(rhyme_key)
+            self.keys_by_vowel.setdefault(vowel, []).append(rhyme_key)
+            vowel_groups.setdefault(vowel, []).extend(
+                self.words_by_key[rhyme_key])
+        self.words_by_vowel = {}
+        for vowel in vowel_groups:
+            self.words_by_vowel[vowel] = tuple(sorted(set(
+                vowel_groups[vowel])))
+
+    def get_words(self, rhyme_key):
+        """ (RhymeIndex, bytes) -> tuple of str
+
+        Return the words whose rhyme key is rhyme_key, in alphabetical
+        order.
+        """
+
+        return self.words_by_key.get(rhyme_key, ())
+
+    def get_near_keys(self, rhyme_key):
+        """ (RhymeIndex, bytes) -> list of bytes
+
+        Return the rhyme keys other than rhyme_key that have the same vowel
+        as rhyme_key.
+        """
+
+        near_keys = []
+        for key in self.keys_by_vowel.get(get_vowel(rhyme_key), []):
+            if key != rhyme_key:
+                near_keys.append(key)
+        return near_keys
+
+    def get_near_words(self, rhyme_key, limit=None):
+        """ (RhymeIndex, bytes, int) -> list of str
+
+        Return the words, in alphabetical order, whose rhyme key has the
+        same vowel as rhyme_key but is not rhyme_key.  If limit is given,
+        return at most the first limit of them.
+        """
+
+        if limit is None:
+            near_words = []
+            for near_key in self.get_near_keys(rhyme_key):
+                near_words.extend(self.get_words(near_key))
+            near_words.sort()
+            return near_words
+
+        perfect = self.get_words(rhyme_key)
+        near_words = []
+        for w in self.words_by_vowel.get(get_vowel(rhyme_key), ()):
+            if not _contains(perfect, w):
+                near_words.append(w)
+                if len(near_words) == limit:
+                    break
+        return near_words
+
+
+def _contains(words, word):
+    """ (tuple of str, str) -> bool
+
+    Return True if and only if word is in the sorted tuple words.
+
+    >>> _contains(('BOX', 'FOX'), 'FOX')
+    True
+    """
+
+    i = bisect.bisect_left(words, word)
+    return i < len(words) and words[i] == word
+
+
+def get_vowel(rhyme_key):
+    """ (bytes) -> str
+
+    Return the vowel of rhyme_key without its stress digit.
+
+    >>> get_vowel(table_index.encode_pronunciation(['AA1', 'K', 'S']))
+    'AA'
+    """
+
+    return table_index.PHONEMES[rhyme_key[0]][:-1]
+
+
+def get_rhyme_index(pronouncing_table):
+    """ (pronouncing table) -> RhymeIndex
+
+    Return the rhyme index for pronouncing_table, building it the first time
+    it is needed.
+
+    >>> index = get_rhyme_index(student.SMALL_TABLE)
+    >>> near_keys = index.get_near_keys(table_index.encode_pronunciation(
+    ...     ['AH0', 'N', 'T']))
+    >>> [table_index.decode_pronunciation(key) for key in near_keys]
+    [['AH0']]
+    """
+
+    return table_index.get_derived(pronouncing_table, RHYME_INDEX,
+                                   RhymeIndex)
+
+
+def find_rhymes(word, pronouncing_table, near=False, frequencies=None,
+                limit=None):
+    """ (str, pronouncing table, bool, dict of {str: int}, int) -> list of str
+
+    Return the words in pronouncing_table that rhyme with any pronunciation
+    of word, not including word itself.  Ignore the leading and trailing
+    punctuation in word as well as the case of any letters in word.
+
+    If near is True, also include near rhymes (same vowel, different
+    consonants after it) after the perfect rhymes.  Words are listed
+    alphabetically, unless frequencies is given, in which case words with
+    higher frequencies come first (words missing from frequencies count as
+    0).  If limit is given, return at most limit words.
+
+    >>> find_rhymes('box', student.SMALL_TABLE)
+    ['FOX', 'SOCKS']
+    >>> find_rhymes('Fox!', student.SMALL_TABLE, frequencies={'SOCKS': 5})
+    ['SOCKS', 'BOX']
+    >>> table = [['FIVE', 'GIVE', 'LIVE', 'LIVE(1)'],
+    ...          [['F', 'AY1', 'V'], ['G', 'IH1', 'V'], ['L', 'IH1', 'V'],
+    ...           ['L', 'AY1', 'V']]]
+    >>> find_rhymes('five', table), find_rhymes('live', table)
+    (['LIVE'], ['FIVE', 'GIVE'])
+    """
+
+    key = student.prepare_word(word)
+    rhyme_keys = []
+    for rhyme_key in student.look_up_rhyme_keys(key, pronouncing_table):
+        # a pronunciation without a vowel has no last syllable to rhyme
+        if rhyme_key is not None and rhyme_key not in rhyme_keys:
+            rhyme_keys.append(rhyme_key)
+    if len(rhyme_keys) == 0:
+        return []
+
+    index = get_rhyme_index(pronouncing_table)
+    if len(rhyme_keys) == 1:
+        perfect = index.get_words(rhyme_keys[0])
+    else:
+        perfect = set()
+        for rhyme_key in rhyme_keys:
+            perfect.update(index.get_words(rhyme_key))
+        perfect = tuple(sorted(perfect))
+    result = _rank(perfect, key, frequencies, limit)
+    if near and (limit is None or len(result) < limit):
+        # Near rhymes only need to be found until the limit is reached,
+        # unless they are ranked by frequency.
+        near_limit = None
+        if limit is not None and frequencies is None:
+            near_limit = limit - len(result)
+        if len(rhyme_keys) == 1:
+            near_words = index.get_near_words(rhyme_keys[0], near_limit)
+        else:
+            near_words = set()
+            for rhyme_key in rhyme_keys:
+                near_words.update(index.get_near_words(rhyme_key))
+            near_words = sorted(near_words)
+        # a word with another pronunciation among the perfect rhymes is
+        # only listed there (get_near_words leaves them out given a limit)
+        if near_limit is None or len(rhyme_keys) > 1:
+            perfect_words = set(perfect)
+            near_words = [w for w in near_words if w not in perfect_words]
+        result.extend(_rank(near_words, key, frequencies, None))
+    if limit is not None:
+        return result[:limit]
+    return result
+
+
+def _rank(words, key, frequencies, limit):
+    """ (sequence of str, str, dict of {str: int}, int) -> list of str
+
+    Return the alphabetically sorted words without key, ordered by
+    frequencies (highest first) if frequencies is not None.  If limit is
+    given, at least the first limit words are returned, but there may be
+    more.
+
+    >>> _rank(('BOX', 'FOX', 'SOCKS'), 'FOX', None, None)
+    ['BOX', 'SOCKS']
+    """
+
+    if frequencies is None and limit is not None:
+        # One extra word in case key is among the first limit words.
+        words = words[:limit + 1]
+    # words is sorted, so key can be cut out with slices instead of a loop.
+    i = bisect.bisect_left(words, key)
+    if i < len(words) and words[i] == key:
+        ranked = list(words[:i])
+        ranked.extend(words[i + 1:])
+    else:
+        ranked = list(words)
+    if frequencies is not None:
+        ranked.sort(key=lambda w: -frequencies.get(w, 0))
+    return ranked
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
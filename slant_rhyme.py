@@ -0,0 +1,431 @@
+"""
+Slant rhymes: a distance between phoneme sequences, and BK-trees over the
+rhyme keys of a pronouncing table for "rhyme keys within distance d of
+this one" queries.
+
+The distance is an edit distance over phoneme codes, where substituting one
+phoneme for a similar one costs less than for a different one:
+  o two vowels cost the steps between them in height and in backness (a
+    quarter each), plus a quarter if one is a diphthong or r-coloured and
+    the other is not, and a quarter if their stress digits differ
+  o two consonants cost a quarter if their voicing differs, a half if their
+    manner differs, and a tenth for each step between their places
+  o a vowel for a consonant, or inserting or deleting any phoneme, costs 1
+and every substitution costs at most 1.  Each of those parts is a metric,
+so the distance is too, which is what lets a BK-tree skip most of the keys:
+a query only visits the children of a node whose distance to it is within
+the query's distance of the node's own distance to the query.
+
+Distances are kept as whole numbers of units (DISTANCE_SCALE units to 1) so
+that they can key the BK-tree's children; the public functions take and
+return plain distances.
+
+The trees hold the distinct rhyme keys of a table (a few thousand), not its
+words, so a query never looks at every entry of the dictionary; the words
+for the keys found are read from the rhyme index.  There is one tree for
+each length of key, since keys whose lengths differ are at least 1 apart
+for each phoneme of difference.
+"""
+
+import heapq
+
+import pronouncing_table as table_index
+import rhyme_index
+import stress_and_rhyme_functions as student
+
+# The units a distance of 1 is stored as.
+DISTANCE_SCALE = 20
+
+# The largest distance between two rhyme keys for them to be near rhymes.
+NEAR_RHYME_DISTANCE = 0.5
+
+# The number of slant rhymes find_slant_rhymes returns unless told otherwise.
+TOP_K = 20
+
+# The name the slant rhyme index is kept under in a table's derived indexes.
+SLANT_RHYME_INDEX = 'slant rhyme index'
+
+# Vowel features: (height from high 0 to low 3, backness from front 0 to
+# back 2, 1 for a diphthong or r-coloured vowel and 0 otherwise).  No two
+# vowels have the same features, so only equal phonemes are 0 apart.
+VOWEL_FEATURES = {
+    'IY': (0, 0, 0), 'IH': (1, 0, 0), 'EY': (1, 0, 1), 'EH': (2, 0, 0),
+    'AE': (3, 0, 0), 'AH': (2, 1, 0), 'ER': (2, 1, 1), 'AY': (3, 1, 1),
+    'AW': (3, 2, 1), 'AA': (3, 2, 0), 'AO': (2, 2, 0), 'OY': (2, 2, 1),
+    'OW': (1, 2, 1), 'UH': (1, 2, 0), 'UW': (0, 2, 0)}
+
+# Consonant features: (place from the lips 0 to the glottis 7, manner,
+# 1 if voiced and 0 otherwise).
+CONSONANT_FEATURES = {
+    'P': (0, 'stop', 0), 'B': (0, 'stop', 1), 'M': (0, 'nasal', 1),
+    'W': (0, 'glide', 1), 'F': (1, 'fricative', 0),
+    'V': (1, 'fricative', 1), 'TH': (2, 'fricative', 0),
+    'DH': (2, 'fricative', 1), 'T': (3, 'stop', 0), 'D': (3, 'stop', 1),
+    'S': (3, 'fricative', 0), 'Z': (3, 'fricative', 1),
+    'N': (3, 'nasal', 1), 'L': (3, 'liquid', 1), 'R': (4, 'liquid', 1),
+    'SH': (4, 'fricative', 0), 'ZH': (4, 'fricative', 1),
+    'CH': (4, 'affricate', 0), 'JH': (4, 'affricate', 1),
+    'Y': (5, 'glide', 1), 'K': (6, 'stop', 0), 'G': (6, 'stop', 1),
+    'NG': (6, 'nasal', 1), 'HH': (7, 'fricative', 0)}
+
+# The cost of inserting or deleting a phoneme, in units.
+GAP_COST = DISTANCE_SCALE
+
+# The substitution cost of each pair of phoneme codes, in units, filled in
+# by _get_costs as phonemes are added to the codebook.
+_costs = []
+
+
+def get_phoneme_cost(phoneme1, phoneme2):
+    """ (str, str) -> float
+
+    Return the cost of substituting phoneme2 for phoneme1.
+
+    >>> get_phoneme_cost('S', 'Z')
+    0.25
+    >>> get_phoneme_cost('IH1', 'IY1')
+    0.25
+    >>> get_phoneme_cost('AA1', 'T')
+    1.0
+    """
+
+    if phoneme1 == phoneme2:
+        return 0.0
+    vowel1 = phoneme1[-1].isnumeric()
+    vowel2 = phoneme2[-1].isnumeric()
+    if vowel1 and vowel2:
+        features1 = VOWEL_FEATURES.get(phoneme1[:-1])
+        features2 = VOWEL_FEATURES.get(phoneme2[:-1])
+        if features1 is None or features2 is None:
+            return 1.0
+        cost = (abs(features1[0] - features2[0]) +
+                abs(features1[1] - features2[1]) +
+                abs(features1[2] - features2[2])) * 0.25
+        if phoneme1[-1] != phoneme2[-1]:
+            cost += 0.25
+    elif not vowel1 and not vowel2:
+        features1 = CONSONANT_FEATURES.get(phoneme1)
+        features2 = CONSONANT_FEATURES.get(phoneme2)
+        if features1 is None or features2 is None:
+            return 1.0
+        cost = abs(features1[0] - features2[0]) * 0.1
+        if features1[1] != features2[1]:
+            cost += 0.5
+        if features1[2] != features2[2]:
+            cost += 0.25
+    else:
+        return 1.0
+    return min(round(cost, 2), 1.0)
+
+
+def _get_costs():
+    """ () -> list of list of int
+
+    Return the substitution costs in units of every pair of codes in the
+    phoneme codebook, computing those of phonemes added since the last call.
+    """
+
+    phonemes = table_index.PHONEMES
+    known = len(_costs)
+    if known < len(phonemes):
+        for code1 in range(known):
+            for code2 in range(known, len(phonemes)):
+                _costs[code1].append(round(get_phoneme_cost(
+                    phonemes[code1], phonemes[code2]) * DISTANCE_SCALE))
+        for code1 in range(known, len(phonemes)):
+            _costs.append([round(get_phoneme_cost(
+                phonemes[code1], phonemes[code2]) * DISTANCE_SCALE)
+                           for code2 in range(len(phonemes))])
+    return _costs
+
+
+def _get_units(codes1, codes2, limit=None):
+    """ (bytes, bytes, int) -> int
+
+    Return the distance in units between the phoneme codes codes1 and
+    codes2.  If limit is given, stop as soon as the distance is sure to be
+    above limit and return some number above limit.
+    """
+
+    costs = _get_costs()
+    # Keys of the same length are usually nearest without gaps: a gap has
+    # to be matched by another, so an alignment with gaps costs at least
+    # 2 * GAP_COST, and phoneme for phoneme is the distance if it is less.
+    if len(codes1) == len(codes2):
+        units = 0
+        for i in range(len(codes1)):
+            units += costs[codes1[i]][codes2[i]]
+        if units <= 2 * GAP_COST:
+            return units
+    previous = list(range(0, (len(codes2) + 1) * GAP_COST, GAP_COST))
+    for i in range(len(codes1)):
+        row_costs = costs[codes1[i]]
+        current = [previous[0] + GAP_COST]
+        best = current[0]
+        for j in range(len(codes2)):
+            cost = min(previous[j] + row_costs[codes2[j]],
+                       previous[j + 1] + GAP_COST,
+                       current[j] + GAP_COST)
+            current.append(cost)
+            if cost < best:
+                best = cost
+        # every later row only adds to the smallest cost in this one
+        if limit is not None and best > limit:
+            return best
+        previous = current
+    return previous[-1]
+
+
+def get_distance(codes1, codes2):
+    """ (bytes, bytes) -> float
+
+    Return the distance between the phoneme codes codes1 and codes2.
+
+    >>> encode = table_index.encode_pronunciation
+    >>> get_distance(encode(['AA1', 'K', 'S']), encode(['AA1', 'G', 'Z']))
+    0.5
+    >>> get_distance(encode(['AY1', 'T']), encode(['AY1', 'T', 'S']))
+    1.0
+    """
+
+    return _get_units(codes1, codes2) / DISTANCE_SCALE
+
+
+class BKTree(object):
+    """ A BK-tree of phoneme code sequences under the distance above.
+
+    Each node is a list [codes, children], where children maps a distance in
+    units to the child node at that distance from codes.
+    """
+
+    def __init__(self, codes_list=None):
+        """ (BKTree, list of bytes) -> NoneType
+
+        Create a tree holding the codes in codes_list.
+        """
+
+        self.root = None
+        self.size = 0
+        if codes_list is not None:
+            for codes in codes_list:
+                self.add(codes)
+
+    def add(self, codes):
+        """ (BKTree, bytes) -> NoneType
+
+        Add codes to the tree, unless they are already in it.
+        """
+
+        if self.root is None:
+            self.root = [codes, {}]
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            units = _get_units(codes, node[0])
+            if units == 0:
+                return
+            child = node[1].get(units)
+            if child is None:
+                node[1][units] = [codes, {}]
+                self.size += 1
+                return
+            node = child
+
+    def find(self, codes, distance):
+        """ (BKTree, bytes, float) -> list of tuple of (float, bytes)
+
+        Return (distance, codes) for every sequence of codes in the tree
+        within distance of codes, the nearest first.
+
+        >>> encode = table_index.encode_pronunciation
+        >>> tree = BKTree([encode(['AA1', 'K', 'S']),
+        ...                encode(['AA1', 'G', 'Z']), encode(['IY1', 'T'])])
+        >>> [(d, table_index.decode_pronunciation(found))
+        ...  for d, found in tree.find(encode(['AA1', 'K', 'S']), 0.5)]
+        [(0.0, ['AA1', 'K', 'S']), (0.5, ['AA1', 'G', 'Z'])]
+        """
+
+        found = []
+        if self.root is None:
+            return found
+        limit = round(distance * DISTANCE_SCALE)
+        nodes = [self.root]
+        while nodes:
+            codes_here, children = nodes.pop()
+            # the children can only be pruned with the exact distance; a
+            # leaf only needs to know whether it is within the limit
+            if children:
+                units = _get_units(codes, codes_here)
+            else:
+                units = _get_units(codes, codes_here, limit)
+            if units <= limit:
+                found.append((units, codes_here))
+            for child_units in children:
+                if units - limit <= child_units <= units + limit:
+                    nodes.append(children[child_units])
+        found.sort()
+        return [(units / DISTANCE_SCALE, key) for units, key in found]
+
+
+class SlantRhymeIndex(object):
+    """ BK-trees over the distinct rhyme keys of a pronouncing table.
+
+    Keys of different lengths are at least GAP_COST apart for each phoneme
+    of difference, so there is one tree for each length of key, and a query
+    only searches the trees of the lengths that can be close enough.
+    """
+
+    def __init__(self, pronouncing_table):
+        """ (SlantRhymeIndex, pronouncing table) -> NoneType
+
+        Build the trees for the rhyme keys of pronouncing_table.
+
+        >>> import stress_and_rhyme_functions as student
+        >>> index = SlantRhymeIndex(student.SMALL_TABLE)
+        >>> sorted(index.trees), len(index)
+        ([1, 2, 3], 5)
+        """
+
+        keys = getattr(pronouncing_table, 'rhyme_keys', None)
+        if keys is None:
+            keys = set()
+            for row in range(len(pronouncing_table[0])):
+                keys.add(table_index.get_rhyme_key(row, pronouncing_table))
+            keys = sorted(keys, key=lambda key: (key is None, key))
+        self.trees = {}
+        for key in keys:
+            if key is not None:
+                if len(key) not in self.trees:
+                    self.trees[len(key)] = BKTree()
+                self.trees[len(key)].add(key)
+        self._near_keys = {}
+
+    def __len__(self):
+        """ (SlantRhymeIndex) -> int
+
+        Return the number of rhyme keys in the index.
+        """
+
+        size = 0
+        for tree in self.trees.values():
+            size += tree.size
+        return size
+
+    def find_keys(self, rhyme_key, distance=NEAR_RHYME_DISTANCE):
+        """ (SlantRhymeIndex, bytes, float) -> list of tuple of (float, bytes)
+
+        Return (distance, rhyme key) for every rhyme key of the table within
+        distance of rhyme_key, the nearest first.
+        """
+
+        limit = round(distance * DISTANCE_SCALE)
+        found = []
+        for length in self.trees:
+            if abs(length - len(rhyme_key)) * GAP_COST <= limit:
+                found.extend(self.trees[length].find(rhyme_key, distance))
+        found.sort()
+        return found
+
+    def get_near_keys(self, rhyme_key, distance=NEAR_RHYME_DISTANCE):
+        """ (SlantRhymeIndex, bytes, float) -> list of bytes
+
+        Return the rhyme keys of the table within distance of rhyme_key, the
+        nearest first, remembering them for the next call.
+        """
+
+        near_keys = self._near_keys.get((rhyme_key, distance))
+        if near_keys is None:
+            near_keys = []
+            for distance_here, key in self.find_keys(rhyme_key, distance):
+                near_keys.append(key)
+            self._near_keys[(rhyme_key, distance)] = near_keys
+        return near_keys
+
+
+def get_slant_rhyme_index(pronouncing_table):
+    """ (pronouncing table) -> SlantRhymeIndex
+
+    Return the slant rhyme index for pronouncing_table, building it the
+    first time it is needed.
+    """
+
+    return table_index.get_derived(pronouncing_table, SLANT_RHYME_INDEX,
+                                   SlantRhymeIndex)
+
+
+def is_near_rhyme(rhyme_key1, rhyme_key2, distance=NEAR_RHYME_DISTANCE):
+    """ (bytes, bytes, float) -> bool
+
+    Return True if and only if the rhyme keys rhyme_key1 and rhyme_key2 are
+    within distance of each other.
+
+    >>> encode = table_index.encode_pronunciation
+    >>> is_near_rhyme(encode(['EY1', 'T']), encode(['EY1', 'D']))
+    True
+    """
+
+    limit = round(distance * DISTANCE_SCALE)
+    return _get_units(rhyme_key1, rhyme_key2, limit) <= limit
+
+
+def find_slant_rhymes(word, pronouncing_table, distance=NEAR_RHYME_DISTANCE,
+                      k=TOP_K):
+    """ (str, pronouncing table, float, int) -> list of tuple of (float, str)
+
+    Return (distance, word) for the first k words of pronouncing_table with
+    a last syllable within distance of the last syllable of any
+    pronunciation of word, the nearest first and then in alphabetical
+    order, not including word itself.  Alternate pronunciations (such as
+    LIVE(1)) are listed under their word.  Ignore the leading and trailing
+    punctuation in word as well as the case of any letters in word.
+
+    >>> find_slant_rhymes('Box!', student.SMALL_TABLE)
+    [(0.0, 'FOX'), (0.0, 'SOCKS')]
+    >>> find_slant_rhymes("Don't", student.SMALL_TABLE, 1.0)
+    [(1.0, 'CONSISTENT')]
+    >>> find_slant_rhymes('Sh!', [['SH', 'BOX'],
+    ...                           [['SH'], ['B', 'AA1', 'K', 'S']]])
+    []
+    >>> find_slant_rhymes('five', [['FIVE', 'LIVE', 'LIVE(1)'],
+    ...     [['F', 'AY1', 'V'], ['L', 'IH1', 'V'], ['L', 'AY1', 'V']]])
+    [(0.0, 'LIVE')]
+    """
+
+    key = student.prepare_word(word)
+    index = rhyme_index.get_rhyme_index(pronouncing_table)
+    slant_index = get_slant_rhyme_index(pronouncing_table)
+    # the nearest distance of each rhyme key to any pronunciation of word
+    key_distances = {}
+    for rhyme_key in student.look_up_rhyme_keys(key, pronouncing_table):
+        # a pronunciation without a vowel has no last syllable to rhyme
+        if rhyme_key is None:
+            continue
+        for distance_here, near_key in slant_index.find_keys(rhyme_key,
+                                                             distance):
+            if distance_here < key_distances.get(near_key, distance_here + 1):
+                key_distances[near_key] = distance_here
+    keys_at = {}
+    for near_key in key_distances:
+        keys_at.setdefault(key_distances[near_key], []).append(near_key)
+
+    # the words of each rhyme key are sorted, so the words at one distance
+    # are merged in order and only read until k are found
+    found = []
+    seen = set()
+    for distance_here in sorted(keys_at):
+        groups = []
+        for near_key in keys_at[distance_here]:
+            groups.append(index.get_words(near_key))
+        for w in heapq.merge(*groups):
+            if len(found) == k:
+                return found
+            if w != key and w not in seen:
+                seen.add(w)
+                found.append((distance_here, w))
+    return found
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
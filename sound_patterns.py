@@ -0,0 +1,297 @@
+"""
+Sound patterns inside the lines of a poem: alliteration, assonance and
+internal rhyme, found across every word of each line rather than only the
+last.
+
+  o alliteration: words of a line that start with the same consonant sound
+    (CITY and SUN, KNIGHT and NOSE)
+  o assonance: words of a line whose stressed vowels are the same, ignoring
+    stress (NIGHT and TIME)
+  o internal rhyme: words of a line with the same last syllable (as in
+    detect_rhyme_scheme), one of which may be the last word
+
+Function words (THE, AND, ...; see meter.FUNCTION_WORDS) are left out, and
+a pattern needs at least two different words.  The sounds of each table
+row are found once, the first time a word needs them, and remembered with
+the table's derived indexes; words missing from the table are not, so the
+memory this takes is bounded by the size of the table however many
+different words a long-running server sees (see get_word_sounds).  The
+words of a line are grouped by sound with a dict for each device, so
+finding the patterns takes time in proportion to the number of words in
+the poem, however many share a sound.
+
+The patterns are returned as spans, each a dict with these keys:
+  o 'line': the index of the poem line (int)
+  o 'start', 'end': the slice of the poem line holding the word, without
+    its leading and trailing punctuation (int)
+  o 'device': 'alliteration', 'assonance' or 'internal rhyme' (str)
+  o 'group': the number of the pattern among the device's patterns in the
+    poem, from 0 (int); the words of one pattern share it
+  o 'sound': the sound the words share, as phonemes (str)
+so they can be written as JSON, drawn under the lines (see
+format_sound_patterns) or highlighted in the poem window.
+"""
+
+import functools
+import sys
+
+import meter
+import pronouncing_table as table_index
+import stress_and_rhyme_functions as student
+import tokenizer
+
+# The devices, in the order their spans are given for each line.
+DEVICES = ['alliteration', 'assonance', 'internal rhyme']
+
+# The name the sounds of each table row are kept under in a table's derived
+# indexes.
+ROW_SOUNDS = 'row sounds'
+
+# The most guessed pronunciations whose sounds are remembered.
+GUESS_SOUNDS_CACHE_SIZE = 4096
+
+
+def iter_word_spans(tokens):
+    """ (list of tuple of (str, str, int, int)) -> iterator of tuple
+
+    Yield (key, start, end) for each of tokens, as tokenizer.tokenize
+    returns them, where start and end are the slice of the poem line holding
+    the token's word without its leading and trailing punctuation.
+
+    >>> list(iter_word_spans(tokenizer.tokenize('"Fox,"  in socks!')))
+    [('FOX', 1, 4), ('IN', 8, 10), ('SOCKS', 11, 16)]
+    """
+
+    for token, key, start, end in tokens:
+        offset = token.translate(tokenizer.APOSTROPHES).upper().find(key)
+        if offset == -1:
+            yield key, start, end
+        else:
+            yield key, start + offset, start + offset + len(key)
+
+
+def get_sounds(codes):
+    """ (bytes) -> tuple of (str, str, str)
+
+    Return the sounds of the pronunciation with phoneme codes codes: its
+    first consonant (or None if it starts with a vowel), its stressed vowel
+    without the stress digit (or None if it has no vowel), and its last
+    syllable (or None if it has no vowel).  The stressed vowel is the first
+    with primary stress, or else the first with the most stress.
+
+    >>> get_sounds(table_index.encode_pronunciation(
+    ...     ['K', 'AH0', 'N', 'S', 'IH1', 'S', 'T', 'AH0', 'N', 'T']))
+    ('K', 'IH', 'AH0 N T')
+    >>> get_sounds(table_index.encode_pronunciation(['IH0', 'N']))
+    (None, 'IH', 'IH0 N')
+    """
+
+    phonemes = table_index.PHONEMES
+    onset = None
+    if len(codes) > 0 and not table_index.is_vowel_code(codes[0]):
+        onset = phonemes[codes[0]]
+
+    vowel = None
+    vowel_digit = ''
+    for code in codes:
+        if table_index.is_vowel_code(code):
+            digit = phonemes[code][-1]
+            if digit == '1':
+                vowel = phonemes[code][:-1]
+                break
+            if digit > vowel_digit:
+                vowel = phonemes[code][:-1]
+                vowel_digit = digit
+
+    rhyme_key = student.last_syllable_codes(codes)
+    if rhyme_key is not None:
+        rhyme_key = ' '.join(table_index.decode_pronunciation(rhyme_key))
+    return onset, vowel, rhyme_key
+
+
+def get_word_sounds(word, pronouncing_table):
+    """ (str, pronouncing table) -> tuple of (str, str, str)
+
+    Return the sounds (see get_sounds) of the first pronunciation of the
+    prepared word in pronouncing_table, or None if it has no pronunciation.
+    The sounds of a table row are remembered with the table's derived
+    indexes, so they are found once per row.  A word that is not in the
+    table is not remembered there: the sounds of its guessed pronunciation
+    are kept for the last GUESS_SOUNDS_CACHE_SIZE guesses only.
+
+    >>> get_word_sounds('SOCKS', student.SMALL_TABLE)
+    ('S', 'AA', 'AA1 K S')
+    >>> get_word_sounds('ZZZ', student.SMALL_TABLE) is None
+    True
+    """
+
+    row = table_index.find_row(word, pronouncing_table)
+    if row == -1:
+        codes = student.guess_codes(word, pronouncing_table)
+        if len(codes) == 0:
+            return None
+        return _get_guess_sounds(codes)
+    row_sounds = table_index.get_derived(pronouncing_table, ROW_SOUNDS,
+                                         _new_row_sounds)
+    sounds = row_sounds.get(row)
+    if sounds is None:
+        sounds = get_sounds(table_index.get_codes(row, pronouncing_table))
+        row_sounds[row] = sounds
+    return sounds
+
+
+def _new_row_sounds(pronouncing_table):
+    """ (pronouncing table) -> dict
+
+    Return an empty dict for remembering the sounds of table rows in.
+    """
+
+    return {}
+
+
+# get_sounds, remembering the sounds of the last GUESS_SOUNDS_CACHE_SIZE
+# guessed pronunciations.
+_get_guess_sounds = functools.lru_cache(maxsize=GUESS_SOUNDS_CACHE_SIZE)(
+    get_sounds)
+
+
+def find_sound_patterns(poem_lines, pronouncing_table, line_tokens=None):
+    """ (list of str, pronouncing table, list of list) -> list of dict
+
+    Return the spans of the alliteration, assonance and internal rhyme in
+    each line of poem_lines, found with pronouncing_table, line by line and
+    then in the order of DEVICES.  line_tokens, if given, holds the tokens
+    of each line as tokenizer.tokenize returns them.
+
+    >>> spans = find_sound_patterns(['Socks on a box', 'Fox in socks'],
+    ...                             student.SMALL_TABLE)
+    >>> [(span['line'], span['device'], span['start'], span['sound'])
+    ...  for span in spans]
+    [(0, 'assonance', 0, 'AA'), (0, 'assonance', 11, 'AA'), \
+(0, 'internal rhyme', 0, 'AA1 K S'), (0, 'internal rhyme', 11, 'AA1 K S'), \
+(1, 'assonance', 0, 'AA'), (1, 'assonance', 7, 'AA'), \
+(1, 'internal rhyme', 0, 'AA1 K S'), (1, 'internal rhyme', 7, 'AA1 K S')]
+    >>> [span['group'] for span in spans if span['device'] == 'assonance']
+    [0, 0, 1, 1]
+    """
+
+    spans = []
+    group_counts = [0] * len(DEVICES)
+    row_sounds = table_index.get_derived(pronouncing_table, ROW_SOUNDS,
+                                         _new_row_sounds)
+    find_row = table_index.find_row
+    for line_index in range(len(poem_lines)):
+        # for each device, the words of the line by the sound they share
+        groups = []
+        for device in DEVICES:
+            groups.append({})
+        if line_tokens is None:
+            tokens = tokenizer.tokenize(poem_lines[line_index])
+        else:
+            tokens = line_tokens[line_index]
+        for key, start, end in iter_word_spans(tokens):
+            if key in meter.FUNCTION_WORDS:
+                continue
+            # the usual case: a table row whose sounds are already known
+            sounds = row_sounds.get(find_row(key, pronouncing_table))
+            if sounds is None:
+                sounds = get_word_sounds(key, pronouncing_table)
+            if sounds is None:
+                continue
+            for i in range(len(DEVICES)):
+                if sounds[i] is not None:
+                    groups[i].setdefault(sounds[i], []).append(
+                        (key, start, end))
+
+        for i in range(len(DEVICES)):
+            for sound in groups[i]:
+                words = groups[i][sound]
+                if len(words) < 2 or len(set([w[0] for w in words])) < 2:
+                    continue
+                for key, start, end in words:
+                    spans.append({'line': line_index, 'start': start,
+                                  'end': end, 'device': DEVICES[i],
+                                  'group': group_counts[i], 'sound': sound})
+                group_counts[i] += 1
+    return spans
+
+
+def format_sound_patterns(poem_lines, spans):
+    """ (list of str, list of dict) -> str
+
+    Return poem_lines with the spans drawn under them: under each line, one
+    marker line for each device with spans in it, where the words of a
+    pattern are marked with the same letter and the line ends with the
+    device and the sounds.
+
+    >>> print(format_sound_patterns(['Fox in socks'], [
+    ...     {'line': 0, 'start': 0, 'end': 3, 'device': 'assonance',
+    ...      'group': 0, 'sound': 'AA'},
+    ...     {'line': 0, 'start': 7, 'end': 12, 'device': 'assonance',
+    ...      'group': 0, 'sound': 'AA'}]))
+    Fox in socks
+    aaa    aaaaa   assonance (a: AA)
+    """
+
+    spans_by_line = {}
+    for span in spans:
+        spans_by_line.setdefault(span['line'], []).append(span)
+
+    lines = []
+    for line_index in range(len(poem_lines)):
+        poem_line = poem_lines[line_index]
+        lines.append(poem_line)
+        line_spans = spans_by_line.get(line_index, [])
+        for device in DEVICES:
+            markers = [' '] * len(poem_line)
+            sounds = []
+            for span in line_spans:
+                if span['device'] != device:
+                    continue
+                letter = student.get_rhyme_scheme_letter(span['group']).lower()
+                for i in range(span['start'], span['end']):
+                    markers[i] = letter[0]
+                sound = '{}: {}'.format(letter, span['sound'])
+                if sound not in sounds:
+                    sounds.append(sound)
+            if sounds:
+                lines.append('{}   {} ({})'.format(''.join(markers), device,
+                                                   ', '.join(sounds)))
+    return '\n'.join(lines)
+
+
+def main(arguments=None):
+    """ (list of str) -> int
+
+    Print the sound patterns of the poem in each file named in arguments
+    (sys.argv[1:] if None), found with our pronouncing dictionary, and
+    return the exit status.
+
+    Docstring example(s) not given since this function depends on file input.
+    """
+
+    import annotate_poetry
+
+    if arguments is None:
+        arguments = sys.argv[1:]
+    if len(arguments) == 0:
+        print('Usage: python sound_patterns.py POEM_FILE [POEM_FILE ...]')
+        return 2
+    pronouncing_table = annotate_poetry.read_pronouncing_dictionary(
+        annotate_poetry.OUR_PRONOUNCING_DICTIONARY, guess_missing=True)
+    for filename in arguments:
+        poem_file = open(filename, 'r')
+        poem_lines = student.convert_to_lines(poem_file.read())
+        poem_file.close()
+        if len(arguments) > 1:
+            print('== ' + filename)
+        print(format_sound_patterns(poem_lines, find_sound_patterns(
+            poem_lines, pronouncing_table)))
+    return 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    import doctest
+    doctest.testmod()
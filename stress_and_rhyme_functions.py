@@ -1,6 +1,18 @@
 # The main module - need to import so that window code works correctly
 import annotate_poetry
 
+# The indexed pronouncing table - so that words are found without a full scan
+import pronouncing_table as table_index
+
+# Guessed pronunciations - for words that are not in the pronouncing table
+import pronunciation_guess
+
+# Slant rhymes - for last syllables that sound alike without being the same
+import slant_rhyme
+
+# The shared tokenizer - so each word of a line is found and prepared once
+import tokenizer
+
 NO_STRESS_SYMBOL = 'x'
 PRIMARY_STRESS_SYMBOL = '/'
 SECONDARY_STRESS_SYMBOL = '\\'  # note: len('\\') == 1 due to special character
@@ -75,22 +87,207 @@ def prepare_word(s):
 def get_rhyme_scheme_letter(offset):
     """ (int) -> str
 
-    Precondition: 0 <= offset <= 25
+    Precondition: 0 <= offset
 
     Return the letter corresponding to the offset from 'A'.  Helpful when 
-    labelling a poem with its rhyme scheme.
+    labelling a poem with its rhyme scheme.  After 'Z' the letters continue
+    as 'AA', 'AB', ..., 'AZ', 'BA', ... like spreadsheet columns, so a poem
+    can have any number of rhyme classes.
 
     >>> get_rhyme_scheme_letter(0)
     'A'
     >>> get_rhyme_scheme_letter(25)
     'Z'
+    >>> get_rhyme_scheme_letter(26)
+    'AA'
+    >>> get_rhyme_scheme_letter(27 * 26)
+    'AAA'
     """
 
-    return chr(ord('A') + offset)
+    letters = chr(ord('A') + offset % 26)
+    offset = offset // 26
+    while offset > 0:
+        offset -= 1
+        letters = chr(ord('A') + offset % 26) + letters
+        offset = offset // 26
+    return letters
 
 
 # ======== Students: Add Any Helper Functions Below This Line ================
 
+def guess_codes(word, pronouncing_table):
+    """ (str, pronouncing table) -> bytes
+
+    Return the phoneme codes for the prepared word, which is not in
+    pronouncing_table.  A hyphenated compound whose parts can all be
+    pronounced is read as its parts one after another.  Any other word gets
+    a guessed pronunciation if the table guesses missing words (its
+    guess_missing attribute is True), or empty bytes if it does not.
+
+    >>> guess_codes('BOXES', SMALL_TABLE)
+    b''
+    >>> table_index.decode_pronunciation(guess_codes('FOX-IN-SOCKS',
+    ...                                              SMALL_TABLE))
+    ['F', 'AA1', 'K', 'S', 'IH0', 'N', 'S', 'AA1', 'K', 'S']
+    """
+
+    if '-' in word:
+        codes = b''
+        for part in word.split('-'):
+            if part != '':
+                part_codes = look_up_codes(part, pronouncing_table)
+                if len(part_codes) == 0:
+                    codes = b''
+                    break
+                codes += part_codes
+        if len(codes) > 0:
+            return codes
+    if not getattr(pronouncing_table, 'guess_missing', False):
+        return b''
+    return pronunciation_guess.guess_codes(word, pronouncing_table)
+
+
+def look_up_codes(word, pronouncing_table):
+    """ (str, pronouncing table) -> bytes
+
+    Return the phoneme codes (see pronouncing_table.PHONEMES) for pronouncing
+    word, as found in pronouncing_table, or guessed if word is not there
+    (empty bytes if the table does not guess).  Ignore the leading and
+    trailing punctuation in word as well as the case of any letters in word.
+
+    >>> table_index.decode_pronunciation(look_up_codes('Box', SMALL_TABLE))
+    ['B', 'AA1', 'K', 'S']
+    """
+
+    word = prepare_word(word)
+    row = table_index.find_row(word, pronouncing_table)
+    if row == -1:
+        return guess_codes(word, pronouncing_table)
+    return table_index.get_codes(row, pronouncing_table)
+
+
+def look_up_stress_digits(word, pronouncing_table):
+    """ (str, pronouncing table) -> str
+
+    Return the stress digits of the vowels in the pronunciation of the
+    prepared word, as found in pronouncing_table or guessed if word is not
+    there (the empty string if the table does not guess).
+
+    >>> look_up_stress_digits('CONSISTENT', SMALL_TABLE)
+    '010'
+    """
+
+    row = table_index.find_row(word, pronouncing_table)
+    if row == -1:
+        return table_index.get_stress_digits(guess_codes(word,
+                                                         pronouncing_table))
+    return table_index.get_row_stress_digits(row, pronouncing_table)
+
+
+def look_up_stress_variants(word, pronouncing_table):
+    """ (str, pronouncing table) -> list of str
+
+    Return the different stress digits of the pronunciations of the prepared
+    word in pronouncing_table, the first pronunciation's first.  A word that
+    is not there gets its guessed stress digits, or the empty string if the
+    table does not guess.
+
+    >>> table = [['READ', 'READ(1)', 'RECORD', 'RECORD(1)'],
+    ...          [['R', 'EH1', 'D'], ['R', 'IY1', 'D'],
+    ...           ['R', 'EH1', 'K', 'ER0', 'D'],
+    ...           ['R', 'IH0', 'K', 'AO1', 'R', 'D']]]
+    >>> look_up_stress_variants('READ', table)
+    ['1']
+    >>> look_up_stress_variants('RECORD', table)
+    ['10', '01']
+    """
+
+    row = table_index.find_row(word, pronouncing_table)
+    if row == -1:
+        return [look_up_stress_digits(word, pronouncing_table)]
+    variants = []
+    for variant_row in table_index.get_variant_rows(row, pronouncing_table):
+        digits = table_index.get_row_stress_digits(variant_row,
+                                                   pronouncing_table)
+        if digits not in variants:
+            variants.append(digits)
+    return variants
+
+
+def look_up_rhyme_keys(word, pronouncing_table):
+    """ (str, pronouncing table) -> list of bytes
+
+    Return the codes of the last syllable of each pronunciation of the
+    prepared word in pronouncing_table (None for a pronunciation without a
+    vowel).  A word that is not there gets the last syllable of its guessed
+    pronunciation, or no last syllables at all if the table does not guess.
+
+    >>> table = [['LIVE', 'LIVE(1)'], [['L', 'IH1', 'V'], ['L', 'AY1', 'V']]]
+    >>> [table_index.decode_pronunciation(key)
+    ...  for key in look_up_rhyme_keys('LIVE', table)]
+    [['IH1', 'V'], ['AY1', 'V']]
+    """
+
+    row = table_index.find_row(word, pronouncing_table)
+    if row == -1:
+        codes = guess_codes(word, pronouncing_table)
+        if len(codes) == 0:
+            return []
+        return [last_syllable_codes(codes)]
+    keys = []
+    for variant_row in table_index.get_variant_rows(row, pronouncing_table):
+        keys.append(table_index.get_rhyme_key(variant_row, pronouncing_table))
+    return keys
+
+
+def format_stress_pattern(stress_digits, word):
+    """ (str, str) -> str
+
+    Return the stress pattern for the stress digits stress_digits, as
+    get_stress_pattern gives it for word: one stress symbol per digit,
+    separated by single spaces and padded with spaces to the length of word.
+
+    >>> format_stress_pattern('010', 'consistent')
+    'x / x     '
+    """
+
+    res = ''
+    # looping through the stress digit of each syllable
+    for digit in stress_digits:
+        # checking if it is unstress
+        if digit == '0':
+            res += NO_STRESS_SYMBOL
+        # checking if it is primary stress
+        elif digit == '1':
+            res += PRIMARY_STRESS_SYMBOL
+        # checking if it is secondary stress
+        elif digit == '2':
+            res += SECONDARY_STRESS_SYMBOL
+        res += ' '
+    # pad the end of the stress pattern with spaces to make
+    # the length of the stress pattern the same as the length of word.
+    for i in range(len(word) - len(res)):
+        res += ' '
+    return res
+
+
+def last_syllable_codes(codes):
+    """ (bytes) -> bytes
+
+    Return the codes of the last vowel phoneme and any subsequent consonant
+    phoneme(s) in codes, or None if codes has no vowel phoneme.  This is
+    last_syllable working on phoneme codes.
+
+    >>> codes = table_index.encode_pronunciation(['D', 'OW1', 'N', 'T'])
+    >>> table_index.decode_pronunciation(last_syllable_codes(codes))
+    ['OW1', 'N', 'T']
+    """
+
+    last_index = table_index.find_last_vowel(codes)
+    if last_index == -1:
+        return None
+    return codes[last_index:]
+
 
 # ======== Students: Add Any Helper Functions Above This Line ================
 
@@ -108,15 +305,8 @@ def get_word(pronouncing_line):
     >>> get_word('ABALONE  AE2 B AH0 L OW1 N IY0')
     'ABALONE'
     """
-    res = ''
-
-    # loop over index i until see ' ' empty char
-    i = 0
-    while pronouncing_line[i] != ' ':
-        res += pronouncing_line[i]
-        i += 1
-
-    return res
+    # the word is everything before the first whitespace
+    return pronouncing_line.split(None, 1)[0]
 
 
 def get_pronunciation(pronouncing_line):
@@ -130,16 +320,8 @@ def get_pronunciation(pronouncing_line):
     >>> get_pronunciation('ABALONE  AE2 B AH0 L OW1 N IY0')
     ['AE2', 'B', 'AH0', 'L', 'OW1', 'N', 'IY0']
     """
-    res = []
-    l = pronouncing_line.split()
-
-    # looping through the prounncing_list and append to result
-    # skip first one
-    i = 1
-    while i < len(l):
-        res.append(l[i])
-        i += 1
-    return res
+    # the phonemes are every whitespace-separated part after the word
+    return pronouncing_line.split()[1:]
 
 
 def make_pronouncing_table(pronouncing_list):
@@ -149,19 +331,23 @@ def make_pronouncing_table(pronouncing_list):
                   Each pronuncing line has the form:
                   WORD  PHONEME_1 PHONEME_2 ... PHONEME_LAST
 
-    Return a pronouncing table for the data in pronouncing_list.
+    Return a pronouncing table for the data in pronouncing_list.  The table
+    is a PronouncingTable, so its words can be looked up without a scan.
 
     >>> SMALL_TABLE == make_pronouncing_table(SMALL_PRONOUNCING_DICT)
     True
     """
-    # initializing a 2 Dimension res_table for return
-    res_table = [[], []]
-    # looping through the prounicing line in pronouncing list
+    # initializing an indexed 2 Dimension res_table for return
+    res_table = table_index.PronouncingTable()
+    # collect the words and their encoded prounciations first
+    words = []
+    codes_list = []
     for pronouncing_line in pronouncing_list:
-        # append words to first list
-        res_table[0].append(get_word(pronouncing_line))
-        # append prounciation to second list
-        res_table[1].append(get_pronunciation(pronouncing_line))
+        words.append(get_word(pronouncing_line))
+        codes_list.append(table_index.encode_pronunciation(
+            get_pronunciation(pronouncing_line)))
+    # then append and index them all at once
+    res_table.add_words_codes(words, codes_list)
 
     return res_table
 
@@ -177,16 +363,16 @@ def look_up_pronunciation(word, pronouncing_table):
     >>> look_up_pronunciation("Don't!", pronouncing_table)
     ['D', 'OW1', 'N', 'T']
     """
-    index = 0
-    # loop through the words in pronouncing_table[0]
-    for w in pronouncing_table[0]:
-        # found the word
-        if w == prepare_word(word):
-            # return the the corresponding pronouncing line
-            return pronouncing_table[1][index]
-        index += 1
-    # in case that pronouncing_table is empty or not found
-    return []
+    # find the row of the word, using the table's index when it has one
+    word = prepare_word(word)
+    index = table_index.find_row(word, pronouncing_table)
+    # in case that pronouncing_table is empty or not found, guess (if the
+    # table guesses missing words)
+    if index == -1:
+        return table_index.decode_pronunciation(guess_codes(
+            word, pronouncing_table))
+    # return the the corresponding pronouncing line
+    return pronouncing_table[1][index]
 
 
 def is_vowel_phoneme(s):
@@ -247,23 +433,48 @@ def convert_to_lines(poem):
     >>> convert_to_lines(SMALL_POEM)
     ["I'll sit here instead,", '', 'A cloud on my head']
     """
-    result = []
-    poem = poem.strip()
-    res = poem.split('\n')
-    count = res.count('')
-
-    while count > 1:
-        index = res.index('')
-        res.pop(index)
-        count = res.count('')
-    for line in res:
-        result.append(line.strip())
 
-    return result
+    return list(iter_poem_lines(poem))
 
 
-def detect_rhyme_scheme(poem_lines, pronouncing_table):
-    """ (list of str, pronouncing table) -> list of str
+def iter_poem_lines(poem):
+    r""" (str or file) -> iterator of str
+
+    Yield the lines of poem one at a time, as convert_to_lines returns them:
+    with leading and trailing whitespace removed from each poem line, leading
+    and trailing blank lines removed, and each run of blank lines between
+    stanzas reduced to a single blank line.  poem may be a str or an open
+    file, which is read one line at a time.
+
+    >>> list(iter_poem_lines('One,\n\n \n\ntwo,\n\nthree.\n\n'))
+    ['One,', '', 'two,', '', 'three.']
+    >>> import io
+    >>> list(iter_poem_lines(io.StringIO(SMALL_POEM)))
+    ["I'll sit here instead,", '', 'A cloud on my head']
+    """
+
+    if isinstance(poem, str):
+        poem = poem.split('\n')
+
+    # a blank line is only yielded once a later non-blank line shows that it
+    # separates two stanzas
+    seen_poem_line = False
+    blank_pending = False
+    for line in poem:
+        line = line.strip()
+        if line == '':
+            blank_pending = seen_poem_line
+        else:
+            if blank_pending:
+                yield ''
+                blank_pending = False
+            seen_poem_line = True
+            yield line
+
+
+def detect_rhyme_scheme(poem_lines, pronouncing_table, near=False,
+                        line_tokens=None):
+    """ (list of str, pronouncing table, bool, list of list) -> list of str
 
     Return a list of single characters indicating the rhyme scheme for 
     poem_lines, with blank lines that separate stanzas given the rhyme scheme 
@@ -271,48 +482,83 @@ def detect_rhyme_scheme(poem_lines, pronouncing_table):
     annotating the rhyme scheme in a poem, consecutive uppercase letters are 
     used, starting with the letters A, B, C, etc
 
+    If near is True, a line whose last syllable is new but within
+    slant_rhyme.NEAR_RHYME_DISTANCE of the last syllable of an earlier line
+    (a slant rhyme, like NIGHT and HIDE) gets that line's letter, taking the
+    nearest such syllable.
+
+    line_tokens, if given, holds the tokens of each line of poem_lines, as
+    tokenizer.tokenize returns them, so that they are not found again.
+
     >>> pronouncing_table = SMALL_TABLE
     >>> poem_lines = ["Don't, in box!", '', 'Fox in socks.', 'Consistent.']
     >>> detect_rhyme_scheme(poem_lines, pronouncing_table)
     ['A', ' ', 'A', 'B']
+    >>> pronouncing_table = [['HIDE', 'NIGHT', 'SEA'],
+    ...                      [['HH', 'AY1', 'D'], ['N', 'AY1', 'T'],
+    ...                       ['S', 'IY1']]]
+    >>> detect_rhyme_scheme(['By night', 'we hide', 'at sea'],
+    ...                     pronouncing_table, True)
+    ['A', 'A', 'B']
     """
     syllable_list = []
-    # loop through each poem_lines and get the last syllable and append to syllable list
-    for s in poem_lines:
-        split_str = s.split(' ')
-        phoneme_list = look_up_pronunciation(split_str[-1],pronouncing_table)
-        syllable_list.append(last_syllable(phoneme_list))
-
-    # initialize a result list and next_letter for offset
-    res = []
-    next_letter = 0
-
-    # initialize a result list with empty string inside
-    for index in range(len(syllable_list)):
-        res.append(' ')
-    # now we have res = ['','',''] etc
+    # loop through each poem_lines and get the last syllable of each
+    # pronunciation of its last word (compared as phoneme codes, which are
+    # equal exactly when the phonemes are; read from the table's precomputed
+    # rhyme key column when it has one, or guessed if the table guesses)
+    for i in range(len(poem_lines)):
+        if line_tokens is None:
+            key = tokenizer.get_line_last_key(poem_lines[i])
+        else:
+            key = tokenizer.get_last_key(line_tokens[i])
+        syllable_list.append(look_up_rhyme_keys(key, pronouncing_table))
+
+    # a word with alternate pronunciations rhymes by the one that the most
+    # lines could rhyme by, so count how many lines could use each syllable
+    syllable_counts = {}
+    for syllables in syllable_list:
+        if len(syllables) > 1:
+            syllables = set(syllables)
+        for syllable in syllables:
+            syllable_counts[syllable] = syllable_counts.get(syllable, 0) + 1
     for i in range(len(syllable_list)):
-        # if current element at i is not empty string then continue with next element
-        #  =>  current element has been assigned before
-        if res[i] == ' ' and syllable_list[i] is not None:
-            # get a available letter
-            letter = get_rhyme_scheme_letter(next_letter)
-            # change letter at index i
-            res[i] = letter
-            # let j be next index always
-            j = i + 1
-            # j must be inside the bound
-            while j < len(syllable_list):
-                # if current element at j is not empty string then continue next element
-                #  =>  current element has been assigned before
-                if res[j] == ' ':
-                    # if current element at index i same as element at index j
-                    if syllable_list[i] == syllable_list[j]:
-                        res[j] = letter
-                # increase index j for current loop
-                j += 1
-            # increase the letter offset
-            next_letter += 1
+        syllables = syllable_list[i]
+        if len(syllables) == 0:
+            syllable_list[i] = None
+        elif len(syllables) == 1:
+            syllable_list[i] = syllables[0]
+        else:
+            # ties go to the first pronunciation
+            syllable_list[i] = max(syllables,
+                                   key=lambda key: syllable_counts[key])
+
+    # initialize a result list and a dict from each last syllable seen so far
+    # to its letter, so each line is labelled in one pass (letters are given
+    # out in the order the last syllables are first seen)
+    res = []
+    syllable_letters = {}
+    letters_used = 0
+
+    for syllable in syllable_list:
+        # lines without a last syllable get the blank marker
+        if syllable is None:
+            res.append(' ')
+        else:
+            # a new last syllable gets the next available letter, or in near
+            # mode the letter of the nearest one seen
+            if syllable not in syllable_letters:
+                letter = None
+                if near:
+                    for near_key in slant_rhyme.get_slant_rhyme_index(
+                            pronouncing_table).get_near_keys(syllable):
+                        if near_key in syllable_letters:
+                            letter = syllable_letters[near_key]
+                            break
+                if letter is None:
+                    letter = get_rhyme_scheme_letter(letters_used)
+                    letters_used += 1
+                syllable_letters[syllable] = letter
+            res.append(syllable_letters[syllable])
     return res
 
 
@@ -335,30 +581,11 @@ def get_stress_pattern(word, pronouncing_table):
     >>> get_stress_pattern('consistent', pronouncing_table)
     'x / x     '
     """
-    # initialize a result string to return
-    res = ''
-    # get the result phoneme_list by calling look_up_pronunciation()
-    phoneme_list = look_up_pronunciation(word, pronouncing_table)
-
-    # looping through each syllables
-    for syllables in phoneme_list:
-        # if current syllables is vowel
-        if is_vowel_phoneme(syllables):
-            # checking if it is unstress
-            if int(syllables[-1]) == 0:
-                res += NO_STRESS_SYMBOL
-            # checking if it is primary stress
-            elif int(syllables[-1]) == 1:
-                res += PRIMARY_STRESS_SYMBOL
-            # checking if it is secondary stress
-            elif int(syllables[-1]) == 2:
-                res += SECONDARY_STRESS_SYMBOL
-            res += ' '
-    # pad the end of the stress pattern with spaces to make
-    # the length of the stress pattern the same as the length of word.
-    for i in range(len(word) - len(res)):
-        res += ' '
-    return res
+    # get the stress digits of the vowels from the table's precomputed column
+    stress_digits = look_up_stress_digits(prepare_word(word),
+                                          pronouncing_table)
+    # turn them into stress symbols padded to the length of word
+    return format_stress_pattern(stress_digits, word)
 
 
 if __name__ == '__main__':
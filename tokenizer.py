@@ -0,0 +1,157 @@
+"""
+The tokenizer shared by every stage that reads the words of a poem line:
+stress patterns, rhyme schemes, meter and sound patterns.
+
+A line is walked once, and each token comes with its key (the word prepared
+for looking up in a pronouncing table, as prepare_word does) and where it
+is in the line, so that the stages that share a line's tokens neither
+split it nor prepare its words again:
+  o tokens are separated by whitespace and by dashes between words: em and
+    en dashes, and two or more hyphens in a row ('night--and')
+  o a single hyphen is part of its token, so hyphenated compounds
+    ('well-known') stay one token; a compound that is not in the table is
+    read from its parts (see stress_and_rhyme_functions.guess_codes)
+  o typographic apostrophes and quotes are read as plain ones, so a
+    contraction typed as "don't" with a curly apostrophe has the key DON'T
+    like the plain one
+  o tokens that are all punctuation, and so have an empty key, are left out
+
+Dashes are first replaced with blanks and typographic apostrophes with
+plain ones, one character for one, so the line keeps its length and its
+tokens are then found with str.split, each one's offset searched for from
+the end of the one before.  This is several times quicker than matching
+the tokens with a regular expression.
+
+A token is a tuple (token, key, start, end): the token as it is in the line
+(with plain apostrophes), its key, and the slice poem_line[start:end] that
+holds it.
+"""
+
+import re
+
+import stress_and_rhyme_functions as student
+
+# Two or more hyphens in a row, which separate tokens like a dash.
+HYPHENS = re.compile('-{2,}')
+
+# Typographic apostrophes and quotes, and the plain characters they are
+# read as.
+APOSTROPHES = str.maketrans({'‘': "'", '’': "'", 'ʼ': "'",
+                             '“': '"', '”': '"'})
+
+# APOSTROPHES, with em and en dashes read as blanks.
+SEPARATORS = str.maketrans({'‘': "'", '’': "'", 'ʼ': "'",
+                            '“': '"', '”': '"', '—': ' ', '–': ' '})
+
+
+def get_key(token):
+    """ (str) -> str
+
+    Return the key for token: the word prepared for looking up in a
+    pronouncing table, with typographic apostrophes read as plain ones.
+
+    >>> get_key('Don’t!')
+    "DON'T"
+    """
+
+    return student.prepare_word(token.translate(APOSTROPHES))
+
+
+def _blank_hyphens(match):
+    """ (re.Match) -> str
+
+    Return as many blanks as there are hyphens in match.
+    """
+
+    return ' ' * len(match.group())
+
+
+def iter_tokens(poem_line):
+    """ (str) -> iterator of tuple of (str, str, int, int)
+
+    Yield (token, key, start, end) for each token of poem_line, in order.
+
+    >>> for token in iter_tokens('"Night—and well-known  fox--"'):
+    ...     print(token)
+    ('"Night', 'NIGHT', 0, 6)
+    ('and', 'AND', 7, 10)
+    ('well-known', 'WELL-KNOWN', 11, 21)
+    ('fox', 'FOX', 23, 26)
+    """
+
+    if not poem_line.isascii():
+        poem_line = poem_line.translate(SEPARATORS)
+    if '--' in poem_line:
+        poem_line = HYPHENS.sub(_blank_hyphens, poem_line)
+    prepare_word = student.prepare_word
+    end = 0
+    for token in poem_line.split():
+        start = poem_line.find(token, end)
+        end = start + len(token)
+        key = prepare_word(token)
+        if key != '':
+            yield token, key, start, end
+
+
+def tokenize(poem_line):
+    """ (str) -> list of tuple of (str, str, int, int)
+
+    Return the tokens of poem_line, as iter_tokens yields them.
+
+    >>> tokenize("I'll sit -- here")
+    [("I'll", "I'LL", 0, 4), ('sit', 'SIT', 5, 8), ('here', 'HERE', 12, 16)]
+    """
+
+    return list(iter_tokens(poem_line))
+
+
+def get_line_last_key(poem_line):
+    """ (str) -> str
+
+    Return the key of the last token of poem_line, or the empty string if
+    it has none, without tokenizing the rest of the line.
+
+    >>> get_line_last_key('Fox in socks—')
+    'SOCKS'
+    >>> get_line_last_key('Fox in socks! ...')
+    'SOCKS'
+    """
+
+    # the usual last word: plain ASCII without dashes
+    words = poem_line.rsplit(None, 1)
+    if len(words) > 0 and words[-1].isascii() and '-' not in words[-1]:
+        key = student.prepare_word(words[-1])
+        if key != '':
+            return key
+    rest = poem_line
+    while rest != '':
+        words = rest.rsplit(None, 1)
+        if len(words) == 0:
+            return ''
+        key = get_last_key(tokenize(words[-1]))
+        if key != '':
+            return key
+        if len(words) == 1:
+            return ''
+        rest = words[0]
+    return ''
+
+
+def get_last_key(tokens):
+    """ (list of tuple of (str, str, int, int)) -> str
+
+    Return the key of the last of tokens, or the empty string if there are
+    none.
+
+    >>> get_last_key(tokenize('Fox in socks .'))
+    'SOCKS'
+    """
+
+    if len(tokens) == 0:
+        return ''
+    return tokens[-1][1]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
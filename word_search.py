@@ -0,0 +1,222 @@
+"""
+Prefix and suffix search over the words of a pronouncing table, for
+autocomplete and "words ending in -IGHT" queries.
+
+The index holds no strings of its own.  It is two arrays of table rows, one
+sorted by word and one sorted by word spelled back to front, searched with
+bisect on keys read from the table's own words.  A query finds where its
+matches start with one binary search and reads them in order from there,
+so it takes time for the matches it returns, not for the dictionary.
+
+Alternate pronunciations (READ(1), ...) and repeated words are left out,
+so each word is found once.
+"""
+
+import bisect
+import sys
+from array import array
+
+import pronouncing_table as table_index
+import stress_and_rhyme_functions as student
+
+# The name the word search index is kept under in a table's derived indexes.
+WORD_SEARCH = 'word search index'
+
+# The number of matches a query returns unless told otherwise.
+TOP_K = 10
+
+
+def _check_k(k):
+    """ (int) -> NoneType
+
+    Raise ValueError if k, the number of matches asked for, is negative.
+    A negative k would slice from the end of the rows instead.
+
+    >>> _check_k(0)
+    >>> _check_k(-1)
+    Traceback (most recent call last):
+    ValueError: k must be at least 0
+    """
+
+    if k < 0:
+        raise ValueError('k must be at least 0')
+
+
+def _reverse(word):
+    """ (str) -> str
+
+    Return word spelled back to front.
+
+    >>> _reverse('NIGHT')
+    'THGIN'
+    """
+
+    return word[::-1]
+
+
+def _next_prefix(prefix):
+    """ (str) -> str
+
+    Return the first string after every string starting with prefix.
+
+    >>> _next_prefix('AB')
+    'AC'
+    """
+
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class WordSearchIndex(object):
+    """ The rows of a pronouncing table's words in spelling order.
+
+      o prefix_rows: the rows sorted by word
+      o suffix_rows: the rows sorted by word spelled back to front
+    """
+
+    def __init__(self, pronouncing_table):
+        """ (WordSearchIndex, pronouncing table) -> NoneType
+
+        Build the index for pronouncing_table.
+
+        >>> index = WordSearchIndex(student.SMALL_TABLE)
+        >>> [index.words[row] for row in index.suffix_rows]
+        ['A', 'IN', 'SOCKS', "DON'T", 'CONSISTENT', 'BOX', 'FOX']
+        """
+
+        self.words = pronouncing_table[0]
+        rows = []
+        for row in range(len(self.words)):
+            word = self.words[row]
+            if (table_index.get_variant_base(word) == word and
+                    table_index.find_row(word, pronouncing_table) == row):
+                rows.append(row)
+        rows.sort(key=self.words.__getitem__)
+        self.prefix_rows = array('I', rows)
+        rows.sort(key=self._get_reversed)
+        self.suffix_rows = array('I', rows)
+
+    def _get_reversed(self, row):
+        """ (WordSearchIndex, int) -> str
+
+        Return the word at row spelled back to front.
+        """
+
+        return _reverse(self.words[row])
+
+    def _find_range(self, rows, key, start):
+        """ (WordSearchIndex, array, function, str) -> tuple of (int, int)
+
+        Return the first and the end index in rows of the rows whose key
+        starts with start.
+        """
+
+        first = bisect.bisect_left(rows, start, key=key)
+        end = bisect.bisect_left(rows, _next_prefix(start), lo=first, key=key)
+        return first, end
+
+    def find_prefix(self, prefix, k=TOP_K):
+        """ (WordSearchIndex, str, int) -> list of str
+
+        Return the first k words, in alphabetical order, that start with
+        prefix (in any case).  Raise ValueError if k is negative.
+
+        >>> get_word_search(student.SMALL_TABLE).find_prefix('co')
+        ['CONSISTENT']
+        """
+
+        _check_k(k)
+        prefix = prefix.upper()
+        if prefix == '':
+            return [self.words[row] for row in self.prefix_rows[:k]]
+        first, end = self._find_range(self.prefix_rows,
+                                      self.words.__getitem__, prefix)
+        return [self.words[row]
+                for row in self.prefix_rows[first:min(end, first + k)]]
+
+    def find_suffix(self, suffix, k=TOP_K):
+        """ (WordSearchIndex, str, int) -> list of str
+
+        Return the first k words that end with suffix (in any case), in
+        alphabetical order of their spelling back to front, so that words
+        sharing longer endings are together.  Raise ValueError if k is
+        negative.
+
+        >>> get_word_search(student.SMALL_TABLE).find_suffix('ox', 5)
+        ['BOX', 'FOX']
+        """
+
+        _check_k(k)
+        suffix = suffix.upper()
+        if suffix == '':
+            return [self.words[row] for row in self.suffix_rows[:k]]
+        first, end = self._find_range(self.suffix_rows, self._get_reversed,
+                                      _reverse(suffix))
+        return [self.words[row]
+                for row in self.suffix_rows[first:min(end, first + k)]]
+
+    def count_prefix(self, prefix):
+        """ (WordSearchIndex, str) -> int
+
+        Return the number of words that start with prefix.
+
+        >>> get_word_search(student.SMALL_TABLE).count_prefix('')
+        7
+        """
+
+        prefix = prefix.upper()
+        if prefix == '':
+            return len(self.prefix_rows)
+        first, end = self._find_range(self.prefix_rows,
+                                      self.words.__getitem__, prefix)
+        return end - first
+
+    def count_suffix(self, suffix):
+        """ (WordSearchIndex, str) -> int
+
+        Return the number of words that end with suffix.
+
+        >>> get_word_search(student.SMALL_TABLE).count_suffix('CKS')
+        1
+        """
+
+        suffix = suffix.upper()
+        if suffix == '':
+            return len(self.suffix_rows)
+        first, end = self._find_range(self.suffix_rows, self._get_reversed,
+                                      _reverse(suffix))
+        return end - first
+
+    def get_memory_report(self):
+        """ (WordSearchIndex) -> dict of {str: int}
+
+        Return the bytes used by the index and by the table's words for
+        comparison, and the number of words indexed.
+        """
+
+        words_bytes = sys.getsizeof(self.words)
+        if isinstance(self.words, list):
+            for word in self.words:
+                words_bytes += sys.getsizeof(word)
+        return {'words_indexed': len(self.prefix_rows),
+                'index_bytes': (sys.getsizeof(self.prefix_rows) +
+                                sys.getsizeof(self.suffix_rows)),
+                'table_words_bytes': words_bytes}
+
+
+def get_word_search(pronouncing_table):
+    """ (pronouncing table) -> WordSearchIndex
+
+    Return the word search index for pronouncing_table, building it the
+    first time it is needed.
+
+    >>> get_word_search(student.SMALL_TABLE).find_prefix('', 3)
+    ['A', 'BOX', 'CONSISTENT']
+    """
+
+    return table_index.get_derived(pronouncing_table, WORD_SEARCH,
+                                   WordSearchIndex)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()